@@ -0,0 +1,82 @@
+"""
+Allocations per broadcast at 10, 100 and 1000 recipients
+
+    PYTHONPATH=src python bench/bench_broadcast.py --recipients 10 100 1000
+
+Each recipient queues the message on an OutboundBuffer the way ClientThread does.
+'framed once' is the EventQueue path - the message is framed before fan-out and
+shared by every buffer. 'per recipient' sends the unframed message so every
+send_message has to frame its own copy.
+"""
+import argparse
+import logging
+import time
+import tracemalloc
+
+from event_queue import EventQueue, Event
+from mud_parser import MudParser
+from mud_parser.verb import VerbResponse
+from outbound import OutboundBuffer
+
+logging.disable()
+
+MESSAGE = 'A deep bell tolls across the land, and the sky darkens to the colour of ash.'
+
+class BufferedClient:
+    def __init__(self):
+        self.outbound = OutboundBuffer(limit=1 << 30)
+
+    def send_message(self, message: bytes):
+        self.outbound.put(MudParser.format_newline(message))
+
+    def drain(self):
+        self.outbound.take()
+
+def broadcast_framed(event_queue: EventQueue, clients: dict, response: VerbResponse):
+    event_queue._execute_event(Event(response), clients)
+
+def broadcast_per_recipient(event_queue: EventQueue, clients: dict, response: VerbResponse):
+    for client in clients.values():
+        client.send_message(response.message_they)
+
+def measure(broadcast, recipients: int, rounds: int):
+    """
+    Net bytes allocated and peak traced memory per broadcast, and broadcasts/s
+    """
+    event_queue = EventQueue()
+    clients = {id: BufferedClient() for id in range(recipients)}
+    response = VerbResponse(message_they=MESSAGE)
+    broadcast(event_queue, clients, response)
+    for client in clients.values():
+        client.drain()
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    broadcast(event_queue, clients, response)
+    queued, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    for client in clients.values():
+        client.drain()
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        broadcast(event_queue, clients, response)
+        for client in clients.values():
+            client.drain()
+    elapsed = time.perf_counter() - start
+    return queued - before, peak - before, rounds / elapsed
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--recipients', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    for recipients in args.recipients:
+        for name, broadcast in (('framed once', broadcast_framed),
+                                ('per recipient', broadcast_per_recipient)):
+            queued, peak, rate = measure(broadcast, recipients, args.rounds)
+            print(f'{recipients:>5} recipients {name:>13}: '
+                  f'{queued:>9,} B queued  {peak:>9,} B peak  '
+                  f'{queued / recipients:>6.0f} B/recipient  {rate:>8,.0f} broadcasts/s')
@@ -0,0 +1,44 @@
+"""
+Adverb completion cost - linear substring scan vs PrefixTrie as the word list grows
+
+    PYTHONPATH=src python bench/bench_completion.py --words 130 10000 100000
+"""
+import argparse
+import logging
+import random
+import string
+import time
+
+from mud_parser.trie import PrefixTrie
+
+logging.disable()
+
+def linear(words, prefix: str):
+    for word in words:
+        if prefix in word:
+            return word
+    return None
+
+def synthetic(count: int):
+    return sorted({''.join(random.choices(string.ascii_lowercase, k=random.randint(5, 12))) + 'ly'
+                   for _ in range(count)})
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--words', type=int, nargs='+', default=[130, 10_000, 100_000])
+    parser.add_argument('--lookups', type=int, default=10_000)
+    args = parser.parse_args()
+
+    for count in args.words:
+        words = synthetic(count)
+        trie = PrefixTrie(words)
+        prefixes = [word[:random.randint(3, len(word))] for word in random.choices(words, k=args.lookups)]
+        start = time.perf_counter()
+        for prefix in prefixes:
+            linear(words, prefix)
+        scanned = time.perf_counter()
+        for prefix in prefixes:
+            trie.resolve(prefix)
+        resolved = time.perf_counter()
+        print(f'{len(words):>7,} words: scan {(scanned - start) / args.lookups * 1e6:9.2f}us, '
+              f'trie {(resolved - scanned) / args.lookups * 1e6:6.2f}us')
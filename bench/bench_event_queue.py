@@ -0,0 +1,62 @@
+"""
+Push/dispatch throughput of EventQueue with many producer threads
+
+    PYTHONPATH=src python bench/bench_event_queue.py --producers 128 --events 500
+"""
+import argparse
+import logging
+import time
+
+from threading import Thread
+from event_queue import EventQueue, Event, Scheduler
+from mud_parser.verb import VerbResponse
+
+logging.disable()
+
+class NullClient:
+    def send_message(self, message: bytes):
+        pass
+
+def run(producers: int, events: int, block: bool):
+    event_queue = EventQueue()
+    clients = {1: NullClient()}
+    scheduler = Scheduler(event_queue, lambda: event_queue.execute_events(clients))
+    response = VerbResponse(message_they='ping')
+    last_events = []
+
+    def produce():
+        event = None
+        for _ in range(events):
+            event = Event(response)
+            event_queue.push_event(event, block=block)
+        last_events.append(event)
+
+    threads = [Thread(target=produce) for _ in range(producers)]
+    scheduler.start()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    pushed = time.perf_counter()
+    for event in last_events:
+        event.wait()
+    dispatched = time.perf_counter()
+    scheduler.stop()
+
+    total = producers * events
+    mode = 'blocking' if block else 'non-blocking'
+    print(f'{producers:>4} producers x {events} events ({mode}): '
+          f'push {total / (pushed - start):>10,.0f}/s  '
+          f'dispatch {total / (dispatched - start):>10,.0f}/s')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--producers', type=int, nargs='+', default=[1, 16, 128, 256])
+    parser.add_argument('--events', type=int, default=500)
+    args = parser.parse_args()
+
+    for producers in args.producers:
+        run(producers, args.events, block=False)
+    for producers in args.producers:
+        run(producers, max(args.events // 10, 1), block=True)
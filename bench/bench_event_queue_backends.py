@@ -0,0 +1,68 @@
+"""
+Heap vs timing wheel EventQueue backends with large numbers of pending events
+
+    PYTHONPATH=src python bench/bench_event_queue_backends.py --pending 10000 100000 1000000
+"""
+import argparse
+import logging
+import random
+import time
+
+from event_queue import EventHandle
+from event_queue.backend import HeapBackend
+from event_queue.timing_wheel import TimingWheelBackend
+
+logging.disable()
+
+BACKENDS = {
+    'heap': HeapBackend,
+    'wheel': TimingWheelBackend
+}
+
+class TimedEvent:
+    __slots__ = ('timestamp',)
+
+    def __init__(self, timestamp: float):
+        self.timestamp = timestamp
+
+def run(name: str, pending: int, horizon: float, tick: float, cancels: int):
+    random.seed(pending)
+    now = time.time()
+    backend = BACKENDS[name]()
+    handles = [EventHandle(None, TimedEvent(now + random.uniform(1, horizon)), sequence)
+               for sequence in range(pending)]
+
+    start = time.perf_counter()
+    for handle in handles:
+        backend.push(handle)
+    pushed = time.perf_counter()
+    for handle in random.sample(handles, cancels):
+        backend.remove(handle)
+    cancelled = time.perf_counter()
+
+    # Drain the queue the way the scheduler would, one tick at a time
+    fired = 0
+    clock = now
+    while len(backend):
+        clock += tick
+        fired += len(backend.pop_due(clock))
+    drained = time.perf_counter()
+
+    print(f'{name:>5} {pending:>9,} pending: '
+          f'push {(pushed - start) / pending * 1e6:6.2f}us  '
+          f'cancel {(cancelled - pushed) / cancels * 1e6:9.2f}us  '
+          f'expire {(drained - cancelled) / fired * 1e6:6.2f}us/event '
+          f'({(drained - cancelled):.2f}s for {horizon / tick:,.0f} ticks)')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pending', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument('--horizon', type=float, default=600, help='seconds over which events are spread')
+    parser.add_argument('--tick', type=float, default=0.1, help='scheduler tick in seconds')
+    parser.add_argument('--cancel-ratio', type=float, default=0.5, help='share of events cancelled before expiry')
+    args = parser.parse_args()
+
+    for pending in args.pending:
+        for name in args.backends:
+            run(name, pending, args.horizon, args.tick, int(pending * args.cancel_ratio))
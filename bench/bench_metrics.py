@@ -0,0 +1,71 @@
+"""
+Cost of recording a metric - counter increments and histogram observations per call
+
+    PYTHONPATH=src PARSER_ENGINE=rules python bench/bench_metrics.py --calls 1000000 --threads 1 4
+
+Also times MudParser.parse_data on 'look' so the per-command overhead of the two
+histograms and a counter it records can be read against a whole command.
+"""
+import argparse
+import logging
+import random
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from metrics import Counter, Histogram, MetricsRegistry
+from mud_parser import MudParser
+from data.models import Character, Room
+
+logging.disable()
+
+def time_calls(function, values: list, threads: int) -> float:
+    """
+    Nanoseconds per call with the calls split over threads
+    """
+    share = len(values) // threads
+
+    def run(start: int):
+        for value in values[start:start + share]:
+            function(value)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(run, range(0, share * threads, share)))
+    return (time.perf_counter() - start) / (share * threads) * 1e9
+
+def time_parse_data(commands: int) -> float:
+    character = Character(id=1, name='bench', short_desc='bench', account_hash='1')
+    with patch.object(Room, 'get_desc', lambda session, room_id: 'A room.'):
+        start = time.perf_counter()
+        for _ in range(commands):
+            MudParser.parse_data(None, character, b'look')
+    return (time.perf_counter() - start) / commands * 1e9
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=1_000_000)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4])
+    args = parser.parse_args()
+
+    latencies = [random.lognormvariate(-7, 1) for _ in range(args.calls)]
+    for threads in args.threads:
+        counter, histogram = Counter(), Histogram()
+        baseline = time_calls(lambda value: None, latencies, threads)
+        print(f'{threads} thread(s), call overhead of {baseline:.0f}ns taken off: '
+              f'counter.inc {time_calls(lambda value: counter.inc(), latencies, threads) - baseline:.0f}ns  '
+              f'histogram.observe {time_calls(histogram.observe, latencies, threads) - baseline:.0f}ns')
+
+    start = time.perf_counter()
+    histogram.quantiles()
+    print(f'quantiles of {histogram.count:,} observations in {len(histogram._counts)} buckets: '
+          f'{(time.perf_counter() - start) * 1e6:.0f}us')
+    registry = MetricsRegistry()
+    family = registry.histogram('bench_seconds', 'Bench', ('verb',))
+    for verb in ('look', 'north', 'laugh'):
+        for latency in latencies[:10_000]:
+            family.labels(verb).observe(latency)
+    start = time.perf_counter()
+    registry.render()
+    print(f'Prometheus render of 3 verbs: {(time.perf_counter() - start) * 1e6:.0f}us')
+    print(f'parse_data look: {time_parse_data(20_000) / 1000:.1f}us per command')
@@ -0,0 +1,46 @@
+"""
+Parse throughput of per-client NLP calls vs the shared ParseBatcher as concurrency grows
+
+    PYTHONPATH=src python bench/bench_parse_batching.py --clients 1 8 32 128
+"""
+import argparse
+import logging
+import random
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from mud_parser import Phrase
+from mud_parser.mud_parser import NLP
+from mud_parser.batcher import ParseBatcher
+
+logging.disable()
+
+# Only phrases the fast path leaves to spaCy
+COMMANDS = [
+    'kill slimy green goblin',
+    'look at the rusty sword',
+    'put big blue cracker in shiny gold chest',
+    'laugh at rha',
+    'poke the old wizard',
+]
+
+def run(parse, clients: int, commands: int) -> float:
+    phrases = random.choices(COMMANDS, k=commands)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(executor.map(parse, phrases))
+    return commands / (time.perf_counter() - start)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 8, 32, 128])
+    parser.add_argument('--commands', type=int, default=5_000)
+    parser.add_argument('--window', type=float, default=0.01)
+    args = parser.parse_args()
+
+    batcher = ParseBatcher(NLP, Phrase.parse_doc, window=args.window)
+    unbatched = lambda phrase: Phrase.parse_doc(NLP(phrase))
+    for clients in args.clients:
+        direct = run(unbatched, clients, args.commands)
+        batched = run(batcher.parse, clients, args.commands)
+        print(f'{clients:>4} clients: direct {direct:,.0f}/s, batched {batched:,.0f}/s')
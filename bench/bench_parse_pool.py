@@ -0,0 +1,52 @@
+"""
+Parse throughput of the multi-process ParsePool from 1 to N worker processes
+
+    PYTHONPATH=src python bench/bench_parse_pool.py --workers 1 2 4 8
+"""
+import argparse
+import logging
+import os
+import random
+import time
+
+from mud_parser import Phrase
+from mud_parser.mud_parser import NLP
+from mud_parser.parse_pool import ParsePool
+
+logging.disable()
+
+# Only phrases the fast path leaves to spaCy
+COMMANDS = [
+    'kill slimy green goblin',
+    'look at the rusty sword',
+    'put big blue cracker in shiny gold chest',
+    'laugh at rha',
+    'poke the old wizard',
+]
+
+def run(pool: ParsePool, phrases, chunk: int) -> float:
+    start = time.perf_counter()
+    futures = [pool.submit(phrases[index:index + chunk]) for index in range(0, len(phrases), chunk)]
+    for future in futures:
+        future.result()
+    return len(phrases) / (time.perf_counter() - start)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count()])
+    parser.add_argument('--commands', type=int, default=20_000)
+    parser.add_argument('--chunk', type=int, default=1, help='phrases per task, 1 is one command per client')
+    args = parser.parse_args()
+
+    phrases = random.choices(COMMANDS, k=args.commands)
+    start = time.perf_counter()
+    for phrase in phrases:
+        Phrase.parse_doc(NLP(phrase))
+    print(f'  in process: {args.commands / (time.perf_counter() - start):,.0f} commands/s')
+
+    for workers in args.workers:
+        pool = ParsePool(workers)
+        # Start every worker and load its model before timing
+        run(pool, phrases[:workers * 10], 1)
+        print(f'{workers:>3} workers: {run(pool, phrases, args.chunk):,.0f} commands/s')
+        pool.shutdown()
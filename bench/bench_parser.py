@@ -0,0 +1,52 @@
+"""
+Phrase parsing throughput with and without the spaCy-free fast path
+
+    PYTHONPATH=src python bench/bench_parser.py --commands 20000
+"""
+import argparse
+import logging
+import random
+import time
+
+from exceptions import BadArguments, UnknownVerb
+from mud_parser import Phrase
+
+logging.disable()
+
+# Roughly what players send - mostly movement and look, some emotes and targeted actions
+COMMAND_MIX = [
+    ('n', 12), ('s', 12), ('e', 12), ('w', 12), ('north', 4), ('south', 4),
+    ('ne', 3), ('sw', 3), ('look', 15),
+    ('laugh', 4), ('laugh happily', 4), ('laugh at rha', 3),
+    ('poke rha', 3), ('look at the rusty sword', 3), ('kill goblin', 3),
+    ('put the sword in the chest', 2), ('dance', 1),
+]
+
+def fast(command: str) -> Phrase:
+    return Phrase(command, Phrase.fast_parse(command))
+
+def slow(command: str) -> Phrase:
+    return Phrase(command)
+
+def run(parse, commands) -> float:
+    start = time.perf_counter()
+    for command in commands:
+        try:
+            parse(command)
+        except (BadArguments, UnknownVerb, AssertionError):
+            pass
+    return time.perf_counter() - start
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--commands', type=int, default=20_000)
+    args = parser.parse_args()
+
+    phrases, weights = zip(*COMMAND_MIX)
+    commands = random.choices(phrases, weights, k=args.commands)
+    hits = sum(1 for command in commands if Phrase.fast_parse(command))
+
+    for name, parse in (('spaCy only', slow), ('fast path', fast)):
+        elapsed = run(parse, commands)
+        print(f'{name:>10}: {args.commands / elapsed:,.0f} commands/s')
+    print(f'{hits / args.commands:.0%} of commands skipped spaCy')
@@ -0,0 +1,40 @@
+"""
+Tagging throughput of the spaCy and rule-based parser engines
+
+    PYTHONPATH=src python bench/bench_parser_engines.py --commands 20000
+"""
+import argparse
+import logging
+import random
+import time
+
+from mud_parser import Phrase
+from mud_parser.engine import ENGINES
+
+logging.disable()
+
+# Only phrases the fast path leaves to an engine
+COMMANDS = [
+    'kill slimy green goblin',
+    'look at the rusty sword',
+    'put big blue cracker in shiny gold chest',
+    'laugh at rha',
+    'poke the old wizard',
+]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--commands', type=int, default=20_000)
+    args = parser.parse_args()
+
+    phrases = random.choices(COMMANDS, k=args.commands)
+    rates = {}
+    for name, engine_class in ENGINES.items():
+        start = time.perf_counter()
+        engine = engine_class()
+        loaded = time.perf_counter()
+        for phrase in phrases:
+            Phrase.parse_doc(engine(phrase))
+        rates[name] = args.commands / (time.perf_counter() - loaded)
+        print(f'{name:>6}: load {loaded - start:.2f}s, {rates[name]:,.0f} commands/s')
+    print(f'rules / spacy: {rates["rules"] / rates["spacy"]:.1f}x')
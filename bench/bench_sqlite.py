@@ -0,0 +1,52 @@
+"""
+Seeding and startup time of a large world on the SQLite backend, in memory and on disk
+
+    PYTHONPATH=src python bench/bench_sqlite.py --rooms 100000 --players 10000
+
+Seeds bench/world.py's grid through create_sqlite_engine with SQLITE_PRAGMAS, then times
+what the server does on startup - loading the world graph and target index - and the
+per-command queries that still go to the database.
+"""
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy.orm import Session
+from config import SQLITE_PRAGMAS
+from data.sqlite import create_sqlite_engine
+from data.models import Character, MudObject, Room
+from world import seed_world
+
+logging.disable()
+
+def run(path: str, rooms: int, players: int, queries: int):
+    engine = create_sqlite_engine(f'sqlite:///{path}', SQLITE_PRAGMAS)
+    start = time.perf_counter()
+    room_ids = seed_world(engine, rooms, players)
+    seeded = time.perf_counter()
+    with Session(engine) as session:
+        Room.load_world_graph(session)
+        MudObject.load_target_index(session)
+    loaded = time.perf_counter()
+    with Session(engine) as session:
+        for _ in range(queries):
+            Character.get_character(session, f'bot{random.randrange(players)}')
+            Room.get_occupants(session, random.choice(room_ids))
+    queried = time.perf_counter()
+    engine.dispose()
+    print(f'{"file" if os.sep in path else path:>8}: seed {seeded - start:5.1f}s  startup load {loaded - seeded:5.2f}s  '
+          f'{queries * 2 / (queried - loaded):>8,.0f} queries/s')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rooms', type=int, default=100_000)
+    parser.add_argument('--players', type=int, default=10_000)
+    parser.add_argument('--queries', type=int, default=10_000)
+    args = parser.parse_args()
+
+    print(f'{args.rooms:,} rooms, {args.players:,} players')
+    for path in (':memory:', os.path.join(tempfile.mkdtemp(), 'bench_sqlite.db')):
+        run(path, args.rooms, args.players, args.queries)
@@ -0,0 +1,87 @@
+"""
+Import time of the server modules and time from launch to the first accepted connection
+
+    PYTHONPATH=src python bench/bench_startup.py --budget 500
+    PYTHONPATH=src python bench/bench_startup.py --accept  # needs the database env vars
+
+Fails with a non-zero exit when importing a module takes longer than --budget ms.
+"""
+import argparse
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+
+MODULES = ['config', 'data.models', 'mud_parser', 'event_queue', 'pymud']
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+def import_times(module: str):
+    """
+    Total import time of a module in a fresh interpreter, and its slowest direct imports
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, cwd=SRC, check=True)
+    total, imports = 0, []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        # Indent grows by two per level - one space is imported by the interpreter itself
+        depth = (len(match.group(3)) + 1) // 2
+        cumulative = int(match.group(2))
+        if depth == 1:
+            total += cumulative
+        elif depth == 2:
+            imports.append((cumulative, match.group(4)))
+    imports.sort(reverse=True)
+    return total / 1000, imports
+
+def time_to_accept(port: int, timeout: float) -> float:
+    """
+    Launch the server and poll until it accepts a connection
+    """
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, 'pymud.py'], cwd=SRC,
+                              env={**os.environ, 'PORT': str(port)},
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+                return time.perf_counter() - start
+            except OSError:
+                if server.poll() is not None:
+                    raise RuntimeError(f'Server exited with {server.returncode}')
+                time.sleep(0.01)
+        raise TimeoutError(f'No connection accepted within {timeout}s')
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--modules', nargs='+', default=MODULES)
+    parser.add_argument('--top', type=int, default=5)
+    parser.add_argument('--budget', type=float, help='maximum import time per module in ms')
+    parser.add_argument('--accept', action='store_true', help='also measure time to first accept')
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--timeout', type=float, default=60)
+    args = parser.parse_args()
+
+    over_budget = []
+    for module in args.modules:
+        total, imports = import_times(module)
+        print(f'{module}: {total:.0f}ms')
+        for cumulative, name in imports[:args.top]:
+            print(f'    {cumulative / 1000:8.1f}ms  {name}')
+        if args.budget and total > args.budget:
+            over_budget.append(module)
+
+    if args.accept:
+        print(f'time to first accept: {time_to_accept(args.port, args.timeout):.2f}s')
+
+    if over_budget:
+        sys.exit(f'Over the {args.budget:.0f}ms import budget: {", ".join(over_budget)}')
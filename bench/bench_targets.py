@@ -0,0 +1,55 @@
+"""
+Target lookup in a crowded room - LIKE scan through the database vs the in-memory TargetIndex
+
+    PYTHONPATH=src python bench/bench_targets.py --objects 100 1000
+"""
+import argparse
+import logging
+import random
+import time
+
+import sqlalchemy as db
+from sqlalchemy.orm import Session
+from data.models import Base, MudObject, Room
+from data.target_index import TargetIndex
+
+logging.disable()
+
+ADJECTIVES = ['rusty', 'shiny', 'green', 'broken', 'heavy', 'tiny', 'ancient', 'stinky']
+NOUNS = ['sword', 'shield', 'goblin', 'coin', 'gem', 'helmet', 'boot', 'scroll']
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--objects', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--lookups', type=int, default=2000)
+    args = parser.parse_args()
+
+    for count in args.objects:
+        engine = db.create_engine('sqlite://')
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            room = Room(short_desc='A crowded room', long_desc='Stuff everywhere.')
+            session.add(room)
+            session.flush()
+            session.add_all(MudObject(short_desc=f'a {random.choice(ADJECTIVES)} {random.choice(NOUNS)}',
+                                      long_desc='Nothing special.',
+                                      parent=room.id) for _ in range(count))
+            session.commit()
+            targets = TargetIndex()
+            targets.load(session.execute(db.select(
+                MudObject.id, MudObject.short_desc, MudObject.long_desc, MudObject.parent).where(
+                MudObject.parent.is_not(None))).all())
+            chunks = [[f'{random.choice(ADJECTIVES)} {random.choice(NOUNS)}', random.choice(NOUNS)]
+                      for _ in range(args.lookups)]
+
+            start = time.perf_counter()
+            for chunk_list in chunks:
+                for chunk in chunk_list:
+                    Room.match_short_desc(session, chunk, room.id)
+            scanned = time.perf_counter()
+            for chunk_list in chunks:
+                targets.match(room.id, chunk_list)
+            indexed = time.perf_counter()
+
+        print(f'{count:>6,} objects: LIKE {(scanned - start) / args.lookups * 1e6:8.1f}us '
+              f'({2 * args.lookups:,} queries), index {(indexed - scanned) / args.lookups * 1e6:6.1f}us (0 queries)')
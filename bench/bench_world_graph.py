@@ -0,0 +1,57 @@
+"""
+WorldGraph build time, memory and lookup cost for a large synthetic grid world
+
+    PYTHONPATH=src python bench/bench_world_graph.py --rooms 100000
+"""
+import argparse
+import logging
+import math
+import random
+import time
+import tracemalloc
+
+from data.world_graph import WorldGraph
+
+logging.disable()
+
+DIRECTIONS = [('north', 'south'), ('south', 'north'), ('east', 'west'), ('west', 'east')]
+
+def grid(rooms: int):
+    """
+    Rooms on a square grid, each connected to its neighbours
+    """
+    width = math.isqrt(rooms)
+    room_rows = [(id, f'Room {id}', f'You are standing in room {id}.') for id in range(rooms)]
+    connections = []
+    for id in range(rooms):
+        if id % width + 1 < width and id + 1 < rooms:
+            connections += [(id, 'east', id + 1), (id + 1, 'west', id)]
+        if id + width < rooms:
+            connections += [(id, 'south', id + width), (id + width, 'north', id)]
+    return room_rows, connections
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rooms', type=int, default=100_000)
+    parser.add_argument('--lookups', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rooms, connections = grid(args.rooms)
+    world = WorldGraph()
+    tracemalloc.start()
+    start = time.perf_counter()
+    world.load(rooms, connections, DIRECTIONS)
+    loaded = time.perf_counter()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    room_ids = [random.randrange(args.rooms) for _ in range(args.lookups)]
+    start_lookup = time.perf_counter()
+    for room_id in room_ids:
+        world.get_desc(room_id)
+        world.get_destination(room_id, 'east')
+    looked_up = time.perf_counter()
+
+    print(f'{args.rooms:,} rooms, {len(connections):,} exits: '
+          f'load {loaded - start:.2f}s, {memory / 2 ** 20:.1f} MiB, '
+          f'look + move {(looked_up - start_lookup) / args.lookups * 1e6:.2f}us')
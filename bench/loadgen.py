@@ -0,0 +1,235 @@
+"""
+Load generator - concurrent telnet players replaying a command mix against pymud
+
+    PYTHONPATH=src python bench/loadgen.py --spawn --players 500 --rate 1000 --duration 30
+    PYTHONPATH=src SERVER_MODE=asyncio python bench/loadgen.py --spawn --players 2000 --rate 4000
+    PYTHONPATH=src python bench/loadgen.py --port 5000 --players 200  # a running loadgen_server.py
+
+--spawn starts bench/loadgen_server.py on a freshly seeded world - a temporary SQLite
+file unless DATABASE_BACKEND or DATABASE_URI says otherwise - and also reports the server's
+query count and RSS - with --profile, also a profile of the load (PROFILE_MODE and
+PROFILE_SAMPLE_RATE pick how). Each player sends on a fixed schedule, so latency is measured from
+when a command was due rather than when it went out and a stalled server is not hidden.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import time
+
+from collections import deque
+from mud_parser import MudParser
+from world import WORLD_MARKER
+
+COMMANDS = {
+    'look': ['look'],
+    'move': ['north', 'south', 'east', 'west', 'n', 's', 'e', 'w'],
+    # Emotes with an adverb are left out - Laugh and Poke have no SECOND_STRING to send
+    'emote': ['laugh', 'poke'],
+    'garbage': ['rawriamadinosaur', 'xyzzy plugh', 'asdf'],
+}
+DEFAULT_MIX = 'look=4,move=3,emote=2,garbage=1'
+# Replies to a player's own commands - anything else is another player's event
+REPLIES = {message.encode('utf-8') for message in MudParser.PHRASE_ERROR + MudParser.TARGET_ERROR}
+REPLIES.add(b'There\'s no exit in that direction.')
+SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'loadgen_server.py')
+
+def raise_file_limit():
+    """
+    Every player is a socket - lift the soft descriptor limit to the hard one
+    """
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+def is_reply(line: bytes) -> bool:
+    return line.startswith(b'You ') or WORLD_MARKER.encode('utf-8') in line or line in REPLIES
+
+def parse_mix(mix: str):
+    """
+    'look=4,move=3' -> commands and weights to draw them with
+    """
+    commands, weights = [], []
+    for entry in mix.split(','):
+        kind, _, weight = entry.partition('=')
+        for command in COMMANDS[kind]:
+            commands.append(command)
+            weights.append(float(weight or 1) / len(COMMANDS[kind]))
+    return commands, weights
+
+def percentile(ordered: list, fraction: float) -> float:
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] if ordered else float('nan')
+
+class Player:
+    """
+    One telnet connection - sends on a schedule and pairs replies with commands in order
+    """
+    def __init__(self, id: int, login: bool):
+        self.id = id
+        self.login = login
+        self.sent = 0
+        self.latencies = []
+        self.errors = 0
+        # Due times of commands awaiting a reply - None for the look sent on login
+        self._outstanding = deque()
+        self._ready = asyncio.Event()
+
+    async def connect(self, host: str, port: int):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self._outstanding.append(None)
+        if self.login:
+            login = {'character_name': f'bot{self.id}', 'account_hash': '1'}
+            self.writer.write(json.dumps(login).encode('utf-8') + MudParser.NEWLINE)
+        self._receiver = asyncio.create_task(self._receive())
+        await self._ready.wait()
+
+    async def _receive(self):
+        try:
+            while line := await self.reader.readline():
+                if is_reply(line.rstrip()) and self._outstanding:
+                    due = self._outstanding.popleft()
+                    if due is None:
+                        self._ready.set()
+                    else:
+                        self.latencies.append(time.perf_counter() - due)
+        except ConnectionError:
+            self.errors += 1
+        self._ready.set()
+
+    async def play(self, commands: list, weights: list, interval: float, until: float):
+        due = time.perf_counter() + random.uniform(0, interval)
+        while due < until and not self.reader.at_eof():
+            await asyncio.sleep(max(0, due - time.perf_counter()))
+            self._outstanding.append(due)
+            self.writer.write(random.choices(commands, weights)[0].encode('utf-8') + MudParser.NEWLINE)
+            self.sent += 1
+            due += interval
+
+    async def drain(self, timeout: float):
+        deadline = time.perf_counter() + timeout
+        while self._outstanding and time.perf_counter() < deadline and not self.reader.at_eof():
+            await asyncio.sleep(0.05)
+        self.writer.close()
+        self._receiver.cancel()
+
+    @property
+    def lost(self) -> int:
+        return len(self._outstanding)
+
+class ServerProcess:
+    """
+    loadgen_server.py on a freshly seeded world
+    """
+    def __init__(self, players: int, rooms: int, port: int, timeout: float):
+        self.process = subprocess.Popen([sys.executable, SERVER, '--seed', '--players', str(players),
+                                         '--rooms', str(rooms), '--port', str(port)],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        start = time.perf_counter()
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+                return
+            except OSError:
+                if self.process.poll() is not None:
+                    raise RuntimeError(f'Server exited with {self.process.returncode}')
+                if time.perf_counter() - start > timeout:
+                    self.stop()
+                    raise TimeoutError(f'No connection accepted within {timeout}s')
+                time.sleep(0.1)
+
+    def request(self, command: str) -> dict:
+        self.process.stdin.write(f'{command}\n')
+        self.process.stdin.flush()
+        return json.loads(self.process.stdout.readline())
+
+    def stats(self) -> dict:
+        return self.request('stats')
+
+    def toggle_profile(self) -> list:
+        return self.request('profile')['profile']
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait()
+
+async def run(args, server: ServerProcess=None):
+    commands, weights = parse_mix(args.mix)
+    players = [Player(id, not args.no_login) for id in range(args.players)]
+    connecting = asyncio.Semaphore(args.connect_concurrency)
+
+    async def connect(player: Player):
+        async with connecting:
+            await player.connect(args.host, args.port)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(connect(player) for player in players))
+    print(f'{args.players} players logged in in {time.perf_counter() - start:.1f}s')
+
+    before = server.stats() if server else None
+    if server and args.profile:
+        server.toggle_profile()
+    start = time.perf_counter()
+    interval = args.players / args.rate
+    await asyncio.gather(*(player.play(commands, weights, interval, start + args.duration)
+                           for player in players))
+    await asyncio.gather(*(player.drain(args.drain) for player in players))
+    elapsed = time.perf_counter() - start
+    after = server.stats() if server else None
+    profiles = server.toggle_profile() if server and args.profile else []
+    # Let the server log everyone out before it is stopped
+    await asyncio.sleep(1)
+
+    latencies = sorted(latency for player in players for latency in player.latencies)
+    sent = sum(player.sent for player in players)
+    print(f'commands: {sent:,} sent  {len(latencies):,} answered  '
+          f'{sum(player.lost for player in players):,} unanswered  '
+          f'{sum(player.errors for player in players)} connection errors')
+    print(f'throughput: {len(latencies) / elapsed:,.0f} commands/s (target {args.rate:,.0f})')
+    print('latency ms: ' + '  '.join(f'{name} {percentile(latencies, fraction) * 1000:.1f}'
+                                      for name, fraction in (('p50', 0.5), ('p95', 0.95),
+                                                             ('p99', 0.99), ('max', 1))))
+    if server:
+        queries = after['queries'] - before['queries']
+        print(f'database: {queries:,} queries  {queries / max(len(latencies), 1):.2f}/command')
+        for verb, stats in sorted(after['verbs'].items()):
+            previous = before['verbs'].get(verb, {'commands': 0, 'queries': 0, 'time': 0})
+            commands = stats['commands'] - previous['commands']
+            verb_queries = stats['queries'] - previous['queries']
+            milliseconds = (stats['time'] - previous['time']) * 1000
+            per_command = f'{verb_queries / commands:5.2f}' if commands else '    -'
+            print(f'    {verb:>10}: {commands:>7,} commands  {verb_queries:>7,} queries  '
+                  f'{per_command}/command  {milliseconds:8.1f}ms  {stats["n_plus_one"]} N+1')
+        print(f'server rss: {before["rss"] / 2**20:.0f}MB -> {after["rss"] / 2**20:.0f}MB')
+    for path in profiles:
+        print(f'profile: {path}')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--players', type=int, default=100)
+    parser.add_argument('--rate', type=float, default=200, help='commands per second over all players')
+    parser.add_argument('--duration', type=float, default=10, help='seconds of load')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'weights of {", ".join(COMMANDS)}')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5098)
+    parser.add_argument('--spawn', action='store_true', help='seed a world and start the server')
+    parser.add_argument('--rooms', type=int, default=100, help='rooms in a spawned world')
+    parser.add_argument('--profile', action='store_true', help='profile the spawned server during the load')
+    parser.add_argument('--no-login', action='store_true', help='server has LOGIN_HANDSHAKE off')
+    parser.add_argument('--connect-concurrency', type=int, default=100)
+    parser.add_argument('--drain', type=float, default=5, help='seconds to wait for replies after the load')
+    parser.add_argument('--timeout', type=float, default=60, help='seconds to wait for a spawned server')
+    args = parser.parse_args()
+
+    logging.disable()
+    raise_file_limit()
+    server = ServerProcess(args.players, args.rooms, args.port, args.timeout) if args.spawn else None
+    try:
+        asyncio.run(run(args, server))
+    finally:
+        if server:
+            server.stop()
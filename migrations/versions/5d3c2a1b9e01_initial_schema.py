@@ -0,0 +1,89 @@
+"""initial schema
+
+Revision ID: 5d3c2a1b9e01
+Revises: 
+Create Date: 2026-10-17 09:12:44.218305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d3c2a1b9e01'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('direction',
+    sa.Column('name', sa.String(length=10), nullable=False),
+    sa.Column('inverse', sa.String(length=10), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('item_type',
+    sa.Column('name', sa.String(length=32), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('mobile_type',
+    sa.Column('name', sa.String(length=32), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('mud_object',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('short_desc', sa.String(length=32), nullable=False),
+    sa.Column('long_desc', sa.String(length=255), nullable=True),
+    sa.Column('parent', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['parent'], ['mud_object.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('character',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=16), nullable=False),
+    sa.Column('account_hash', sa.String(length=64), nullable=False),
+    sa.ForeignKeyConstraint(['id'], ['mud_object.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_table('item',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('item_type', sa.String(length=32), nullable=False),
+    sa.ForeignKeyConstraint(['id'], ['mud_object.id'], ),
+    sa.ForeignKeyConstraint(['item_type'], ['item_type.name'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('mobile',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('mobile_type', sa.String(length=32), nullable=False),
+    sa.ForeignKeyConstraint(['id'], ['mud_object.id'], ),
+    sa.ForeignKeyConstraint(['mobile_type'], ['mobile_type.name'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('room',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['id'], ['mud_object.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('room_connection',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('room_id', sa.Integer(), nullable=False),
+    sa.Column('destination_id', sa.Integer(), nullable=False),
+    sa.Column('direction', sa.String(length=10), nullable=False),
+    sa.ForeignKeyConstraint(['destination_id'], ['room.id'], ),
+    sa.ForeignKeyConstraint(['direction'], ['direction.name'], ),
+    sa.ForeignKeyConstraint(['room_id'], ['room.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('room_connection')
+    op.drop_table('room')
+    op.drop_table('mobile')
+    op.drop_table('item')
+    op.drop_table('character')
+    op.drop_table('mud_object')
+    op.drop_table('mobile_type')
+    op.drop_table('item_type')
+    op.drop_table('direction')
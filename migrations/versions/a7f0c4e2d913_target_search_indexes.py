@@ -0,0 +1,32 @@
+"""target search indexes
+
+Revision ID: a7f0c4e2d913
+Revises: 5d3c2a1b9e01
+Create Date: 2026-10-17 09:40:02.731964
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7f0c4e2d913'
+down_revision = '5d3c2a1b9e01'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_mud_object_parent', 'mud_object', ['parent'], unique=False)
+    op.create_index('ix_room_connection_room_id_direction', 'room_connection', ['room_id', 'direction'], unique=False)
+    # Trigram index so short_desc LIKE '%chunk%' searches stop scanning the table
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_mud_object_short_desc_trgm', 'mud_object', ['short_desc'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'short_desc': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_mud_object_short_desc_trgm', table_name='mud_object')
+    op.drop_index('ix_room_connection_room_id_direction', table_name='room_connection')
+    op.drop_index('ix_mud_object_parent', table_name='mud_object')
@@ -1,20 +1,131 @@
 import os
 import logging
-import sqlalchemy as db
+
+from threading import Lock
 
 HOST = '0.0.0.0' 
-PORT = 5000
+PORT = int(os.environ.get('PORT', 5000))
 BUFFER_SIZE = 1024
+# Client input framing - longer lines, and lines queued beyond the limit, are discarded
+MAX_LINE_LENGTH = 512
+MAX_QUEUED_LINES = 32
+# Clients open with a JSON login line - {"character_name": ..., "account_hash": ...}.
+# Off logs every connection in as the development character
+LOGIN_HANDSHAKE = os.environ.get('LOGIN_HANDSHAKE', '0') == '1'
+# Bytes of output a client may fall behind by before it counts as a slow consumer -
+# 'disconnect' drops the client, 'discard' drops its messages until it catches up
+OUTBOUND_BUFFER_LIMIT = int(os.environ.get('OUTBOUND_BUFFER_LIMIT', 256 * 1024))
+SLOW_CONSUMER_POLICY = os.environ.get('SLOW_CONSUMER_POLICY', 'disconnect')
+
+# 'threaded' runs a ClientThread per connection, 'asyncio' runs every client
+# as a coroutine on a single event loop
+SERVER_MODE = os.environ.get('SERVER_MODE', 'threaded')
+# Worker threads the asyncio server uses for blocking database and parsing work
+ASYNC_WORKERS = int(os.environ.get('ASYNC_WORKERS', 8))
+# Scheduler ticks per second - the longest the scheduler sleeps when idle
+TICK_RATE = float(os.environ.get('TICK_RATE', 10))
+# Event queue storage - 'heap' or 'wheel' (hierarchical timing wheel)
+EVENT_QUEUE_BACKEND = os.environ.get('EVENT_QUEUE_BACKEND', 'heap')
+# Timing wheel tick length in seconds - events fire at most one tick late
+TIMING_WHEEL_RESOLUTION = 0.01
+TIMING_WHEEL_SLOTS = 256
+TIMING_WHEEL_LEVELS = 4
+# Heap backend rebuilds itself once cancelled entries pass this share of the heap
+EVENT_QUEUE_COMPACTION_RATIO = 0.5
+EVENT_QUEUE_COMPACTION_MINIMUM = 1024
+# Seconds between checks of the in-memory room occupancy index against the database
+OCCUPANCY_RECONCILE_INTERVAL = float(os.environ.get('OCCUPANCY_RECONCILE_INTERVAL', 60))
+# Durability window for character movement - moves are batched to the database this
+# often in seconds, 0 commits every move. The optional journal survives a crash.
+WRITE_BEHIND_INTERVAL = float(os.environ.get('WRITE_BEHIND_INTERVAL', 1))
+WRITE_BEHIND_JOURNAL = os.environ.get('WRITE_BEHIND_JOURNAL')
+# Part of speech tagger - 'spacy' (en_core_web_sm) or 'rules' (built in lexicon)
+PARSER_ENGINE = os.environ.get('PARSER_ENGINE', 'spacy')
+# Parse lone verbs and emote + adverb phrases without running spaCy
+PARSER_FAST_PATH = os.environ.get('PARSER_FAST_PATH', '1') == '1'
+# Tag phrases from all clients together - a phrase waits at most one window (seconds)
+PARSE_BATCHING = os.environ.get('PARSE_BATCHING', '1') == '1'
+PARSE_BATCH_SIZE = 64
+PARSE_BATCH_WINDOW = float(os.environ.get('PARSE_BATCH_WINDOW', 0.01))
+# spaCy pipes skipped while batching - only part of speech tags are read
+PARSE_BATCH_DISABLE = ('ner', 'lemmatizer', 'parser')
+# Worker processes that tag phrases on other cores - replaces batching when above 0
+PARSE_WORKERS = int(os.environ.get('PARSE_WORKERS', 0))
+# Parsed phrases remembered by normalized input - least recently used are evicted, 0 disables
+PARSE_CACHE_SIZE = int(os.environ.get('PARSE_CACHE_SIZE', 4096))
+# Load the parser engine in the background once the server is listening
+PARSER_WARM_UP = os.environ.get('PARSER_WARM_UP', '1') == '1'
 
+# 'postgresql' (the DB_* variables) or 'sqlite' - a file at SQLITE_PATH or ':memory:'
+DATABASE_BACKEND = os.environ.get('DATABASE_BACKEND', 'postgresql')
 DB_HOST = os.environ.get('DB_HOST')
 DB_PORT = os.environ.get('DB_PORT')
 DB_NAME = os.environ.get('DB_NAME')
 DB_USER = os.environ.get('DB_USER')
 DB_PASSWORD = os.environ.get('DB_PASSWORD')
+SQLITE_PATH = os.environ.get('SQLITE_PATH', 'pymud.db')
+# Set on every SQLite connection - WAL lets reads carry on while a write commits,
+# and NORMAL only syncs at checkpoints, which is safe in WAL mode
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'foreign_keys': 'ON',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'temp_store': 'MEMORY',
+    'mmap_size': 256 * 1024 * 1024,
+}
+
+if DATABASE_BACKEND == 'sqlite':
+    DATABASE_ADDRESS = SQLITE_PATH
+    _DEFAULT_URI = f'sqlite:///{SQLITE_PATH}'
+else:
+    DATABASE_ADDRESS = f'{DB_HOST}:{DB_PORT}/{DB_NAME}'
+    _DEFAULT_URI = f'postgresql://{DB_USER}:{DB_PASSWORD}@{DATABASE_ADDRESS}'
+# DATABASE_URI overrides both - e.g. a scratch Postgres database for load tests
+DATABASE_URI = os.environ.get('DATABASE_URI', _DEFAULT_URI)
+# Count and time the queries each verb runs - a statement repeated this many times
+# in one command is logged as a likely N+1
+QUERY_STATS_ENABLED = os.environ.get('QUERY_STATS_ENABLED', '1') == '1'
+N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD', 3))
+# Prometheus metrics are served on http://METRICS_HOST:METRICS_PORT/metrics - 0 turns the
+# exporter off. Characters named in ADMIN_CHARACTERS (comma separated) may use the stats verb
+METRICS_HOST = os.environ.get('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.environ.get('METRICS_PORT', 9150))
+ADMIN_CHARACTERS = frozenset(name for name in os.environ.get('ADMIN_CHARACTERS', '').split(',') if name)
+# Profiling, switched on and off by admins with the profile verb or by SIGUSR1. 'cprofile'
+# runs PROFILE_SAMPLE_RATE of commands and events under cProfile, 'stack' records their
+# stacks every PROFILE_STACK_INTERVAL seconds. Results are written to PROFILE_DIR when it stops
+PROFILE_MODE = os.environ.get('PROFILE_MODE', 'cprofile')
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0.05))
+PROFILE_STACK_INTERVAL = float(os.environ.get('PROFILE_STACK_INTERVAL', 0.005))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+
+_engine = None
+_engine_lock = Lock()
+
+def get_engine():
+    """
+    Create the database engine on first use - importing config stays cheap
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            if DATABASE_URI.startswith('sqlite'):
+                from data.sqlite import create_sqlite_engine
+                _engine = create_sqlite_engine(DATABASE_URI, SQLITE_PRAGMAS)
+            else:
+                import sqlalchemy as db
+                _engine = db.create_engine(DATABASE_URI)
+            if QUERY_STATS_ENABLED:
+                from data.query_stats import QUERY_STATS
+                QUERY_STATS.instrument(_engine)
+    return _engine
 
-DATABASE_ADDRESS = f'{DB_HOST}:{DB_PORT}/{DB_NAME}'
-DATABASE_URI = f'postgresql://{DB_USER}:{DB_PASSWORD}@{DATABASE_ADDRESS}'
-ENGINE = db.create_engine(DATABASE_URI)
+def __getattr__(name: str):
+    if name == 'ENGINE':
+        return get_engine()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 logging.basicConfig(
     format='%(asctime)s %(levelname)-8s %(message)s',
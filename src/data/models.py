@@ -3,8 +3,10 @@ from __future__ import annotations
 import logging
 import hashlib
 
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Dict
 from sqlalchemy import (ForeignKey,
+                        Index,
+                        or_,
                         UniqueConstraint,
                         select,
                         update)
@@ -13,6 +15,7 @@ from sqlalchemy.orm import (DeclarativeBase,
                             Mapped,
                             mapped_column,
                             validates)
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm.session import Session
 from sqlalchemy.orm.exc import (MultipleResultsFound,
@@ -20,6 +23,11 @@ from sqlalchemy.orm.exc import (MultipleResultsFound,
 from exceptions import (LoginError,
                         CharacterExists,
                         BadRoomConnection)
+from data.occupancy import OCCUPANCY
+from data.write_behind import POSITIONS
+from data.world_graph import WORLD
+from data.target_index import TARGETS
+from config import WRITE_BEHIND_INTERVAL
 
 class Base(DeclarativeBase):
     pass
@@ -29,7 +37,13 @@ class MudObject(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     short_desc: Mapped[str] = mapped_column(String(32), nullable=False)
     long_desc: Mapped[Optional[str]] = mapped_column(String(255))
-    parent: Mapped[Optional[int]] = mapped_column(ForeignKey('mud_object.id'))
+    parent: Mapped[Optional[int]] = mapped_column(ForeignKey('mud_object.id'), index=True)
+
+    __table_args__ = (
+        # Trigram index for short_desc LIKE '%chunk%' - needs the pg_trgm extension
+        Index('ix_mud_object_short_desc_trgm', 'short_desc',
+              postgresql_using='gin', postgresql_ops={'short_desc': 'gin_trgm_ops'}),
+    )
 
     @classmethod
     def get_short_desc(cls, session: Session, id: int):
@@ -43,6 +57,18 @@ class MudObject(Base):
             select(MudObject.long_desc).where(MudObject.id == id)
             ).scalars().one()
 
+    @classmethod
+    def load_target_index(cls, session: Session):
+        """
+        Build (or rebuild) the in-memory index of everything that can be targeted in a room
+        """
+        rows = session.execute(
+            select(MudObject.id, MudObject.short_desc, MudObject.long_desc, MudObject.parent).where(
+                MudObject.parent.is_not(None))
+            ).all()
+        TARGETS.load((id, short_desc, long_desc, POSITIONS.pending(id) or parent)
+                     for id, short_desc, long_desc, parent in rows)
+
 class Item(MudObject):
     __tablename__ = 'item'
     id: Mapped[int] = mapped_column(ForeignKey('mud_object.id'), primary_key=True)
@@ -78,6 +104,7 @@ class Mobile(MudObject):
                         long_desc=long_desc)
         session.add(mobile)
         session.commit()
+        TARGETS.add(mobile.id, short_desc, long_desc, room_id)
         return mobile
 
     @classmethod
@@ -87,6 +114,7 @@ class Mobile(MudObject):
             ).scalars().one()
         session.delete(mobile)
         session.commit()
+        TARGETS.remove(id)
 
 class MobileType(Base):
     __tablename__ = 'mobile_type'
@@ -123,18 +151,35 @@ class Room(MudObject):
         session.commit()
         return room
     
+    @classmethod
+    def load_world_graph(cls, session: Session):
+        """
+        Build (or rebuild after builder edits) the in-memory world graph
+        """
+        WORLD.load(
+            session.execute(select(Room.id, Room.short_desc, Room.long_desc)).all(),
+            session.execute(select(RoomConnection.room_id,
+                                   RoomConnection.direction,
+                                   RoomConnection.destination_id)).all(),
+            session.execute(select(Direction.name, Direction.inverse)).all()
+        )
+
     @classmethod
     def get_exits(cls, session: Session, room_id: int) -> List[str]:
+        if WORLD.loaded:
+            return WORLD.get_exits(room_id)
         return session.execute(
             select(RoomConnection.direction).where(RoomConnection.room_id == room_id)
             ).scalars().all()
     
     @classmethod
     def get_desc(cls, session: Session, room_id: int) -> Tuple[str, str]:
+        if WORLD.loaded:
+            return WORLD.get_desc(room_id)
         desc = session.execute(
             select(Room.short_desc, Room.long_desc).where(Room.id == room_id)
-            ).scalar_one()
-        return desc
+            ).one()
+        return tuple(desc)
     
     @classmethod
     def get_occupants(cls, session: Session, room_id: int) -> List[int]:
@@ -157,6 +202,27 @@ class Room(MudObject):
                 (MudObject.short_desc.contains(short_desc)) &
                 (MudObject.parent == room_id))
             ).scalars().all()
+
+    @classmethod
+    def match_short_descs(cls,
+                          session: Session,
+                          short_descs: List[str],
+                          room_id: int=None) -> Dict[str, List[MudObject]]:
+        """
+        Objects matching each of several short descriptions in a single query - searches
+        every object when room_id is None
+        """
+        if not short_descs:
+            return {}
+        query = select(MudObject).where(
+            or_(*[MudObject.short_desc.contains(short_desc) for short_desc in short_descs]))
+        if room_id is not None:
+            query = query.where(MudObject.parent == room_id)
+        objects = session.execute(query.order_by(MudObject.id)).scalars().all()
+        # Split case-insensitively, as SQLite's LIKE matched - player input is lowercased
+        return {short_desc: [object for object in objects
+                             if short_desc.lower() in object.short_desc.lower()]
+                for short_desc in short_descs}
     
 
 class RoomConnection(Base):
@@ -168,15 +234,22 @@ class RoomConnection(Base):
 
     UniqueConstraint('room_id', 'destination_id')
 
+    __table_args__ = (
+        Index('ix_room_connection_room_id_direction', 'room_id', 'direction'),
+    )
+
     @classmethod
     def create_bidirectional_connection(cls,
                                         session: Session,
                                         room_id: int,
                                         destination_id: int,
                                         direction: str) -> List[RoomConnection]:
-        inverse = session.execute(
-            select(Direction.inverse).where(Direction.name == direction)
-            ).scalar_one()
+        if WORLD.loaded:
+            inverse = WORLD.get_inverse(direction)
+        else:
+            inverse = session.execute(
+                select(Direction.inverse).where(Direction.name == direction)
+                ).scalar_one()
         connections = [ 
             RoomConnection(room_id=room_id,
                            destination_id=destination_id,
@@ -237,34 +310,86 @@ class Character(MudObject):
         except IntegrityError as e:
             logging.exception(e)
             raise CharacterExists from e
+        TARGETS.add(character.id, short_desc, None, room_id)
         return character
     
     @classmethod
     def get_character(cls, session: Session, name):
-        return session.execute(
+        return cls._apply_pending_position(session.execute(
             select(Character).where(Character.name == name)
-            ).scalar_one()
+            ).scalar_one())
     
     @classmethod
     def move(cls, session: Session, character: Character, direction: str):
-        try:
-            new_room = session.execute(
-                select(RoomConnection.destination_id).where(
-                    (RoomConnection.room_id == character.parent) &
-                    (RoomConnection.direction == direction)
-                )).scalar_one()
-            session.execute(
-                update(MudObject).where(MudObject.id == character.id).values(parent=new_room)
-                )
-            session.commit()
-        except (NoResultFound, MultipleResultsFound) as e:
-            raise BadRoomConnection from e
+        """
+        Move a character - the new position is written behind, see flush_positions
+        """
+        if WORLD.loaded:
+            new_room = WORLD.get_destination(character.parent, direction)
+            if new_room is None:
+                raise BadRoomConnection
+        else:
+            try:
+                new_room = session.execute(
+                    select(RoomConnection.destination_id).where(
+                        (RoomConnection.room_id == character.parent) &
+                        (RoomConnection.direction == direction)
+                    )).scalar_one()
+            except (NoResultFound, MultipleResultsFound) as e:
+                raise BadRoomConnection from e
+        POSITIONS.record(character.id, new_room)
+        set_committed_value(character, 'parent', new_room)
+        OCCUPANCY.move(character.id, new_room)
+        TARGETS.move(character.id, new_room)
+        if WRITE_BEHIND_INTERVAL <= 0:
+            cls.flush_positions(session, [character.id])
+
+    @classmethod
+    def flush_positions(cls, session: Session, character_ids: List[int]=None) -> int:
+        """
+        Write pending positions in one batched UPDATE - all of them, or only those of character_ids
+        """
+        positions = POSITIONS.take(character_ids)
+        if positions:
+            try:
+                session.execute(
+                    update(MudObject),
+                    [{'id': id, 'parent': room_id} for id, room_id in positions.items()]
+                    )
+                session.commit()
+            except Exception:
+                session.rollback()
+                POSITIONS.restore(positions)
+                raise
+            POSITIONS.flushed(positions)
+        return len(positions)
+
+    @classmethod
+    def _apply_pending_position(cls, character: Character) -> Character:
+        """
+        Overlay a position the database has not caught up with yet
+        """
+        room_id = POSITIONS.pending(character.id)
+        if room_id is not None:
+            set_committed_value(character, 'parent', room_id)
+        return character
         
+    @classmethod
+    def get_locations(cls, session: Session, character_ids: List[int]) -> Dict[int, int]:
+        locations = dict(session.execute(
+            select(Character.id, Character.parent).where(Character.id.in_(character_ids))
+            ).all())
+        for id in locations:
+            room_id = POSITIONS.pending(id)
+            if room_id is not None:
+                locations[id] = room_id
+        return locations
+
     @classmethod
     def refresh(cls, session: Session, character_id: int):
-        return session.execute(
+        return cls._apply_pending_position(session.execute(
             select(Character).where(Character.id == character_id)
-        ).scalar_one()
+        ).scalar_one())
         
     @validates('account_hash')
     def _hash_password(self, _, hash: bytes):
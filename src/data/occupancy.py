@@ -0,0 +1,97 @@
+import logging
+
+from collections import defaultdict
+from threading import Lock
+from typing import Dict, Set, Tuple
+
+class OccupancyIndex:
+    """
+    Authoritative in-memory map of which online characters are in which room
+    """
+    def __init__(self):
+        self._rooms = defaultdict(set)
+        self._locations = {}
+        # Bumped on every change so reconciliation never clobbers a newer move
+        self._versions = {}
+        self._lock = Lock()
+
+    def add(self, character_id: int, room_id: int):
+        """
+        Start tracking a character - called on login
+        """
+        with self._lock:
+            self._place(character_id, room_id)
+
+    def remove(self, character_id: int):
+        """
+        Stop tracking a character - called on disconnect
+        """
+        with self._lock:
+            room_id = self._locations.pop(character_id, None)
+            self._versions.pop(character_id, None)
+            if room_id is not None:
+                self._discard(character_id, room_id)
+
+    def move(self, character_id: int, room_id: int):
+        """
+        Update the room of a tracked character - untracked characters are ignored
+        """
+        with self._lock:
+            if character_id in self._locations:
+                self._place(character_id, room_id)
+
+    def _place(self, character_id: int, room_id: int):
+        old_room_id = self._locations.get(character_id)
+        if old_room_id is not None:
+            self._discard(character_id, old_room_id)
+        self._rooms[room_id].add(character_id)
+        self._locations[character_id] = room_id
+        self._versions[character_id] = self._versions.get(character_id, 0) + 1
+
+    def _discard(self, character_id: int, room_id: int):
+        occupants = self._rooms[room_id]
+        occupants.discard(character_id)
+        if not occupants:
+            del self._rooms[room_id]
+
+    def get_occupants(self, room_id: int) -> Set[int]:
+        with self._lock:
+            return set(self._rooms.get(room_id, ()))
+
+    def get_room(self, character_id: int) -> int:
+        return self._locations.get(character_id)
+
+    def snapshot(self) -> Dict[int, Tuple[int, int]]:
+        """
+        Current {character_id: (room_id, version)} for reconciliation
+        """
+        with self._lock:
+            return {character_id: (room_id, self._versions[character_id])
+                    for character_id, room_id in self._locations.items()}
+
+    def reconcile(self, snapshot: Dict[int, Tuple[int, int]], locations: Dict[int, int]) -> int:
+        """
+        Correct entries that disagree with the database - returns the number of corrections
+        """
+        corrections = 0
+        with self._lock:
+            for character_id, (room_id, version) in snapshot.items():
+                if self._versions.get(character_id) != version:
+                    continue
+                if character_id not in locations:
+                    logging.warning(f'Occupancy index tracked missing character {character_id}')
+                    self._locations.pop(character_id)
+                    self._versions.pop(character_id)
+                    self._discard(character_id, room_id)
+                    corrections += 1
+                elif locations[character_id] != room_id:
+                    logging.warning(f'Occupancy index had character {character_id} in room {room_id}, '
+                                    f'database has {locations[character_id]}')
+                    self._place(character_id, locations[character_id])
+                    corrections += 1
+        return corrections
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+OCCUPANCY = OccupancyIndex()
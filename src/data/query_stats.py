@@ -0,0 +1,115 @@
+import logging
+import time
+
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Dict, NamedTuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from config import N_PLUS_ONE_THRESHOLD
+from metrics import QUERIES, QUERY_SECONDS
+
+class VerbQueries(NamedTuple):
+    commands: int = 0
+    queries: int = 0
+    time: float = 0.0
+    max_queries: int = 0
+    n_plus_one: int = 0
+
+class CommandQueries:
+    """
+    Statements run while one command executes
+    """
+    __slots__ = ('verb', 'queries', 'time', 'statements')
+
+    def __init__(self, verb: str):
+        self.verb = verb
+        self.queries = 0
+        self.time = 0.0
+        self.statements = Counter()
+
+class QueryStats:
+    """
+    Query count and time per verb, collected from cursor events on instrumented engines
+
+    MudParser.parse_data runs each verb inside command(), and every statement executed
+    in between is charged to it - the context variable follows the command through
+    threads and executor calls alike. Login, the per-burst refresh and the server's
+    housekeeping label their queries the same way, anything else is charged to OTHER.
+    A statement repeated N_PLUS_ONE_THRESHOLD times in one command is logged as a
+    likely N+1 - a query per row that one query could have answered. Totals are also
+    exported as pymud_queries_total and pymud_query_seconds_total.
+    """
+    OTHER = 'other'
+
+    def __init__(self, n_plus_one_threshold: int=N_PLUS_ONE_THRESHOLD):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self._verbs = {}
+        self._lock = Lock()
+        self._command = ContextVar('command', default=None)
+
+    def instrument(self, engine: Engine):
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    @contextmanager
+    def command(self, verb: str):
+        """
+        Charge the statements executed inside the block to verb
+        """
+        command = CommandQueries(verb)
+        token = self._command.set(command)
+        try:
+            yield command
+        finally:
+            self._command.reset(token)
+            self._record(command)
+
+    def _before_cursor_execute(self, connection, cursor, statement, parameters, context, executemany):
+        connection.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, connection, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - connection.info['query_start'].pop()
+        command = self._command.get()
+        if command is None:
+            with self._lock:
+                other = self._verbs.get(self.OTHER, VerbQueries())
+                self._verbs[self.OTHER] = other._replace(queries=other.queries + 1,
+                                                         time=other.time + elapsed)
+            QUERIES.labels(self.OTHER).inc()
+            QUERY_SECONDS.labels(self.OTHER).inc(elapsed)
+            return
+        command.queries += 1
+        command.time += elapsed
+        command.statements[statement] += 1
+
+    def _record(self, command: CommandQueries):
+        repeated = [(statement, count) for statement, count in command.statements.items()
+                    if count >= self.n_plus_one_threshold]
+        for statement, count in repeated:
+            logging.warning(f'Possible N+1 in {command.verb}: {count} x {" ".join(statement.split())}')
+        with self._lock:
+            verb = self._verbs.get(command.verb, VerbQueries())
+            self._verbs[command.verb] = VerbQueries(verb.commands + 1,
+                                                    verb.queries + command.queries,
+                                                    verb.time + command.time,
+                                                    max(verb.max_queries, command.queries),
+                                                    verb.n_plus_one + bool(repeated))
+        QUERIES.labels(command.verb).inc(command.queries)
+        QUERY_SECONDS.labels(command.verb).inc(command.time)
+
+    def get(self, verb: str) -> VerbQueries:
+        with self._lock:
+            return self._verbs.get(verb, VerbQueries())
+
+    def snapshot(self) -> Dict[str, VerbQueries]:
+        with self._lock:
+            return dict(self._verbs)
+
+    def reset(self):
+        with self._lock:
+            self._verbs.clear()
+
+QUERY_STATS = QueryStats()
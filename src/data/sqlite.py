@@ -0,0 +1,38 @@
+import logging
+
+from typing import Dict
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import StaticPool
+
+def create_sqlite_engine(uri: str, pragmas: Dict[str, object]) -> Engine:
+    """
+    Engine for a SQLite file or in-memory database with pragmas set on every connection
+
+    An in-memory database only lives as long as its connection, so every session shares
+    one connection and the schema is created up front. Files are migrated like Postgres.
+    """
+    url = make_url(uri)
+    in_memory = url.database in (None, '', ':memory:')
+    if in_memory:
+        engine = create_engine(url,
+                               connect_args={'check_same_thread': False},
+                               poolclass=StaticPool)
+    else:
+        engine = create_engine(url, connect_args={'check_same_thread': False})
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(connection, _):
+        cursor = connection.cursor()
+        for name, value in pragmas.items():
+            # WAL needs a file - an in-memory journal is all :memory: can have
+            if in_memory and name == 'journal_mode':
+                continue
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+
+    if in_memory:
+        from data.models import Base
+        Base.metadata.create_all(engine)
+    logging.debug(f'SQLite database at {url.database or ":memory:"}')
+    return engine
@@ -0,0 +1,135 @@
+import re
+import logging
+
+from collections import defaultdict
+from threading import Lock
+from typing import Iterable, List, Optional, Tuple
+
+class TargetRecord:
+    """
+    What targeting needs to know about an object - stands in for the MudObject row
+    """
+    __slots__ = ('id', 'short_desc', 'long_desc', 'room_id', 'tokens')
+
+    def __init__(self, id: int, short_desc: str, long_desc: str, room_id: int):
+        self.id = id
+        self.short_desc = short_desc
+        self.long_desc = long_desc
+        self.room_id = room_id
+        self.tokens = frozenset(TargetIndex.tokenize(short_desc))
+
+class TargetIndex:
+    """
+    In-memory per-room keyword index of object short descriptions
+
+    Each room maps the tokens of its objects' short descriptions to object ids.
+    A noun chunk matches an object when every word of the chunk is found in one of
+    its tokens, ranked exact token > token prefix > substring.
+    """
+    TOKEN_PATTERN = re.compile(r'\w+')
+    EXACT, PREFIX, SUBSTRING = 3, 2, 1
+
+    def __init__(self):
+        self._records = {}
+        self._rooms = defaultdict(lambda: defaultdict(set))
+        self._lock = Lock()
+        self.loaded = False
+
+    @classmethod
+    def tokenize(cls, text: str) -> List[str]:
+        return cls.TOKEN_PATTERN.findall(text.lower()) if text else []
+
+    def load(self, rows: Iterable[Tuple[int, str, str, int]]):
+        """
+        Rebuild from (id, short_desc, long_desc, room_id) rows of every object in a room
+        """
+        records = {}
+        rooms = defaultdict(lambda: defaultdict(set))
+        for id, short_desc, long_desc, room_id in rows:
+            record = TargetRecord(id, short_desc, long_desc, room_id)
+            records[id] = record
+            for token in record.tokens:
+                rooms[room_id][token].add(id)
+        with self._lock:
+            self._records, self._rooms = records, rooms
+            self.loaded = True
+        logging.info(f'Target index loaded: {len(records)} objects')
+
+    def add(self, id: int, short_desc: str, long_desc: str, room_id: int):
+        with self._lock:
+            self._remove(id)
+            if room_id is not None:
+                self._place(TargetRecord(id, short_desc, long_desc, room_id))
+
+    def move(self, id: int, room_id: int):
+        """
+        Follow an object to another room - unknown objects are ignored
+        """
+        with self._lock:
+            record = self._remove(id)
+            if record is not None:
+                record.room_id = room_id
+                self._place(record)
+
+    def remove(self, id: int):
+        with self._lock:
+            self._remove(id)
+
+    def _place(self, record: TargetRecord):
+        self._records[record.id] = record
+        tokens = self._rooms[record.room_id]
+        for token in record.tokens:
+            tokens[token].add(record.id)
+
+    def _remove(self, id: int) -> Optional[TargetRecord]:
+        record = self._records.pop(id, None)
+        if record is not None:
+            tokens = self._rooms[record.room_id]
+            for token in record.tokens:
+                tokens[token].discard(record.id)
+                if not tokens[token]:
+                    del tokens[token]
+            if not tokens:
+                del self._rooms[record.room_id]
+        return record
+
+    def match(self, room_id: int, noun_chunks: List[str]) -> List[Optional[TargetRecord]]:
+        """
+        Best object in the room for each noun chunk - None where nothing matches
+        """
+        with self._lock:
+            tokens = self._rooms.get(room_id, {})
+            return [self._best(tokens, chunk) for chunk in noun_chunks]
+
+    def _best(self, tokens: dict, chunk: str) -> Optional[TargetRecord]:
+        scores = None
+        for word in self.tokenize(chunk):
+            word_scores = {}
+            for token, ids in tokens.items():
+                if token == word:
+                    score = self.EXACT
+                elif token.startswith(word):
+                    score = self.PREFIX
+                elif word in token:
+                    score = self.SUBSTRING
+                else:
+                    continue
+                for id in ids:
+                    word_scores[id] = max(score, word_scores.get(id, 0))
+            # Every word of the chunk has to match - an object scores its weakest word
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {id: min(score, word_scores[id]) for id, score in scores.items() if id in word_scores}
+            if not scores:
+                return None
+        if not scores:
+            return None
+        # Ties go to the object the chunk describes most completely
+        best = max(scores, key=lambda id: (scores[id], -len(self._records[id].tokens), -id))
+        return self._records[best]
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+TARGETS = TargetIndex()
@@ -0,0 +1,66 @@
+import logging
+
+from typing import Iterable, List, Tuple
+
+class RoomNode:
+    """
+    A room and its exits - {direction: destination_id}
+    """
+    __slots__ = ('id', 'short_desc', 'long_desc', 'exits')
+
+    def __init__(self, id: int, short_desc: str, long_desc: str):
+        self.id = id
+        self.short_desc = short_desc
+        self.long_desc = long_desc
+        self.exits = {}
+
+class WorldGraph:
+    """
+    Read-only in-memory copy of rooms, exits and directions
+
+    Built once at startup and replaced wholesale by load() - readers never see a
+    half-built graph, so builder edits only need another load().
+    """
+    def __init__(self):
+        self._rooms = {}
+        self._inverses = {}
+        self.loaded = False
+
+    def load(self,
+             rooms: Iterable[Tuple[int, str, str]],
+             connections: Iterable[Tuple[int, str, int]],
+             directions: Iterable[Tuple[str, str]]):
+        """
+        Build the graph from (id, short_desc, long_desc) rooms, (room_id, direction,
+        destination_id) connections and (name, inverse) directions
+        """
+        nodes = {id: RoomNode(id, short_desc, long_desc) for id, short_desc, long_desc in rooms}
+        for room_id, direction, destination_id in connections:
+            nodes[room_id].exits[direction] = destination_id
+        inverses = dict(directions)
+
+        self._rooms, self._inverses = nodes, inverses
+        self.loaded = True
+        logging.info(f'World graph loaded: {len(nodes)} rooms')
+
+    def get_desc(self, room_id: int) -> Tuple[str, str]:
+        room = self._rooms[room_id]
+        return room.short_desc, room.long_desc
+
+    def get_exits(self, room_id: int) -> List[str]:
+        return list(self._rooms[room_id].exits)
+
+    def get_destination(self, room_id: int, direction: str) -> int:
+        """
+        Room reached by leaving room_id in direction - None without an exit
+        """
+        room = self._rooms.get(room_id)
+        return room.exits.get(direction) if room else None
+
+    def get_inverse(self, direction: str) -> str:
+        return self._inverses[direction]
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+WORLD = WorldGraph()
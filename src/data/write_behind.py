@@ -0,0 +1,123 @@
+import os
+import logging
+
+from threading import Lock
+from typing import Dict, Iterable
+from config import WRITE_BEHIND_JOURNAL
+
+class PositionBuffer:
+    """
+    Write-behind buffer of character positions waiting to be flushed to the database
+
+    With a journal path every recorded move is appended to the journal before it
+    is acknowledged, and the journal is rewritten to the still-pending moves after
+    every flush. After a crash, recover() reloads whatever never reached the database.
+    Without a journal a crash loses at most one flush interval of movement.
+
+    Taken positions stay visible to pending() until flushed() is told they were
+    committed, so a character read during a flush does not see the old room.
+    """
+    def __init__(self, journal_path: str=WRITE_BEHIND_JOURNAL):
+        self.journal_path = journal_path
+        self._dirty = {}
+        # Taken by a flush whose UPDATE has not committed yet
+        self._in_flight = {}
+        self._lock = Lock()
+        self._journal = None
+
+    def record(self, character_id: int, room_id: int):
+        with self._lock:
+            self._dirty[character_id] = room_id
+            if self.journal_path:
+                if self._journal is None:
+                    self._journal = open(self.journal_path, 'a')
+                self._journal.write(f'{character_id} {room_id}\n')
+                self._journal.flush()
+
+    def pending(self, character_id: int) -> int:
+        """
+        Room a character has moved to but not yet been flushed to - None if up to date
+        """
+        # take() fills _in_flight before it empties _dirty, so this order never misses a move
+        room_id = self._dirty.get(character_id)
+        return room_id if room_id is not None else self._in_flight.get(character_id)
+
+    def take(self, character_ids: Iterable[int]=None) -> Dict[int, int]:
+        """
+        Return pending positions for a flush - all of them, or only those of character_ids.
+        They stay pending until flushed() or restore() is called with them
+        """
+        with self._lock:
+            if character_ids is None:
+                positions = self._dirty
+                self._in_flight.update(positions)
+                self._dirty = {}
+            else:
+                positions = {character_id: self._dirty[character_id]
+                             for character_id in character_ids if character_id in self._dirty}
+                self._in_flight.update(positions)
+                for character_id in positions:
+                    del self._dirty[character_id]
+        return positions
+
+    def _land(self, positions: Dict[int, int]):
+        """
+        Drop positions from the in-flight map unless a later flush took a newer room
+        """
+        for character_id, room_id in positions.items():
+            if self._in_flight.get(character_id) == room_id:
+                del self._in_flight[character_id]
+
+    def restore(self, positions: Dict[int, int]):
+        """
+        Put back positions that failed to flush, unless the character has moved again since
+        """
+        with self._lock:
+            for character_id, room_id in positions.items():
+                self._dirty.setdefault(character_id, room_id)
+            self._land(positions)
+
+    def flushed(self, positions: Dict[int, int]=None):
+        """
+        Mark taken positions as committed and shrink the journal to the ones still pending
+        """
+        with self._lock:
+            self._land(positions or {})
+            if not self.journal_path:
+                return
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            temp_path = f'{self.journal_path}.tmp'
+            with open(temp_path, 'w') as journal:
+                for character_id, room_id in {**self._in_flight, **self._dirty}.items():
+                    journal.write(f'{character_id} {room_id}\n')
+            os.replace(temp_path, self.journal_path)
+
+    def recover(self) -> int:
+        """
+        Reload positions from the journal left behind by a previous run
+        """
+        if not self.journal_path or not os.path.exists(self.journal_path):
+            return 0
+        recovered = {}
+        with open(self.journal_path) as journal:
+            for line in journal:
+                try:
+                    character_id, room_id = map(int, line.split())
+                except ValueError:
+                    # A crash can leave the last line half written
+                    logging.warning(f'Skipping corrupt journal line: {line!r}')
+                    continue
+                recovered[character_id] = room_id
+        with self._lock:
+            for character_id, room_id in recovered.items():
+                self._dirty.setdefault(character_id, room_id)
+        if recovered:
+            logging.info(f'Recovered {len(recovered)} unflushed positions from {self.journal_path}')
+        return len(recovered)
+
+    def __len__(self) -> int:
+        return len(self._dirty)
+
+POSITIONS = PositionBuffer()
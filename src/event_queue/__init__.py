@@ -1 +1,3 @@
-from .event_queue import EventQueue
+from .event_queue import EventQueue, Event
+from .backend import EventHandle
+from .scheduler import Scheduler
@@ -0,0 +1,119 @@
+import heapq
+
+from abc import ABC, abstractmethod
+from typing import List
+from config import (EVENT_QUEUE_COMPACTION_RATIO,
+                    EVENT_QUEUE_COMPACTION_MINIMUM)
+
+class EventHandle:
+    """
+    Reference to a queued event - returned by EventQueue.push_event
+    """
+    __slots__ = ('event', 'sequence', 'queued', 'cancelled', '_queue', '_tick', '_slot', '_level', '_entry')
+
+    def __init__(self, queue, event, sequence: int):
+        self.event = event
+        self.sequence = sequence
+        self.queued = False
+        self.cancelled = False
+        self._queue = queue
+
+    def cancel(self) -> bool:
+        """
+        Remove the event from its queue - False if it already executed
+        """
+        return self._queue.cancel(self)
+
+    def reschedule(self, timestamp: float) -> bool:
+        """
+        Move the event to a new time - False if it already executed
+        """
+        return self._queue.reschedule(self, timestamp)
+
+class QueueBackend(ABC):
+    """
+    Storage for scheduled event handles, ordered by (timestamp, sequence)
+    """
+    @abstractmethod
+    def push(self, handle: EventHandle):
+        raise NotImplementedError('push was not implemented!')
+
+    @abstractmethod
+    def remove(self, handle: EventHandle):
+        raise NotImplementedError('remove was not implemented!')
+
+    @abstractmethod
+    def pop_due(self, now: float) -> List[EventHandle]:
+        """
+        Remove and return every handle due at or before now, in execution order
+        """
+        raise NotImplementedError('pop_due was not implemented!')
+
+    @abstractmethod
+    def peek_time(self) -> float:
+        """
+        Earliest time an event could be due - inf when empty
+        """
+        raise NotImplementedError('peek_time was not implemented!')
+
+    @abstractmethod
+    def __len__(self) -> int:
+        raise NotImplementedError('__len__ was not implemented!')
+
+class HeapBackend(QueueBackend):
+    """
+    Binary heap - O(log n) push and pop, removal by lazy deletion
+
+    Removed entries stay in the heap as tombstones and are skipped when they
+    reach the top. The heap is rebuilt once tombstones pass the compaction ratio.
+    """
+    def __init__(self,
+                 compaction_ratio: float=EVENT_QUEUE_COMPACTION_RATIO,
+                 compaction_minimum: int=EVENT_QUEUE_COMPACTION_MINIMUM):
+        self.compaction_ratio = compaction_ratio
+        self.compaction_minimum = compaction_minimum
+        self._heap = []
+        self._tombstones = 0
+
+    def push(self, handle: EventHandle):
+        handle._entry = [handle.event.timestamp, handle.sequence, handle]
+        heapq.heappush(self._heap, handle._entry)
+
+    def remove(self, handle: EventHandle):
+        handle._entry[2] = None
+        handle._entry = None
+        self._tombstones += 1
+        if (self._tombstones > self.compaction_minimum and
+                self._tombstones > len(self._heap) * self.compaction_ratio):
+            self._compact()
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if entry[2] is not None]
+        heapq.heapify(self._heap)
+        self._tombstones = 0
+
+    def _discard_tombstones(self):
+        while self._heap and self._heap[0][2] is None:
+            heapq.heappop(self._heap)
+            self._tombstones -= 1
+
+    def pop_due(self, now: float) -> List[EventHandle]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            handle = heapq.heappop(self._heap)[2]
+            if handle is None:
+                self._tombstones -= 1
+            else:
+                handle._entry = None
+                due.append(handle)
+        return due
+
+    def peek_time(self) -> float:
+        self._discard_tombstones()
+        try:
+            return self._heap[0][0]
+        except IndexError:
+            return float('inf')
+
+    def __len__(self) -> int:
+        return len(self._heap) - self._tombstones
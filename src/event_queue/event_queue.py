@@ -1,12 +1,17 @@
 import logging
 import time
-import heapq
+import itertools
 
-from typing import Dict
-from threading import Thread
-from sqlalchemy.orm.session import Session
-from data.models import Room
+from typing import Dict, List
+from threading import Thread, Condition, Event as Flag
+from data.occupancy import OCCUPANCY
+from mud_parser import MudParser
 from mud_parser.verb import VerbResponse
+from config import EVENT_QUEUE_BACKEND
+from metrics import EVENT_LAG_SECONDS
+from profiler import PROFILER
+from event_queue.backend import EventHandle, HeapBackend
+from event_queue.timing_wheel import TimingWheelBackend
 
 class Event:
     """
@@ -15,66 +20,156 @@ class Event:
     def __init__(self, response: VerbResponse, timestamp: int=None):
         self.response = response
         self.timestamp = timestamp if timestamp else time.time()
+        self._done = Flag()
+
+    def wait(self, timeout: float=None) -> bool:
+        """
+        Block until the event has been executed
+        """
+        return self._done.wait(timeout)
+
+    def _complete(self):
+        self._done.set()
 
 class EventQueue:
     """
-    Event queue for passing messages to unlinked connections
+    Event queue for passing messages to unlinked connections - safe to share between threads
     """
-    def __init__(self):
-        self._queue = []
+    BACKENDS = {
+        'heap': HeapBackend,
+        'wheel': TimingWheelBackend
+    }
+
+    def __init__(self, backend: str=EVENT_QUEUE_BACKEND):
+        self._queue = self.BACKENDS[backend]()
+        self._wakeup = Condition()
+        self._wake_at = float('inf')
+        # Tie-breaker so events with equal timestamps never compare each other
+        self._sequence = itertools.count()
 
-    def push_event(self, event: Event, block=False):
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def push_event(self, event: Event, block=False) -> EventHandle:
         """
         Add an event to the queue and optionally block until its popped
         """
         if isinstance(event, Event):
-            heapq.heappush(self._queue, (event.timestamp, event))
+            handle = EventHandle(self, event, next(self._sequence))
+            with self._wakeup:
+                self._queue.push(handle)
+                handle.queued = True
+                # Only an earlier deadline changes how long the scheduler sleeps
+                if event.timestamp < self._wake_at:
+                    self._wakeup.notify_all()
         else:
             raise TypeError(f'event must be of type Event')
         
         if block:
-            while event in self._queue:
-                time.sleep(0.1)
+            event.wait()
+        return handle
 
-    def _pop_event(self) -> Event:
-        return heapq.heappop(self._queue)[1]
+    def cancel(self, handle: EventHandle) -> bool:
+        """
+        Remove a queued event - blocked producers are released
+        """
+        with self._wakeup:
+            if not handle.queued:
+                return False
+            self._queue.remove(handle)
+            handle.queued = False
+            handle.cancelled = True
+        handle.event._complete()
+        return True
+
+    def reschedule(self, handle: EventHandle, timestamp: float) -> bool:
+        """
+        Move a queued event to a new time - it orders after events already queued for that time
+        """
+        with self._wakeup:
+            if not handle.queued:
+                return False
+            self._queue.remove(handle)
+            handle.event.timestamp = timestamp
+            handle.sequence = next(self._sequence)
+            self._queue.push(handle)
+            if timestamp < self._wake_at:
+                self._wakeup.notify_all()
+        return True
+
+    def _pop_due_events(self, now: float) -> List[EventHandle]:
+        with self._wakeup:
+            handles = self._queue.pop_due(now)
+            for handle in handles:
+                handle.queued = False
+        return handles
     
-    def _peek_time(self) -> int:
-        try:
-            return self._queue[0][0]
-        except IndexError:
-            return float('inf')
+    def _peek_time(self) -> float:
+        with self._wakeup:
+            return self._queue.peek_time()
+
+    def wait(self, timeout: float):
+        """
+        Sleep until the next event is due, an earlier event is pushed or timeout passes
+        """
+        with self._wakeup:
+            now = time.time()
+            delay = min(self._peek_time() - now, timeout)
+            if delay > 0:
+                self._wake_at = now + delay
+                self._wakeup.wait(delay)
+
+    def wake(self):
+        """
+        Wake any thread sleeping in wait
+        """
+        with self._wakeup:
+            self._wakeup.notify_all()
         
+    @staticmethod
+    def _frame(message: bytes) -> bytes:
+        return MudParser.format_newline(message) if message else message
+
+    @PROFILER.sampled('execute_event')
     def _execute_event(self,
                        event: Event,
-                       session: Session,
                        authenticated_client_threads: Dict[str, Thread]):
             """
             Execute a single event
             """
-            if event.response.room_id:
-                target_ids = Room.get_occupants(session, event.room_id)
+            response = event.response
+            # Frame each message once - every recipient is handed the same bytes object
+            message_you = self._frame(response.message_you)
+            message_they = self._frame(response.message_they)
+            if response.target_id:
+                target = authenticated_client_threads.get(response.target_id)
+                if target:
+                    target.send_message(message_you)
+            if response.room_id:
+                target_ids = OCCUPANCY.get_occupants(response.room_id)
                 for id in target_ids:
-                    if event.response.target_id:
-                        authenticated_client_threads[event.response.target_id].send_message(event.message_you)
+                    if id in (response.character_id, response.target_id):
+                        continue
                     try:
-                        authenticated_client_threads[id].send_message(event.message_they)
-                    except KeyError as e:
-                        logging.info(e)
-            elif event.response.target_id:
-                authenticated_client_threads[event.response.target_id].send_message(event.message_you)
-            else:
-                for thread in authenticated_client_threads.values():
-                    thread.send_message(event.message_they)
+                        authenticated_client_threads[id].send_message(message_they)
+                    except KeyError:
+                        pass
+            elif not response.target_id:
+                for thread in list(authenticated_client_threads.values()):
+                    thread.send_message(message_they)
 
     
-    def execute_events(self, session: Session, authenticated_client_threads: Dict[str, Thread]):
+    def execute_events(self, authenticated_client_threads: Dict[str, Thread]):
         """
         Execute all events set to execute at the current time or earlier
         """
-        event_time = self._peek_time()
-        while event_time <= time.time():
-            event = self._pop_event()
-            self._execute_event(event, session, authenticated_client_threads)
-            event_time = self._peek_time()
+        now = time.time()
+        for handle in self._pop_due_events(now):
+            EVENT_LAG_SECONDS.observe(now - handle.event.timestamp)
+            try:
+                self._execute_event(handle.event, authenticated_client_threads)
+            except Exception as e:
+                logging.exception(e)
+            finally:
+                handle.event._complete()
             
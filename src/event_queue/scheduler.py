@@ -0,0 +1,29 @@
+import logging
+
+from typing import Callable
+from threading import Thread
+from config import TICK_RATE
+
+class Scheduler(Thread):
+    """
+    Dedicated thread that services the event queue as events fall due
+    """
+    def __init__(self, event_queue, service_callback: Callable[[], None], tick_rate: float=TICK_RATE):
+        self.event_queue = event_queue
+        self.service_callback = service_callback
+        self.tick = 1 / tick_rate
+        self._running = True
+
+        super().__init__(name='scheduler', daemon=True)
+
+    def run(self):
+        while self._running:
+            try:
+                self.service_callback()
+            except Exception as e:
+                logging.exception(e)
+            self.event_queue.wait(self.tick)
+
+    def stop(self):
+        self._running = False
+        self.event_queue.wake()
@@ -0,0 +1,146 @@
+import time
+
+from operator import attrgetter
+from typing import List
+from config import (TIMING_WHEEL_RESOLUTION,
+                    TIMING_WHEEL_SLOTS,
+                    TIMING_WHEEL_LEVELS)
+from event_queue.backend import QueueBackend, EventHandle
+
+class TimingWheelBackend(QueueBackend):
+    """
+    Hierarchical timing wheel - O(1) push and remove, expiry in batches per tick
+
+    Level 0 holds one slot per tick, each level above covers a full turn of the
+    level below it per slot. Slots at a higher level are cascaded down when the
+    wheel below wraps, and anything beyond the top level waits in an overflow slot.
+    Events fire on the first tick boundary after their timestamp, so at most one
+    resolution late and never early.
+    """
+    EXECUTION_ORDER = attrgetter('event.timestamp', 'sequence')
+
+    def __init__(self,
+                 resolution: float=TIMING_WHEEL_RESOLUTION,
+                 slots: int=TIMING_WHEEL_SLOTS,
+                 levels: int=TIMING_WHEEL_LEVELS,
+                 start: float=None):
+        self.resolution = resolution
+        self.slots = slots
+        self.levels = levels
+        self._spans = [slots ** level for level in range(levels + 1)]
+        self._wheels = [[{} for _ in range(slots)] for _ in range(levels)]
+        self._counts = [0] * levels
+        self._overflow = {}
+        self._expired = {}
+        self._size = 0
+        # Next tick to be processed - every tick before it has been expired
+        self._tick = self._to_tick(time.time() if start is None else start)
+
+    def _to_tick(self, timestamp: float) -> int:
+        return int(timestamp // self.resolution)
+
+    def push(self, handle: EventHandle):
+        handle._tick = self._to_tick(handle.event.timestamp)
+        if handle.event.timestamp <= time.time():
+            self._place(handle, self._expired, -1)
+        else:
+            self._insert(handle)
+        self._size += 1
+
+    def _insert(self, handle: EventHandle):
+        """
+        Place a handle on the lowest level that shares its higher digits with the current tick
+        """
+        tick = handle._tick
+        if tick < self._tick:
+            self._place(handle, self._expired, -1)
+            return
+        for level in range(self.levels):
+            span = self._spans[level + 1]
+            if tick // span == self._tick // span:
+                self._place(handle, self._wheels[level][(tick // self._spans[level]) % self.slots], level)
+                return
+        self._place(handle, self._overflow, -1)
+
+    def _place(self, handle: EventHandle, slot: dict, level: int):
+        slot[handle] = None
+        handle._slot = slot
+        handle._level = level
+        if level >= 0:
+            self._counts[level] += 1
+
+    def remove(self, handle: EventHandle):
+        del handle._slot[handle]
+        if handle._level >= 0:
+            self._counts[handle._level] -= 1
+        handle._slot = None
+        self._size -= 1
+
+    def pop_due(self, now: float) -> List[EventHandle]:
+        due = list(self._expired)
+        self._expired.clear()
+
+        target = self._to_tick(now)
+        while self._tick < target:
+            tick = self._tick
+            self._cascade(tick)
+            slot = self._wheels[0][tick % self.slots]
+            if slot:
+                due.extend(slot)
+                self._counts[0] -= len(slot)
+                slot.clear()
+            self._tick = min(self._next_tick(tick), target)
+
+        for handle in due:
+            handle._slot = None
+        self._size -= len(due)
+        due.sort(key=self.EXECUTION_ORDER)
+        return due
+
+    def _cascade(self, tick: int):
+        """
+        Redistribute the higher level slots that start at this tick
+        """
+        if tick % self._spans[self.levels] == 0 and self._overflow:
+            handles = list(self._overflow)
+            self._overflow.clear()
+            for handle in handles:
+                self._insert(handle)
+        for level in range(self.levels - 1, 0, -1):
+            if tick % self._spans[level] == 0:
+                slot = self._wheels[level][(tick // self._spans[level]) % self.slots]
+                if slot:
+                    handles = list(slot)
+                    self._counts[level] -= len(handles)
+                    slot.clear()
+                    for handle in handles:
+                        self._insert(handle)
+
+    def _next_tick(self, tick: int) -> int:
+        """
+        Skip ahead to the next tick with anything to expire or cascade
+        """
+        for level in range(self.levels):
+            if self._counts[level]:
+                return (tick // self._spans[level] + 1) * self._spans[level]
+        if self._overflow:
+            return (tick // self._spans[self.levels] + 1) * self._spans[self.levels]
+        return float('inf')
+
+    def peek_time(self) -> float:
+        if self._expired:
+            return min(handle.event.timestamp for handle in self._expired)
+        for level in range(self.levels):
+            if self._counts[level]:
+                span = self._spans[level]
+                base = self._tick - self._tick % self._spans[level + 1]
+                wheel = self._wheels[level]
+                for index in range((self._tick // span) % self.slots, self.slots):
+                    if wheel[index]:
+                        return (base + index * span + 1) * self.resolution
+        if self._overflow:
+            return min(handle.event.timestamp for handle in self._overflow)
+        return float('inf')
+
+    def __len__(self) -> int:
+        return self._size
@@ -0,0 +1,61 @@
+from collections import deque
+from typing import List
+from config import (MAX_LINE_LENGTH,
+                    MAX_QUEUED_LINES)
+
+class LineBuffer:
+    """
+    Per-connection input buffer that frames a byte stream into command lines
+
+    Lines end in LF or CRLF and may arrive split across reads or several to a
+    read. Lines longer than max_line_length and lines beyond max_queued_lines
+    waiting to be processed are discarded.
+    """
+    NEWLINE = b'\n'
+    DISCARDED_MESSAGE = b'Some of your input was too long or too fast and has been ignored.'
+
+    def __init__(self, max_line_length: int=MAX_LINE_LENGTH, max_queued_lines: int=MAX_QUEUED_LINES):
+        self.max_line_length = max_line_length
+        self.max_queued_lines = max_queued_lines
+        self._partial = bytearray()
+        self._lines = deque()
+        # Set while throwing away the rest of an overlong line
+        self._discarding = False
+
+    def feed(self, data: bytes) -> int:
+        """
+        Add received bytes and queue every completed line - returns the number of
+        lines discarded
+        """
+        discarded = 0
+        *lines, partial = data.split(self.NEWLINE)
+        for line in lines:
+            if self._discarding:
+                self._discarding = False
+                self._partial.clear()
+                continue
+            self._partial += line
+            line = bytes(self._partial).rstrip(b'\r')
+            self._partial.clear()
+            if len(line) > self.max_line_length or len(self._lines) >= self.max_queued_lines:
+                discarded += 1
+            else:
+                self._lines.append(line)
+        if not self._discarding:
+            self._partial += partial
+            if len(self._partial) > self.max_line_length:
+                self._partial.clear()
+                self._discarding = True
+                discarded += 1
+        return discarded
+
+    def pop_lines(self) -> List[bytes]:
+        """
+        Remove and return every complete line in order
+        """
+        lines = list(self._lines)
+        self._lines.clear()
+        return lines
+
+    def __len__(self) -> int:
+        return len(self._lines)
@@ -1,28 +1,65 @@
 import json
 import logging
+import time
 
 from typing import Callable
 
 from data.models import Character
+from data.occupancy import OCCUPANCY
+from data.query_stats import QUERY_STATS
 from exceptions import LoginError
+from metrics import LOGINS, LOGIN_SECONDS
 
 class LoginManager:
+    # Used for every connection when clients do not send their own login
+    DEVELOPMENT_LOGIN = b'{"character_name": "Rha", "account_hash": "1"}'
+
     def __init__(self, session, data, address: str, send_callback: Callable[[str], None]):
         self.success = False
-        login_info = json.loads(data)
+        start = time.perf_counter()
+        # One login is one command, however many steps it takes
+        with QUERY_STATS.command('login'):
+            result = self._login(session, data, address, send_callback)
+        LOGINS.labels(result).inc()
+        LOGIN_SECONDS.observe(time.perf_counter() - start)
+
+    def _login(self, session, data, address: str, send_callback: Callable[[str], None]) -> str:
+        """
+        Authenticate and load the character - returns the result the login is counted under
+        """
+        try:
+            login_info = json.loads(data)
+            character_name, account_hash = login_info['character_name'], login_info['account_hash']
+        except (ValueError, KeyError, TypeError) as e:
+            send_callback(b'Invalid login.')
+            logging.info(f'Malformed login: {e} - {address}')
+            return 'malformed'
 
         try:
-            if Character.validate_account(session, login_info['character_name'], login_info['account_hash']):
-                send_callback(f'Welcome {login_info["character_name"]}!'.encode('utf-8'))
-                logging.info(f'{login_info["character_name"]} succesfully authenticated - {address}')
+            if Character.validate_account(session, character_name, account_hash):
+                send_callback(f'Welcome {character_name}!'.encode('utf-8'))
+                logging.info(f'{character_name} succesfully authenticated - {address}')
                 self.success = True
-                self.character = Character.get_character(session, login_info['character_name'])
+                self.character = Character.get_character(session, character_name)
+                OCCUPANCY.add(self.character.id, self.character.parent)
+                return 'success'
             else:
                 send_callback(f'Invalid login credentials.'.encode('utf-8'))
-                logging.info(f'Invalid login: {login_info["character_name"]} - {address}')
+                logging.info(f'Invalid login: {character_name} - {address}')
+                return 'invalid'
         except LoginError as e:
-            send_callback(f'No character found by the name of {login_info["character_name"]}.'.encode('utf-8'))
+            send_callback(f'No character found by the name of {character_name}.'.encode('utf-8'))
             logging.info(e)
+            return 'unknown_character'
 
     def refresh(self, session):
-        self.character = Character.refresh(session, self.character.id)
+        with QUERY_STATS.command('refresh'):
+            self.character = Character.refresh(session, self.character.id)
+
+    def logout(self, session):
+        if self.success:
+            try:
+                with QUERY_STATS.command('logout'):
+                    Character.flush_positions(session, [self.character.id])
+            finally:
+                OCCUPANCY.remove(self.character.id)
@@ -0,0 +1,279 @@
+import logging
+import math
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Callable, Dict, Iterator, List, Tuple
+
+class Counter:
+    """
+    Monotonic count - or the value of a function read at collection time
+    """
+    TYPE = 'counter'
+
+    def __init__(self):
+        self._value = 0
+        self._function = None
+        self._lock = Lock()
+
+    def inc(self, amount: float=1):
+        with self._lock:
+            self._value += amount
+
+    def set_function(self, function: Callable[[], float]):
+        self._function = function
+
+    @property
+    def value(self) -> float:
+        return self._function() if self._function else self._value
+
+    def samples(self, name: str, labels: str) -> Iterator[Tuple[str, str, float]]:
+        yield name, labels, self.value
+
+class Gauge(Counter):
+    """
+    Value that goes up and down
+    """
+    TYPE = 'gauge'
+
+    def set(self, value: float):
+        with self._lock:
+            self._value = value
+
+    def dec(self, amount: float=1):
+        self.inc(-amount)
+
+class Histogram:
+    """
+    HDR-style latency histogram - fixed relative error at every magnitude
+
+    Values are counted in whole units, in buckets that are linear up to
+    2 ** (SUB_BUCKET_BITS + 1) units and split each power of two above that
+    into 2 ** SUB_BUCKET_BITS, so a quantile is never off by more than one
+    part in 2 ** SUB_BUCKET_BITS. Recording is a couple of integer operations
+    and a dict update, and only the buckets that were hit are stored.
+    """
+    TYPE = 'summary'
+    SUB_BUCKET_BITS = 5
+    QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+    def __init__(self, unit: float=1e-6):
+        self.unit = unit
+        # Units per second as an integer - bucket bounds divide back to clean decimals
+        self._scale = round(1 / unit)
+        self._counts = {}
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = Lock()
+
+    @classmethod
+    def bucket_index(cls, value: int) -> int:
+        shift = max(value.bit_length() - cls.SUB_BUCKET_BITS - 1, 0)
+        return (shift << cls.SUB_BUCKET_BITS) + (value >> shift)
+
+    @classmethod
+    def bucket_bounds(cls, index: int) -> Tuple[int, int]:
+        """
+        Lowest value in a bucket and the first value past it
+        """
+        shift = max((index >> cls.SUB_BUCKET_BITS) - 1, 0)
+        mantissa = index - (shift << cls.SUB_BUCKET_BITS)
+        return mantissa << shift, (mantissa + 1) << shift
+
+    def observe(self, value: float):
+        units = int(value * self._scale)
+        # bucket_index inlined - this runs several times per command
+        shift = units.bit_length() - self.SUB_BUCKET_BITS - 1
+        index = (shift << self.SUB_BUCKET_BITS) + (units >> shift) if shift > 0 else max(units, 0)
+        with self._lock:
+            self._counts[index] = self._counts.get(index, 0) + 1
+            self._count += 1
+            self._sum += value
+            if value > self._max:
+                self._max = value
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    @property
+    def max(self) -> float:
+        return self._max
+
+    def quantiles(self, quantiles: Tuple[float, ...]=QUANTILES) -> Dict[float, float]:
+        """
+        Highest value each quantile of observations fell under - NaN while empty
+        """
+        with self._lock:
+            counts = sorted(self._counts.items())
+            count, maximum = self._count, self._max
+        results = {}
+        for quantile in quantiles:
+            if not count:
+                results[quantile] = math.nan
+                continue
+            rank = max(math.ceil(quantile * count), 1)
+            seen = 0
+            for index, bucket_count in counts:
+                seen += bucket_count
+                if seen >= rank:
+                    results[quantile] = min(self.bucket_bounds(index)[1] / self._scale, maximum)
+                    break
+        return results
+
+    def quantile(self, quantile: float) -> float:
+        return self.quantiles((quantile,))[quantile]
+
+    def samples(self, name: str, labels: str) -> Iterator[Tuple[str, str, float]]:
+        for quantile, value in self.quantiles().items():
+            yield name, _join_labels(labels, f'quantile="{quantile}"'), value
+        yield f'{name}_sum', labels, self._sum
+        yield f'{name}_count', labels, self._count
+
+def _format(value: float) -> str:
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(value)
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _join_labels(*labels: str) -> str:
+    return ','.join(label for label in labels if label)
+
+class MetricFamily:
+    """
+    A named metric and its children - one per combination of label values
+    """
+    def __init__(self, kind: type, name: str, help: str, labelnames: Tuple[str, ...]=()):
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = Lock()
+
+    def labels(self, *values: str):
+        """
+        The child for these label values - created on first use
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f'{self.name} takes labels {self.labelnames}, got {values}')
+            with self._lock:
+                child = self._children.setdefault(values, self.kind())
+        return child
+
+    def children(self) -> Dict[Tuple[str, ...], object]:
+        with self._lock:
+            return dict(self._children)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind.TYPE}']
+        for values, child in sorted(self.children().items()):
+            labels = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, values))
+            for name, sample_labels, value in child.samples(self.name, labels):
+                sample = f'{name}{{{sample_labels}}}' if sample_labels else name
+                lines.append(f'{sample} {_format(value)}')
+        return lines
+
+class MetricsRegistry:
+    """
+    Every metric the server exports - registering a name twice returns the first metric
+
+    Metrics without labels are handed back as the metric itself, labelled ones as
+    their MetricFamily.
+    """
+    def __init__(self):
+        self._families = {}
+        self._lock = Lock()
+
+    def _register(self, kind: type, name: str, help: str, labelnames: Tuple[str, ...]):
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = MetricFamily(kind, name, help, labelnames)
+        return family.labels() if not family.labelnames else family
+
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...]=()):
+        return self._register(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Tuple[str, ...]=()):
+        return self._register(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...]=()):
+        return self._register(Histogram, name, help, labelnames)
+
+    def render(self) -> str:
+        """
+        Prometheus text exposition format
+        """
+        with self._lock:
+            families = list(self._families.values())
+        return ''.join(line + '\n' for family in families for line in family.render())
+
+class MetricsExporter(ThreadingHTTPServer):
+    """
+    Serves a registry to Prometheus from a daemon thread
+    """
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+    daemon_threads = True
+
+    def __init__(self, registry: MetricsRegistry, host: str, port: int):
+        self.registry = registry
+        super().__init__((host, port), _MetricsHandler)
+        self._thread = Thread(target=self.serve_forever, name='metrics', daemon=True)
+        self._thread.start()
+        logging.info(f'Metrics exported at http://{host}:{self.server_address[1]}/metrics')
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', MetricsExporter.CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args):
+        logging.debug(f'Metrics request from {self.client_address[0]}: {format % args}')
+
+METRICS = MetricsRegistry()
+
+START_TIME = METRICS.gauge('pymud_start_time_seconds', 'Unix time the server process started')
+START_TIME.set(time.time())
+CONNECTIONS = METRICS.gauge('pymud_connections',
+                            'Open client connections - authenticated, or still logging in', ('state',))
+CONNECTIONS_ACCEPTED = METRICS.counter('pymud_connections_accepted_total', 'Client connections accepted')
+LOGINS = METRICS.counter('pymud_logins_total', 'Login attempts by result', ('result',))
+LOGIN_SECONDS = METRICS.histogram('pymud_login_seconds', 'Time to check a login and load its character')
+COMMAND_PARSE_SECONDS = METRICS.histogram('pymud_command_parse_seconds', 'Time to turn input into a phrase')
+COMMAND_EXECUTE_SECONDS = METRICS.histogram('pymud_command_execute_seconds',
+                                            'Time to execute a parsed command by verb', ('verb',))
+COMMAND_ERRORS = METRICS.counter('pymud_command_errors_total', 'Commands answered with an error by reason',
+                                 ('reason',))
+EVENT_QUEUE_DEPTH = METRICS.gauge('pymud_event_queue_depth', 'Events waiting in the event queue')
+EVENT_LAG_SECONDS = METRICS.histogram('pymud_event_lag_seconds',
+                                      'Time from when an event was due until it was executed')
+MESSAGES_SENT = METRICS.counter('pymud_messages_sent_total', 'Messages queued for clients')
+BYTES_SENT = METRICS.counter('pymud_bytes_sent_total', 'Bytes queued for clients')
+MESSAGES_DROPPED = METRICS.counter('pymud_messages_dropped_total',
+                                   'Messages not delivered to a closed or slow client')
+QUERIES = METRICS.counter('pymud_queries_total', 'Database queries by the verb that ran them', ('verb',))
+QUERY_SECONDS = METRICS.counter('pymud_query_seconds_total', 'Time spent in database queries by verb', ('verb',))
@@ -1 +1 @@
-from .mud_parser import MudParser, Phrase
+from .mud_parser import MudParser, Phrase, ParseResult
@@ -0,0 +1,83 @@
+import time
+import logging
+
+from concurrent.futures import Future
+from threading import Thread, Condition
+from typing import Any, Callable, List, Tuple
+from config import (PARSE_BATCH_SIZE,
+                    PARSE_BATCH_WINDOW,
+                    PARSE_BATCH_DISABLE)
+
+class ParseBatcher(Thread):
+    """
+    Collects phrases from every client and tags them together with nlp.pipe
+
+    The first phrase to arrive opens a window; everything submitted before the
+    window closes, up to batch_size, is tagged in one pass. A command waits at
+    most one window before it is parsed.
+    """
+    def __init__(self,
+                 nlp,
+                 extract: Callable[[Any], Any],
+                 batch_size: int=PARSE_BATCH_SIZE,
+                 window: float=PARSE_BATCH_WINDOW):
+        self.nlp = nlp
+        self.extract = extract
+        self.batch_size = batch_size
+        self.window = window
+        self._pending = []
+        self._ready = Condition()
+        self._launched = False
+
+        super().__init__(name='parser', daemon=True)
+
+    def parse(self, phrase: str):
+        """
+        Block until the phrase has been through a batch
+        """
+        return self.submit(phrase).result()
+
+    def submit(self, phrase: str) -> Future:
+        future = Future()
+        with self._ready:
+            if not self._launched:
+                self._launched = True
+                self.start()
+            self._pending.append((phrase, future))
+            self._ready.notify()
+        return future
+
+    def run(self):
+        while True:
+            self._process(self._collect())
+
+    def _collect(self) -> List[Tuple[str, Future]]:
+        """
+        Wait for a phrase, then for the window to close or the batch to fill
+        """
+        with self._ready:
+            while not self._pending:
+                self._ready.wait()
+            deadline = time.monotonic() + self.window
+            while len(self._pending) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._ready.wait(remaining)
+            batch = self._pending[:self.batch_size]
+            del self._pending[:self.batch_size]
+        return batch
+
+    def _process(self, batch: List[Tuple[str, Future]]):
+        phrases = [phrase for phrase, _ in batch]
+        try:
+            # Pipes that only cost time - parsing reads part of speech tags and nothing else
+            disabled = [name for name in PARSE_BATCH_DISABLE if name in self.nlp.pipe_names]
+            docs = self.nlp.pipe(phrases, batch_size=self.batch_size, disable=disabled)
+            for (_, future), doc in zip(batch, docs):
+                future.set_result(self.extract(doc))
+        except Exception as e:
+            logging.exception(e)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
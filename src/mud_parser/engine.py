@@ -0,0 +1,130 @@
+import re
+import time
+import logging
+
+from abc import ABC, abstractmethod
+from threading import Lock
+from typing import Callable, Iterable, List, NamedTuple, Sequence
+from mud_parser.verb import Emote, ACTION_DICT, EMOTE_DICT
+
+class Token(NamedTuple):
+    """
+    Minimal stand-in for a spaCy token - Phrase only reads text and pos_
+    """
+    text: str
+    pos_: str
+
+class ParserEngine(ABC):
+    """
+    Tags a phrase with parts of speech for Phrase.parse_doc
+
+    Engines are called like a spaCy Language object - engine(phrase) returns a
+    sequence of tokens with text and pos_, and pipe() tags many phrases at once.
+    """
+    pipe_names = ()
+
+    @abstractmethod
+    def __call__(self, phrase: str) -> Sequence:
+        pass
+
+    def pipe(self, phrases: Iterable[str], batch_size: int=None, disable: Sequence[str]=()) -> Iterable[Sequence]:
+        return (self(phrase) for phrase in phrases)
+
+class SpacyEngine(ParserEngine):
+    """
+    Statistical tagging with a spaCy model
+    """
+    def __init__(self, model: str='en_core_web_sm'):
+        import spacy
+        self.nlp = spacy.load(model)
+
+    @property
+    def pipe_names(self) -> List[str]:
+        return self.nlp.pipe_names
+
+    def __call__(self, phrase: str) -> Sequence:
+        return self.nlp(phrase)
+
+    def pipe(self, phrases: Iterable[str], batch_size: int=None, disable: Sequence[str]=()) -> Iterable[Sequence]:
+        return self.nlp.pipe(phrases, batch_size=batch_size, disable=disable)
+
+class RuleEngine(ParserEngine):
+    """
+    Lexicon tagger for the MUD command grammar - no model to load
+
+    Commands are a verb followed by noun phrases joined by prepositions, so only
+    prepositions, articles and adverbs need recognising. Everything else is a
+    noun or adjective and ends up in a noun chunk either way.
+    """
+    TOKEN_PATTERN = re.compile(r"[\w'-]+|[^\w\s]")
+    PREPOSITIONS = frozenset([
+        'about', 'above', 'across', 'after', 'against', 'along', 'among', 'around',
+        'at', 'before', 'behind', 'below', 'beneath', 'beside', 'between', 'beyond',
+        'by', 'down', 'for', 'from', 'in', 'inside', 'into', 'near', 'of', 'off',
+        'on', 'onto', 'out', 'outside', 'over', 'past', 'through', 'to', 'toward',
+        'towards', 'under', 'underneath', 'up', 'upon', 'with', 'within', 'without'
+    ])
+    DETERMINERS = frozenset([
+        'a', 'an', 'the', 'this', 'that', 'these', 'those', 'my', 'your', 'his',
+        'her', 'its', 'our', 'their', 'some', 'any', 'each', 'every', 'all', 'no'
+    ])
+    ADVERBS = frozenset(Emote.ADVERBS) | frozenset([
+        'very', 'really', 'quite', 'too', 'so', 'just', 'again', 'here', 'there'
+    ])
+
+    def __call__(self, phrase: str) -> List[Token]:
+        words = self.TOKEN_PATTERN.findall(phrase)
+        return [Token(word, self.tag(word, index)) for index, word in enumerate(words)]
+
+    @classmethod
+    def tag(cls, word: str, index: int) -> str:
+        lowered = word.lower()
+        if index == 0 and (lowered in ACTION_DICT or lowered in EMOTE_DICT):
+            return 'VERB'
+        if lowered in cls.PREPOSITIONS:
+            return 'ADP'
+        if lowered in cls.DETERMINERS:
+            return 'DET'
+        if lowered in cls.ADVERBS:
+            return 'ADV'
+        if not word[0].isalnum():
+            return 'PUNCT'
+        return 'NOUN'
+
+class LazyEngine(ParserEngine):
+    """
+    Defers building an engine until the first phrase or an explicit load()
+    """
+    def __init__(self, factory: Callable[[], ParserEngine]):
+        self.factory = factory
+        self._engine = None
+        self._lock = Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._engine is not None
+
+    def load(self) -> ParserEngine:
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    start = time.perf_counter()
+                    self._engine = self.factory()
+                    logging.info(f'Parser engine {self.factory.__name__} loaded in '
+                                 f'{time.perf_counter() - start:.2f}s')
+        return self._engine
+
+    @property
+    def pipe_names(self) -> Sequence[str]:
+        return self.load().pipe_names
+
+    def __call__(self, phrase: str) -> Sequence:
+        return self.load()(phrase)
+
+    def pipe(self, phrases: Iterable[str], batch_size: int=None, disable: Sequence[str]=()) -> Iterable[Sequence]:
+        return self.load().pipe(phrases, batch_size=batch_size, disable=disable)
+
+ENGINES = {
+    'spacy': SpacyEngine,
+    'rules': RuleEngine
+}
@@ -1,60 +1,130 @@
 import logging
 import random
-import spacy
 import copy
+import time
 
-from typing import List, Tuple, Union
+from typing import List, Tuple, Union, Optional, NamedTuple, Sequence
 from sqlalchemy.orm.session import Session
 from exceptions import (UnknownVerb,
                         BadArguments,
                         UnknownVerb,
                         UnknownTarget)
-from mud_parser.verb import VerbResponse, Emote, ACTION_DICT, EMOTE_DICT
+from mud_parser.verb import VerbResponse, Emote, Admin, ACTION_DICT, EMOTE_DICT, ADMIN_DICT, VERB_TRIE
+from mud_parser.engine import ENGINES, LazyEngine
+from mud_parser.batcher import ParseBatcher
+from mud_parser.parse_pool import ParsePool
+from mud_parser.parse_cache import ParseCache
+from config import PARSER_ENGINE, PARSER_FAST_PATH, PARSE_BATCHING, PARSE_WORKERS
 
 from data.models import Character
+from data.query_stats import QUERY_STATS
+from metrics import COMMAND_PARSE_SECONDS, COMMAND_EXECUTE_SECONDS, COMMAND_ERRORS
+from profiler import PROFILER
 
-NLP = spacy.load("en_core_web_sm")
+# Loaded on the first phrase, or by MudParser.warm_up() once the server is listening
+NLP = LazyEngine(ENGINES[PARSER_ENGINE])
+
+class ParseResult(NamedTuple):
+    """
+    Immutable output of parsing a phrase - safe to share between phrases
+    """
+    verb: str
+    ins: Tuple[str, ...]
+    noun_chunks: Tuple[str, ...]
+    descriptors: Tuple[str, ...]
 
 class Phrase:
     """
     Transforms a client string into an actionable object
     """
     EXCLUDE_FROM_NOUN_CHUNKS = ['DET', 'ADV']
+    KNOWN_ADVERBS = frozenset(Emote.ADVERBS)
 
-    def __init__(self, phrase: str):
+    def __init__(self, phrase: str, parts: ParseResult=None):
         self.is_emote = False
         self.is_action = False
-        self.verb, self.ins, self.noun_chunks, self.descriptors = self._parse(phrase)
+        if parts is None:
+            parts = self._parse(phrase)
+        self.verb, self.ins, self.noun_chunks, self.descriptors = self._validate(parts)
+
+    @classmethod
+    def fast_parse(cls, phrase: str) -> Optional[ParseResult]:
+        """
+        Parse phrases that need no tagging without spaCy - a lone verb, or an emote
+        and a known adverb. Returns None for anything else
+        """
+        words = phrase.split()
+        if not all(word.isalpha() for word in words):
+            return None
+        if len(words) == 1:
+            return ParseResult(words[0], (), (), ())
+        if len(words) == 2 and words[0] in EMOTE_DICT and words[1] in cls.KNOWN_ADVERBS:
+            return ParseResult(words[0], (), (), (words[1],))
+        return None
 
-    def _parse(self, phrase: str) -> Tuple[str, List[str], List[str]]:
+    def _parse(self, phrase: str) -> ParseResult:
         """
         Parse parts of speech from a string phrase - skip articles
         """
-        doc = NLP(phrase)
+        return self.parse_doc(NLP(phrase))
+
+    @classmethod
+    def parse_doc(cls, doc: Sequence) -> ParseResult:
+        """
+        Extract parts of speech from a doc tagged by the parser engine
+        """
         verb = doc[0].text
+        ins = tuple(token.text for token in doc[1:] if token.pos_ == 'ADP')
+        noun_chunks = tuple(cls._build_noun_chunks(doc))
+        verbs = VERB_TRIE.resolve(verb)
+        if len(verbs) == 1 and verbs[0] in EMOTE_DICT.keys() and len(doc) > 1:
+            descriptors = (doc[1].text,)
+        else:
+            descriptors = ()
+        return ParseResult(verb, ins, noun_chunks, descriptors)
 
-        ins = [token.text for token in doc[1:] if token.pos_ == 'ADP']
-        descriptors = []
-        noun_chunks = self._build_noun_chunks(doc)
+    def _validate(self, parts: ParseResult) -> Tuple[str, List[str], List[str], List[str]]:
+        """
+        Check the parts of speech against the verb
+        """
+        verb = self.resolve_verb(parts.verb)
+        ins = list(parts.ins)
+        noun_chunks = list(parts.noun_chunks)
+        descriptors = list(parts.descriptors)
 
         if verb in ACTION_DICT.keys():
             self.is_action = True
             ACTION_DICT[verb].validate_phrase_structure(ins, noun_chunks)
         elif verb in EMOTE_DICT.keys():
             self.is_emote = True
-            descriptors = [Emote.complete_adverb(doc[1].text)] if len(doc) > 1 else []
+            descriptors = [Emote.complete_adverb(descriptor) for descriptor in descriptors]
             Emote.validate_phrase_structure(noun_chunks, descriptors)
         else:
             raise UnknownVerb
             
         return verb, ins, noun_chunks, descriptors
     
-    def _build_noun_chunks(self, doc: spacy.tokens.doc.Doc) -> List[str]:
+    @staticmethod
+    def resolve_verb(verb: str) -> str:
+        """
+        Expand an abbreviated verb - exact names always win
+        """
+        if verb in ACTION_DICT or verb in EMOTE_DICT:
+            return verb
+        verbs = VERB_TRIE.resolve(verb)
+        if not verbs:
+            raise UnknownVerb
+        if len(verbs) > 1:
+            raise BadArguments(f'Did you mean {", ".join(verbs)}?')
+        return verbs[0]
+
+    @classmethod
+    def _build_noun_chunks(cls, doc: Sequence) -> List[str]:
         """
         Construct noun phrases with adjectives and nouns
         """
         stripped_phrase = [token for token in doc[1:] if
-                           token.pos_ not in self.EXCLUDE_FROM_NOUN_CHUNKS]
+                           token.pos_ not in cls.EXCLUDE_FROM_NOUN_CHUNKS]
         noun_chunks = []
         local_chunk  = ''
         for token in stripped_phrase:
@@ -95,6 +165,10 @@ class Phrase:
         except IndexError:
             raise StopIteration
 
+BATCHER = ParseBatcher(NLP, Phrase.parse_doc)
+PARSE_POOL = ParsePool()
+PARSE_CACHE = ParseCache()
+
 class MudParser:
     """
     Turn a client string into an executable command
@@ -113,34 +187,132 @@ class MudParser:
     ]
     
     @classmethod
-    def parse_data(cls, session: Session, character: Character, data: bytes):
+    @PROFILER.sampled('parse_data')
+    def parse_data(cls, session: Session, character: Character, data: bytes, parts: ParseResult=None):
         """
-        Invoke a verb and format the response
+        Invoke a verb and format the response - parts from preparse() skip tagging
         """
         try:
-            input = data.decode('utf-8').strip().lower()
+            input = cls.normalize(data)
             if not input:
                 return VerbResponse(b'', character_id=character.id)
-            phrase = Phrase(input)
-            if phrase.is_action:
-                response = ACTION_DICT[phrase.verb].execute(session, character, phrase)
-            elif phrase.is_emote:
-                response = EMOTE_DICT[phrase.verb].execute(session, character, phrase)
+            verb, _, arguments = input.partition(' ')
+            if verb in ADMIN_DICT and Admin.is_admin(character):
+                return cls._execute_admin(session, character, verb, arguments.split())
+            start = time.perf_counter()
+            try:
+                phrase = cls.parse_phrase(input, parts)
+            finally:
+                parsed = time.perf_counter()
+                COMMAND_PARSE_SECONDS.observe(parsed - start)
+            try:
+                with QUERY_STATS.command(phrase.verb):
+                    if phrase.is_action:
+                        response = ACTION_DICT[phrase.verb].execute(session, character, phrase)
+                    elif phrase.is_emote:
+                        response = EMOTE_DICT[phrase.verb].execute(session, character, phrase)
+            finally:
+                COMMAND_EXECUTE_SECONDS.labels(phrase.verb).observe(time.perf_counter() - parsed)
             return response
         except UnknownVerb:
             logging.debug(f'Unable to parse data: {input} - {character.name}')
+            COMMAND_ERRORS.labels('unknown_verb').inc()
             return VerbResponse(message_i=random.choice(cls.PHRASE_ERROR),
                                 character_id=character.id)
         except UnknownTarget:
             logging.debug(f'Unable to find target: {input} - {character.name}')
+            COMMAND_ERRORS.labels('unknown_target').inc()
             return VerbResponse(message_i=random.choice(cls.TARGET_ERROR),
                                 character_id=character.id)
         except BadArguments as e:
+            COMMAND_ERRORS.labels('bad_arguments').inc()
             return VerbResponse(message_i=str(e), character_id=character.id)
     
     @classmethod
-    def format_newline(cls, message: bytes):
-        newline_char = slice(len(message) - len(cls.NEWLINE), len(message))
-        if message[newline_char] != cls.NEWLINE:
-            return message + cls.NEWLINE
-        return message
+    def _execute_admin(cls, session: Session, character: Character, verb: str, arguments: List[str]):
+        """
+        Run an admin verb - the caller has checked the character may
+        """
+        start = time.perf_counter()
+        try:
+            with QUERY_STATS.command(verb):
+                return ADMIN_DICT[verb].execute(session, character, arguments)
+        finally:
+            COMMAND_EXECUTE_SECONDS.labels(verb).observe(time.perf_counter() - start)
+
+    @classmethod
+    def warm_up(cls):
+        """
+        Load whichever tagger will serve commands so the first player does not wait
+        """
+        if PARSE_WORKERS:
+            PARSE_POOL.warm_up()
+        else:
+            NLP.load()
+
+    @classmethod
+    def normalize(cls, data: bytes) -> str:
+        # Telnet negotiation and other stray bytes become unknown words, not errors
+        return data.decode('utf-8', errors='replace').strip().lower()
+
+    @classmethod
+    def preparse(cls, data: bytes) -> Optional[ParseResult]:
+        return cls.preparse_many([data])[0]
+
+    @classmethod
+    def preparse_many(cls, lines: List[bytes]) -> List[Optional[ParseResult]]:
+        """
+        Tag client input before a database session is opened, in a worker process or
+        batched with other clients - None where parse_data should tag it itself
+        """
+        inputs = [cls.normalize(line) for line in lines]
+        parts = [None] * len(inputs)
+        pending = []
+        for index, input in enumerate(inputs):
+            if not input or input in PARSE_CACHE:
+                continue
+            if PARSER_FAST_PATH:
+                parts[index] = Phrase.fast_parse(input)
+            if parts[index] is None:
+                pending.append(index)
+        if pending and PARSE_WORKERS:
+            results = PARSE_POOL.parse_many([inputs[index] for index in pending])
+        elif pending and PARSE_BATCHING:
+            futures = [BATCHER.submit(inputs[index]) for index in pending]
+            results = [future.result() for future in futures]
+        else:
+            results = []
+        for index, result in zip(pending, results):
+            parts[index] = result
+        return parts
+
+    @classmethod
+    def parse_phrase(cls, input: str, parts: ParseResult=None) -> Phrase:
+        """
+        Build a phrase from normalized input - from the cache, precomputed parts, the
+        fast path or spaCy, in that order
+        """
+        cached = PARSE_CACHE.get(input)
+        if isinstance(cached, Exception):
+            raise type(cached)(*cached.args)
+        parts = cached or parts
+        if parts is None and PARSER_FAST_PATH:
+            parts = Phrase.fast_parse(input)
+        if parts is None:
+            parts = Phrase.parse_doc(NLP(input))
+        try:
+            phrase = Phrase(input, parts)
+        except (BadArguments, UnknownVerb) as e:
+            PARSE_CACHE.put(input, e)
+            raise
+        PARSE_CACHE.put(input, parts)
+        return phrase
+
+    @classmethod
+    def format_newline(cls, message: bytes) -> bytes:
+        """
+        Terminate a message with NEWLINE - framed messages are returned as is, not copied
+        """
+        if message.endswith(cls.NEWLINE):
+            return message
+        return message + cls.NEWLINE
@@ -0,0 +1,56 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Hashable, Any
+from config import PARSE_CACHE_SIZE
+
+class ParseCache:
+    """
+    Size-bounded LRU of parse outcomes keyed by normalized input
+
+    Values are immutable ParseResults, or the exception a phrase failed
+    validation with so that repeated garbage input is rejected without tagging.
+    """
+    def __init__(self, size: int=PARSE_CACHE_SIZE):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Cached value, marked as most recently used - None on a miss
+        """
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self), 'size': self.size}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
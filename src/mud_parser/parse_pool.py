@@ -0,0 +1,79 @@
+import logging
+import multiprocessing
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from typing import List
+from config import (PARSE_WORKERS,
+                    PARSE_BATCH_DISABLE)
+
+# Worker process state - set once by _load_model
+_nlp = None
+_parse_doc = None
+_disabled = []
+
+def _load_model():
+    """
+    Load the spaCy model once per worker process
+    """
+    global _nlp, _parse_doc, _disabled
+    from mud_parser.mud_parser import NLP, Phrase
+    _nlp, _parse_doc = NLP, Phrase.parse_doc
+    _disabled = [name for name in PARSE_BATCH_DISABLE if name in NLP.pipe_names]
+
+def _parse(phrases: List[str]) -> list:
+    return [_parse_doc(doc) for doc in _nlp.pipe(phrases, disable=_disabled)]
+
+class ParsePool:
+    """
+    Worker processes that tag phrases outside the GIL of the server process
+
+    Workers only return ParseResults - verbs still execute in the server with
+    its database session. Processes are spawned on first use so the pool never
+    inherits server threads or database connections.
+    """
+    def __init__(self, workers: int=PARSE_WORKERS):
+        self.workers = workers
+        self._executor = None
+        self._lock = Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context('spawn'),
+                                                     initializer=_load_model)
+            return self._executor
+
+    def submit(self, phrases: List[str]) -> Future:
+        return self._get_executor().submit(_parse, phrases)
+
+    def parse_many(self, phrases: List[str]) -> list:
+        """
+        Tag phrases in a worker - all None if the pool has died, so the caller can
+        fall back to parsing in process
+        """
+        try:
+            return self.submit(phrases).result()
+        except BrokenProcessPool as e:
+            logging.exception(e)
+            with self._lock:
+                self._executor = None
+            return [None] * len(phrases)
+
+    def parse(self, phrase: str):
+        return self.parse_many([phrase])[0]
+
+    def warm_up(self):
+        """
+        Start every worker so each has its model loaded before the first command
+        """
+        for future in [self.submit(['look']) for _ in range(self.workers)]:
+            future.result()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
@@ -0,0 +1,70 @@
+from typing import Iterable, List
+
+class TrieNode:
+    __slots__ = ('children', 'word', 'count')
+
+    def __init__(self):
+        self.children = {}
+        self.word = None
+        # Words at or below this node - one means the prefix is unambiguous
+        self.count = 0
+
+class PrefixTrie:
+    """
+    Prefix index for resolving abbreviations - lookups cost O(k) in the prefix length
+    """
+    def __init__(self, words: Iterable[str]=()):
+        self._root = TrieNode()
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str):
+        if word in self:
+            return
+        node = self._root
+        node.count += 1
+        for char in word:
+            node = node.children.setdefault(char, TrieNode())
+            node.count += 1
+        node.word = word
+
+    def _find(self, prefix: str) -> TrieNode:
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def complete(self, prefix: str, limit: int=None) -> List[str]:
+        """
+        Words starting with prefix in alphabetical order - at most limit of them
+        """
+        node = self._find(prefix)
+        words = []
+        stack = [node] if node else []
+        while stack and (limit is None or len(words) < limit):
+            node = stack.pop()
+            if node.word is not None:
+                words.append(node.word)
+            stack.extend(node.children[char] for char in sorted(node.children, reverse=True))
+        return words
+
+    def resolve(self, prefix: str, limit: int=5) -> List[str]:
+        """
+        The word prefix stands for - an exact match or the only completion. Ambiguous
+        prefixes return up to limit candidates, unknown prefixes an empty list
+        """
+        node = self._find(prefix)
+        if node is None:
+            return []
+        if node.word is not None:
+            return [node.word]
+        return self.complete(prefix, 1 if node.count == 1 else limit)
+
+    def __contains__(self, word: str) -> bool:
+        node = self._find(word)
+        return node is not None and node.word == word
+
+    def __len__(self) -> int:
+        return self._root.count
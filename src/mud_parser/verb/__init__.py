@@ -2,6 +2,13 @@ from .verb import Verb, VerbResponse
 from .action import Action
 from .emote import Emote
 from .direction import Direction
+from .admin import Admin
+from mud_parser.trie import PrefixTrie
 
 ACTION_DICT = Action.get_subclass_dict()
 EMOTE_DICT = Emote.get_subclass_dict()
+ADMIN_DICT = Admin.get_subclass_dict()
+# Every verb name for abbreviations - 'lo' is look, 'n' stays north. Admin verbs
+# are left out so players are never offered them
+VERB_TRIE = PrefixTrie({name: verb for name, verb in Verb.get_subclass_dict().items()
+                        if name not in ADMIN_DICT})
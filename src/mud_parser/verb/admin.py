@@ -0,0 +1,105 @@
+from __future__ import annotations
+import math
+import time
+
+from sqlalchemy.orm.session import Session
+from typing import List
+
+from config import ADMIN_CHARACTERS
+from exceptions import BadArguments
+from metrics import (START_TIME,
+                     CONNECTIONS,
+                     LOGINS,
+                     LOGIN_SECONDS,
+                     COMMAND_PARSE_SECONDS,
+                     COMMAND_EXECUTE_SECONDS,
+                     COMMAND_ERRORS,
+                     EVENT_QUEUE_DEPTH,
+                     EVENT_LAG_SECONDS,
+                     MESSAGES_SENT,
+                     BYTES_SENT,
+                     MESSAGES_DROPPED)
+from mud_parser.verb import Verb, VerbResponse
+
+from data.models import Character
+from data.query_stats import QUERY_STATS
+from profiler import PROFILER
+
+class Admin(Verb):
+    """
+    Verbs only ADMIN_CHARACTERS may use
+
+    They are kept out of ACTION_DICT and VERB_TRIE, so they are never abbreviated
+    or suggested. MudParser runs them by exact name for admins before anything is
+    parsed, and to everyone else they are words it does not know.
+    """
+    __ABSTRACT = True
+
+    @staticmethod
+    def is_admin(character: Character) -> bool:
+        return character.name in ADMIN_CHARACTERS
+
+    @staticmethod
+    def execute(session: Session, character: Character, arguments: List[str]) -> VerbResponse:
+        """
+        Execute the command - arguments are the words after the verb
+        """
+        raise NotImplementedError('execute was not implemented!')
+
+def _milliseconds(seconds: float) -> str:
+    # Quantiles of a histogram with nothing in it yet are NaN
+    return '-' if math.isnan(seconds) else f'{seconds * 1000:.1f}ms'
+
+class Stats(Admin):
+    @staticmethod
+    def execute(session: Session, character: Character, arguments: List[str]):
+        if arguments:
+            raise BadArguments('Stats for what? It takes no arguments.')
+        # Imported here - mud_parser imports this package before PARSE_CACHE exists
+        from mud_parser.mud_parser import PARSE_CACHE
+
+        uptime = time.time() - START_TIME.value
+        verbs = sorted(COMMAND_EXECUTE_SECONDS.children().items(), key=lambda item: -item[1].count)
+        commands = sum(histogram.count for _, histogram in verbs)
+        errors = sum(counter.value for counter in COMMAND_ERRORS.children().values())
+        logins = {result: counter.value for (result,), counter in LOGINS.children().items()}
+        cache = PARSE_CACHE.stats()
+        lookups = cache['hits'] + cache['misses']
+        lines = [
+            f'Uptime {uptime / 3600:.1f}h - {CONNECTIONS.labels("authenticated").value} players, '
+            f'{CONNECTIONS.labels("unauthenticated").value} connecting',
+            f'Logins: {logins.get("success", 0)} of {sum(logins.values())}, '
+            f'p99 {_milliseconds(LOGIN_SECONDS.quantile(0.99))}',
+            f'Commands: {commands} ({commands / max(uptime, 1):.1f}/s), {errors} errors, '
+            f'parse p50 {_milliseconds(COMMAND_PARSE_SECONDS.quantile(0.5))} '
+            f'p99 {_milliseconds(COMMAND_PARSE_SECONDS.quantile(0.99))}, '
+            f'cache {cache["hits"] / max(lookups, 1):.0%} hits',
+        ]
+        for (verb,), histogram in verbs:
+            queries = QUERY_STATS.get(verb)
+            lines.append(f'  {verb:<10} {histogram.count:>8} '
+                         f'p50 {_milliseconds(histogram.quantile(0.5)):>8} '
+                         f'p99 {_milliseconds(histogram.quantile(0.99)):>8} '
+                         f'{queries.queries / max(queries.commands, 1):.1f} queries')
+        lines += [
+            f'Events: {EVENT_QUEUE_DEPTH.value} queued, '
+            f'lag p99 {_milliseconds(EVENT_LAG_SECONDS.quantile(0.99))} '
+            f'max {_milliseconds(EVENT_LAG_SECONDS.max)}',
+            f'Sent: {MESSAGES_SENT.value} messages, {BYTES_SENT.value / 1024:.0f}KB, '
+            f'{MESSAGES_DROPPED.value} dropped',
+        ]
+        return VerbResponse(message_i=tuple(lines), character_id=character.id)
+
+class Profile(Admin):
+    @staticmethod
+    def execute(session: Session, character: Character, arguments: List[str]):
+        if arguments:
+            raise BadArguments('Profile what? It switches profiling on and off.')
+        if not PROFILER.enabled:
+            PROFILER.start()
+            return VerbResponse(message_i=f'Profiling {PROFILER.sample_rate:.0%} of commands and events '
+                                          f'({PROFILER.mode}) - profile again to stop.',
+                                character_id=character.id)
+        paths = PROFILER.stop()
+        return VerbResponse(message_i=(f'Profiling stopped - {PROFILER.samples} samples.', *paths),
+                            character_id=character.id)
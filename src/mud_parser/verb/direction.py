@@ -18,9 +18,18 @@ class Direction(Action):
         if noun_chunks or ins:
             raise BadArguments('Go where?')
         
-    @staticmethod
-    def execute(session: Session, character: Character, phrase: Phrase):
-        return Direction.execute_direction(session, character, phrase.verb)
+    @classmethod
+    def execute(cls, session: Session, character: Character, phrase: Phrase):
+        return Direction.execute_direction(session, character, cls.get_direction_name())
+
+    @classmethod
+    def get_direction_name(cls) -> str:
+        """
+        Direction as stored on room connections - abbreviations resolve to their parent, N to north
+        """
+        for direction in cls.__mro__:
+            if Direction in direction.__bases__:
+                return direction.__name__.lower()
 
     @staticmethod
     def execute_direction(session: Session, character: Character, direction: str):
@@ -3,6 +3,8 @@ from typing import TYPE_CHECKING, List, Tuple
 
 from sqlalchemy.orm.session import Session
 from mud_parser.verb import Verb, VerbResponse
+from mud_parser.trie import PrefixTrie
+from exceptions import BadArguments
 
 from data.models import MudObject, Character
 
@@ -141,6 +143,7 @@ class Emote(Verb):
         'wildly',
         'wisely'
     ]
+    ADVERB_TRIE = PrefixTrie(ADVERBS)
 
     BASE_STRING = None
     MODIFIED_STRING = None
@@ -154,11 +157,15 @@ class Emote(Verb):
 
     @classmethod
     def complete_adverb(cls, word: str):
-        if len(word) >= 3:
-            for adverb in cls.ADVERBS:
-                if word in adverb:
-                    return adverb
-        return None
+        """
+        Adverb a word abbreviates - None if it is too short or matches nothing
+        """
+        if len(word) < 3:
+            return None
+        adverbs = cls.ADVERB_TRIE.resolve(word)
+        if len(adverbs) > 1:
+            raise BadArguments(f'Did you mean {", ".join(adverbs)}?')
+        return adverbs[0] if adverbs else None
     
     @classmethod
     def execute(cls, session: Session, character: Character, phrase: Phrase) -> VerbResponse:
@@ -168,14 +175,14 @@ class Emote(Verb):
             return VerbResponse(message_i=cls.FIRST_TARGET_STRING,
                                 character_id=character.id,
                                 message_you=cls.SECOND_TARGET_STRING,
-                                target_id=phrase.targets[0].id,
+                                target_id=targets[0].id,
                                 message_they=cls.THIRD_TARGET_STRING,
                                 room_id=character.parent)
         if targets:
             return VerbResponse(message_i=cls.FIRST_BASE_TARGET_STRING,
                                 character_id=character.id,
                                 message_you=cls.SECOND_BASE_TARGET_STRING,
-                                target_id=phrase.targets[0].id,
+                                target_id=targets[0].id,
                                 message_they=cls.THIRD_BASE_TARGET_STRING,
                                 room_id=character.parent)
         if descriptor:
@@ -2,6 +2,7 @@ from sqlalchemy.orm.session import Session
 from typing import Union, Tuple, List
 from exceptions import BadResponse
 from data.models import MudObject, Room, Character
+from data.target_index import TARGETS
 
 class Verb:
     @classmethod
@@ -24,12 +25,10 @@ class Verb:
         """
         Matches noun_chunks to MudObjects with a matching short description
         """
-        targets = []
-        for chunk in noun_chunks:
-            target_matches = Room.match_short_desc(session, chunk, character.parent)
-            if target_matches:
-                targets.append(target_matches[0])
-        return targets
+        if TARGETS.loaded:
+            return [target for target in TARGETS.match(character.parent, noun_chunks) if target]
+        matches = Room.match_short_descs(session, noun_chunks, character.parent)
+        return [matches[chunk][0] for chunk in noun_chunks if matches[chunk]]
     
 class VerbResponse:
     """
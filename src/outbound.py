@@ -0,0 +1,116 @@
+import socket
+import logging
+
+from threading import Thread, Condition
+from typing import Callable
+from config import (OUTBOUND_BUFFER_LIMIT,
+                    SLOW_CONSUMER_POLICY)
+
+class OutboundBuffer:
+    """
+    Bounded queue of bytes waiting to be written to one connection
+
+    Everything queued since the writer last woke up is handed over as one chunk,
+    so a burst of broadcasts costs a single send. A client that lets more than
+    limit bytes pile up is a slow consumer - with the 'disconnect' policy the
+    buffer closes and on_overflow is called from the producer's thread, since
+    the writer is likely stuck in a send. With 'discard' new messages are
+    dropped until it drains.
+    """
+    def __init__(self,
+                 limit: int=OUTBOUND_BUFFER_LIMIT,
+                 policy: str=SLOW_CONSUMER_POLICY,
+                 on_overflow: Callable[[], None]=None):
+        self.limit = limit
+        self.policy = policy
+        self.on_overflow = on_overflow
+        self.overflowed = False
+        self.discarded = 0
+        self._chunks = []
+        self._size = 0
+        self._closed = False
+        self._ready = Condition()
+
+    def put(self, data: bytes) -> bool:
+        """
+        Queue data without blocking - False if it was not accepted
+        """
+        with self._ready:
+            if self._closed:
+                return False
+            if self._size + len(data) <= self.limit:
+                self._chunks.append(data)
+                self._size += len(data)
+                self._ready.notify()
+                return True
+            if self.policy == 'discard':
+                self.discarded += 1
+                return False
+            self.overflowed = True
+            self._closed = True
+            self._chunks.clear()
+            self._ready.notify()
+        # Outside the lock - the callback may block on the socket
+        if self.on_overflow:
+            self.on_overflow()
+        return False
+
+    def take(self) -> bytes:
+        """
+        Block until data is queued and return all of it - None once closed and drained
+        """
+        with self._ready:
+            while not self._chunks and not self._closed:
+                self._ready.wait()
+            if not self._chunks:
+                return None
+            # A lone message goes out as is - broadcasts share one bytes object
+            data = self._chunks[0] if len(self._chunks) == 1 else b''.join(self._chunks)
+            self._chunks.clear()
+            self._size = 0
+            return data
+
+    def close(self):
+        """
+        Stop accepting data - whatever is already queued is still written
+        """
+        with self._ready:
+            self._closed = True
+            self._ready.notify()
+
+    def __len__(self) -> int:
+        return self._size
+
+class ConnectionWriter(Thread):
+    """
+    Drains an OutboundBuffer into a socket so senders never block on a slow client
+    """
+    def __init__(self, connection: socket.socket, outbound: OutboundBuffer, address=None):
+        self.connection = connection
+        self.outbound = outbound
+        self.address = address
+
+        super().__init__(name=f'writer-{address}', daemon=True)
+
+    def run(self):
+        while True:
+            data = self.outbound.take()
+            if data is None:
+                break
+            try:
+                self.connection.sendall(data)
+            except OSError as e:
+                logging.info(e)
+                self.outbound.close()
+                break
+
+    def disconnect(self):
+        """
+        Cut off a slow consumer - fails a send the writer is blocked in and wakes the
+        reader, so the client goes through its normal logout
+        """
+        logging.warning(f'Disconnecting slow consumer: {self.address}')
+        try:
+            self.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
@@ -0,0 +1,193 @@
+import cProfile
+import functools
+import logging
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+
+from collections import Counter
+from threading import Event, Lock, Thread
+from typing import Callable, List
+from config import PROFILE_MODE, PROFILE_SAMPLE_RATE, PROFILE_STACK_INTERVAL, PROFILE_DIR
+
+class SampledProfiler:
+    """
+    Profiles a sampled fraction of hot path calls while switched on
+
+    Functions decorated with sampled(label) cost one attribute check while the
+    profiler is off. Once started, sample_rate of their calls are profiled -
+    under cProfile in 'cprofile' mode, with results merged per label into pstats
+    files, or in 'stack' mode by a thread that records the stacks of sampled
+    calls every interval seconds as collapsed stacks for flamegraph.pl or
+    speedscope. Results are written to directory when the profiler is stopped.
+
+    The stack sampler needs the GIL to look, so it only sees a call that waits on
+    I/O or runs past the switch interval - slow calls, the ones worth seeing. The
+    switch interval is lowered to interval while it runs so it can cut in sooner.
+    """
+    MODES = ('cprofile', 'stack')
+
+    def __init__(self,
+                 mode: str=PROFILE_MODE,
+                 sample_rate: float=PROFILE_SAMPLE_RATE,
+                 interval: float=PROFILE_STACK_INTERVAL,
+                 directory: str=PROFILE_DIR):
+        if mode not in self.MODES:
+            raise ValueError(f'mode must be one of {self.MODES}')
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.directory = directory
+        self.enabled = False
+        self.samples = 0
+        self.started = None
+        self._stats = {}
+        self._stacks = Counter()
+        # Thread id -> label and the frame a sampled call runs under, for the stack sampler
+        self._active = {}
+        self._local = threading.local()
+        self._lock = Lock()
+        self._stopping = Event()
+        self._sampler = None
+        self._switch_interval = None
+
+    def sampled(self, label: str) -> Callable:
+        """
+        Decorator - profile sampled calls to the function under label
+        """
+        def decorator(function: Callable) -> Callable:
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled or random.random() >= self.sample_rate:
+                    return function(*args, **kwargs)
+                return self._run(label, function, args, kwargs)
+            return wrapper
+        return decorator
+
+    def _run(self, label: str, function: Callable, args: tuple, kwargs: dict):
+        # A sampled call inside another is already covered by the outer one
+        if getattr(self._local, 'active', False):
+            return function(*args, **kwargs)
+        self._local.active = True
+        try:
+            if self.mode == 'stack':
+                return self._run_sampled(label, function, args, kwargs)
+            return self._run_profiled(label, function, args, kwargs)
+        finally:
+            self._local.active = False
+
+    def _run_sampled(self, label: str, function: Callable, args: tuple, kwargs: dict):
+        thread_id = threading.get_ident()
+        self._active[thread_id] = (label, sys._getframe())
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self._active.pop(thread_id, None)
+
+    def _run_profiled(self, label: str, function: Callable, args: tuple, kwargs: dict):
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12 allows one active cProfile across all threads
+            return function(*args, **kwargs)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            profile.disable()
+            with self._lock:
+                if label in self._stats:
+                    self._stats[label].add(profile)
+                else:
+                    self._stats[label] = pstats.Stats(profile)
+                self.samples += 1
+
+    def _sample_stacks(self):
+        while not self._stopping.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id, (label, root) in self._active.copy().items():
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None and frame is not root:
+                    code = frame.f_code
+                    # co_qualname is new in 3.11 - the docker image runs 3.10
+                    name = getattr(code, 'co_qualname', code.co_name)
+                    stack.append(f'{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                    frame = frame.f_back
+                # The call finished since the copy was taken - its thread is elsewhere now
+                if frame is None:
+                    continue
+                stack.append(label)
+                with self._lock:
+                    self._stacks[';'.join(reversed(stack))] += 1
+                    self.samples += 1
+
+    def start(self) -> bool:
+        """
+        Discard earlier results and start sampling - False if already running
+        """
+        with self._lock:
+            if self.enabled:
+                return False
+            self._stats.clear()
+            self._stacks.clear()
+            self.samples = 0
+            self.started = time.time()
+            if self.mode == 'stack':
+                self._stopping.clear()
+                self._switch_interval = sys.getswitchinterval()
+                sys.setswitchinterval(min(self.interval, self._switch_interval))
+                self._sampler = Thread(target=self._sample_stacks, name='stack-sampler', daemon=True)
+                self._sampler.start()
+            self.enabled = True
+        logging.info(f'Profiling {self.sample_rate:.0%} of calls ({self.mode})')
+        return True
+
+    def stop(self) -> List[str]:
+        """
+        Stop sampling and write the results - returns the files written
+        """
+        with self._lock:
+            if not self.enabled:
+                return []
+            self.enabled = False
+        if self._sampler:
+            self._stopping.set()
+            self._sampler.join()
+            self._sampler = None
+            sys.setswitchinterval(self._switch_interval)
+        paths = self.dump()
+        logging.info(f'Profiling stopped - {self.samples} samples written to {", ".join(paths) or "nothing"}')
+        return paths
+
+    def toggle(self) -> List[str]:
+        """
+        Start if stopped, otherwise stop - for the signal handler
+        """
+        if self.enabled:
+            return self.stop()
+        self.start()
+        return []
+
+    def dump(self) -> List[str]:
+        """
+        Write a pstats file per label and the collapsed stacks, named by start time
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        prefix = os.path.join(self.directory, time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started)))
+        paths = []
+        with self._lock:
+            for label, stats in self._stats.items():
+                paths.append(f'{prefix}-{label}.pstats')
+                stats.dump_stats(paths[-1])
+            if self._stacks:
+                paths.append(f'{prefix}.collapsed')
+                with open(paths[-1], 'w') as collapsed:
+                    for stack, count in sorted(self._stacks.items()):
+                        collapsed.write(f'{stack} {count}\n')
+        return paths
+
+PROFILER = SampledProfiler()
@@ -1,52 +1,127 @@
 #!/usr/bin/python3
 import socket
+import signal
+import sys
 import threading
 import logging
+import asyncio
+import time
 import copy
 
+from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy.orm import scoped_session, sessionmaker
+from typing import List, Tuple
 from login_manager import LoginManager
+from line_buffer import LineBuffer
+from outbound import OutboundBuffer, ConnectionWriter
 from mud_parser import MudParser
-from event_queue import EventQueue
+from mud_parser.verb import VerbResponse
+from event_queue import EventQueue, Event, Scheduler
+from data.models import MudObject, Character, Room
+from data.occupancy import OCCUPANCY
+from data.write_behind import POSITIONS
+from data.query_stats import QUERY_STATS
+from profiler import PROFILER
+from metrics import (METRICS,
+                     MetricsExporter,
+                     CONNECTIONS,
+                     CONNECTIONS_ACCEPTED,
+                     EVENT_QUEUE_DEPTH,
+                     MESSAGES_SENT,
+                     BYTES_SENT,
+                     MESSAGES_DROPPED)
 from config import (HOST,
                     PORT,
                     DATABASE_ADDRESS,
                     BUFFER_SIZE,
-                    ENGINE)
+                    MAX_LINE_LENGTH,
+                    LOGIN_HANDSHAKE,
+                    SERVER_MODE,
+                    ASYNC_WORKERS,
+                    OUTBOUND_BUFFER_LIMIT,
+                    SLOW_CONSUMER_POLICY,
+                    OCCUPANCY_RECONCILE_INTERVAL,
+                    WRITE_BEHIND_INTERVAL,
+                    PARSER_WARM_UP,
+                    METRICS_HOST,
+                    METRICS_PORT,
+                    get_engine)
 
 class MudServer:
     """
     Container for all server child threads
     """
-    engine = ENGINE
     def __init__(self, host, port, buffer_size):
         self.db_session = scoped_session(
             sessionmaker(
                 autoflush=True,
-                bind=ENGINE
+                bind=get_engine()
             )
         )
         logging.info(f'Connected to database at {DATABASE_ADDRESS}')
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.socket.bind((host, port))
-        self.socket.listen()
-        logging.info(f'Server started at {HOST}:{PORT}')
+        if POSITIONS.recover():
+            self._flush_positions()
+        self.reload_world()
 
         self.buffer_size = buffer_size
         self.event_queue = EventQueue()
         self.unauthenticated_client_threads = []
         self.authenticated_client_threads = {}
+        self.last_reconcile = time.time()
+        self.last_flush = time.time()
+        self.scheduler = Scheduler(self.event_queue, self._tick)
+        self.scheduler.start()
+        self.metrics_exporter = self._start_metrics()
+
+        try:
+            self._serve(host, port)
+        finally:
+            self.scheduler.stop()
+            self._flush_positions()
+            if self.metrics_exporter:
+                self.metrics_exporter.stop()
+
+    def _start_metrics(self) -> MetricsExporter:
+        """
+        Point the server gauges at this server and export them - None if the exporter is off
+        """
+        CONNECTIONS.labels('unauthenticated').set_function(lambda: len(self.unauthenticated_client_threads))
+        CONNECTIONS.labels('authenticated').set_function(lambda: len(self.authenticated_client_threads))
+        EVENT_QUEUE_DEPTH.set_function(lambda: len(self.event_queue))
+        if not METRICS_PORT:
+            return None
+        try:
+            return MetricsExporter(METRICS, METRICS_HOST, METRICS_PORT)
+        except OSError as e:
+            logging.warning(f'Metrics exporter not started on {METRICS_HOST}:{METRICS_PORT}: {e}')
+            return None
+
+    def _serve(self, host, port):
+        """
+        Listen for connections until the process exits
+        """
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.bind((host, port))
+        self.socket.listen()
+        logging.info(f'Server started at {HOST}:{PORT}')
+        self._start_warm_up()
 
         while True:
             self._accept_connections()
-            self._refresh_threads()
-            self._service_queue()
+
+    def _start_warm_up(self):
+        """
+        Load the parser in the background now that clients can connect
+        """
+        if PARSER_WARM_UP:
+            threading.Thread(target=MudParser.warm_up, name='warm-up', daemon=True).start()
 
     def _accept_connections(self):
         """
         Accept incoming connections and append to list
         """
         connection, address = self.socket.accept()
+        CONNECTIONS_ACCEPTED.inc()
         self.unauthenticated_client_threads.append(ClientThread(
             connection,
             address,
@@ -54,6 +129,17 @@ class MudServer:
             self.db_session,
             self.event_queue))
 
+    def _tick(self):
+        """
+        Housekeeping run by the scheduler thread on every wakeup
+        """
+        self._refresh_threads()
+        self._service_queue()
+        if time.time() - self.last_flush >= WRITE_BEHIND_INTERVAL:
+            self._flush_positions()
+        if time.time() - self.last_reconcile >= OCCUPANCY_RECONCILE_INTERVAL:
+            self._reconcile_occupancy()
+
     def _refresh_threads(self):
         """
         Mark newly authenticated threads and remove old threads
@@ -62,6 +148,9 @@ class MudServer:
             if thread.character_id:
                 self.authenticated_client_threads.update({thread.character_id: thread})
                 self.unauthenticated_client_threads.remove(thread)
+            elif not thread.is_alive():
+                # Failed logins, and clients that left before logging in
+                self.unauthenticated_client_threads.remove(thread)
         for character_id, thread in copy.copy(self.authenticated_client_threads).items():
             if not thread.is_alive():
                 self.authenticated_client_threads.pop(character_id)
@@ -70,8 +159,36 @@ class MudServer:
         """
         Send all events scheduled for now or earlier
         """
+        self.event_queue.execute_events(self.authenticated_client_threads)
+
+    def reload_world(self):
+        """
+        Rebuild the in-memory world graph and target index - call after editing rooms,
+        exits or objects outside the server
+        """
         with self.db_session() as session:
-            self.event_queue.execute_events(session, self.authenticated_client_threads)
+            Room.load_world_graph(session)
+            MudObject.load_target_index(session)
+
+    def _flush_positions(self):
+        """
+        Write buffered character movement to the database
+        """
+        self.last_flush = time.time()
+        if len(POSITIONS):
+            with self.db_session() as session, QUERY_STATS.command('flush'):
+                Character.flush_positions(session)
+
+    def _reconcile_occupancy(self):
+        """
+        Check the in-memory occupancy index against the database
+        """
+        self.last_reconcile = time.time()
+        snapshot = OCCUPANCY.snapshot()
+        if snapshot:
+            with self.db_session() as session, QUERY_STATS.command('reconcile'):
+                locations = Character.get_locations(session, list(snapshot))
+            OCCUPANCY.reconcile(snapshot, locations)
 
 
 class ClientThread(threading.Thread):
@@ -85,34 +202,241 @@ class ClientThread(threading.Thread):
         self.db_session = db_session
         self.event_queue = event_queue
         self.character_id = None
+        self.outbound = OutboundBuffer(on_overflow=lambda: self.writer.disconnect())
+        self.writer = ConnectionWriter(connection, self.outbound, address)
+        self.writer.start()
 
         super().__init__()
         self.start()
 
     def run(self):
         logging.info(f'Client connected: {self.address}')
-        # TODO: send json on first message upon front-end connection
-        # data = self.connection.recv(self.buffer_size)
-        data = b'{"character_name": "Rha", "account_hash": "1"}'
-        with self.db_session() as session:
-            login_manager = LoginManager(session, data, self.address, self.send_message)
-            self.character_id = login_manager.character.id
-
-        if login_manager.success:
-            data = b'look\r\n'
-            while data:
-                logging.info(data)
-                if data.strip():
+        try:
+            login, data = self._read_login() if LOGIN_HANDSHAKE else (LoginManager.DEVELOPMENT_LOGIN, b'')
+            with self.db_session() as session:
+                login_manager = LoginManager(session, login, self.address, self.send_message)
+
+            if login_manager.success:
+                self.character_id = login_manager.character.id
+                line_buffer = LineBuffer()
+                data = b'look\r\n' + data
+                try:
+                    while data:
+                        logging.info(data)
+                        if line_buffer.feed(data):
+                            self.send_message(LineBuffer.DISCARDED_MESSAGE)
+                        lines = [line for line in line_buffer.pop_lines() if line.strip()]
+                        if lines:
+                            for response in self._parse_lines(login_manager, lines):
+                                self.send_message(response.message_i)
+                                if response.message_they or response.message_you:
+                                    self.event_queue.push_event(Event(response))
+                        data = self.connection.recv(self.buffer_size)
+                except OSError as e:
+                    logging.info(e)
+                finally:
                     with self.db_session() as session:
-                        login_manager.refresh(session)
-                        response = MudParser.parse_data(session, login_manager.character, data)
-                    self.send_message(response.message_i)
-                data = self.connection.recv(self.buffer_size)
-        self.connection.close()
+                        login_manager.logout(session)
+        except Exception as e:
+            # Anything else would end the thread with the writer and socket left open
+            logging.exception(e)
+        finally:
+            self.outbound.close()
+            self.writer.join(timeout=1)
+            self.connection.close()
         logging.info(f'Client disconnected: {self.address}')
 
+    def _read_login(self) -> Tuple[bytes, bytes]:
+        """
+        Read the login line a client opens with - returns it and any input sent after it
+        """
+        data = b''
+        try:
+            while b'\n' not in data and len(data) <= MAX_LINE_LENGTH:
+                chunk = self.connection.recv(self.buffer_size)
+                if not chunk:
+                    break
+                data += chunk
+        except OSError as e:
+            logging.info(e)
+        login, _, data = data.partition(b'\n')
+        return login.strip(), data
+
+    def _parse_lines(self, login_manager: LoginManager, lines: List[bytes]) -> List[VerbResponse]:
+        """
+        Run a burst of pipelined commands under one database session
+        """
+        parts = MudParser.preparse_many(lines)
+        with self.db_session() as session:
+            login_manager.refresh(session)
+            return [MudParser.parse_data(session, login_manager.character, line, line_parts)
+                    for line, line_parts in zip(lines, parts)]
+
     def send_message(self, message: str):
-        self.connection.send(MudParser.format_newline(message))
+        """
+        Queue a message for the writer thread - safe to call from any thread
+        """
+        message = MudParser.format_newline(message)
+        if self.outbound.put(message):
+            MESSAGES_SENT.inc()
+            BYTES_SENT.inc(len(message))
+        else:
+            MESSAGES_DROPPED.inc()
+
+
+class AsyncMudServer(MudServer):
+    """
+    Single event loop server - every client connection is a coroutine
+    """
+    def _serve(self, host, port):
+        asyncio.run(self._serve_async(host, port))
+
+    async def _serve_async(self, host, port):
+        """
+        Run the listener until the loop is stopped
+        """
+        self.loop = asyncio.get_running_loop()
+        # Database and parsing work is blocking, so it runs on a bounded pool
+        self.loop.set_default_executor(ThreadPoolExecutor(max_workers=ASYNC_WORKERS))
+        server = await asyncio.start_server(self._accept_connection, host, port)
+        logging.info(f'Server started at {HOST}:{PORT} (asyncio)')
+        self._start_warm_up()
+        async with server:
+            await server.serve_forever()
+
+    async def _accept_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Drive a single client connection from login to disconnect
+        """
+        CONNECTIONS_ACCEPTED.inc()
+        client = AsyncClient(reader, writer, self.buffer_size, self.db_session, self.event_queue)
+        self.unauthenticated_client_threads.append(client)
+        await client.run()
+
+
+class AsyncClient:
+    """
+    Coroutine counterpart to ClientThread for the asyncio server mode
+    """
+    def __init__(self, reader, writer, buffer_size, db_session, event_queue):
+        self.reader = reader
+        self.writer = writer
+        self.address = writer.get_extra_info('peername')
+        self.buffer_size = buffer_size
+        self.db_session = db_session
+        self.event_queue = event_queue
+        self.loop = asyncio.get_running_loop()
+        self.character_id = None
+        self.running = True
+        self._pending = []
+        self._pending_size = 0
+
+    def is_alive(self) -> bool:
+        return self.running
+
+    async def run(self):
+        logging.info(f'Client connected: {self.address}')
+        login_manager = None
+        try:
+            login = await self._read_login() if LOGIN_HANDSHAKE else LoginManager.DEVELOPMENT_LOGIN
+            login_manager = await self.loop.run_in_executor(None, self._login, login)
+            if login_manager.success:
+                self.character_id = login_manager.character.id
+                line_buffer = LineBuffer()
+                data = b'look\r\n'
+                while data:
+                    logging.info(data)
+                    if line_buffer.feed(data):
+                        self.send_message(LineBuffer.DISCARDED_MESSAGE)
+                    lines = [line for line in line_buffer.pop_lines() if line.strip()]
+                    if lines:
+                        responses = await self.loop.run_in_executor(None, self._parse_lines, login_manager, lines)
+                        for response in responses:
+                            self.send_message(response.message_i)
+                            if response.message_they or response.message_you:
+                                self.event_queue.push_event(Event(response))
+                    data = await self.reader.read(self.buffer_size)
+        except ConnectionError as e:
+            logging.info(e)
+        except Exception as e:
+            # Anything else would leave the client counted as connecting with its socket open
+            logging.exception(e)
+        finally:
+            try:
+                await self.loop.run_in_executor(None, self._logout, login_manager)
+            finally:
+                self.running = False
+                self.writer.close()
+        logging.info(f'Client disconnected: {self.address}')
+
+    async def _read_login(self) -> bytes:
+        """
+        Read the login line a client opens with - input after it stays on the reader
+        """
+        try:
+            return await self.reader.readline()
+        except (ConnectionError, ValueError) as e:
+            logging.info(e)
+            return b''
+
+    def _login(self, data: bytes) -> LoginManager:
+        with self.db_session() as session:
+            return LoginManager(session, data, self.address, self.send_message)
+
+    def _logout(self, login_manager: LoginManager):
+        # None when the login itself failed
+        if login_manager is None:
+            return
+        with self.db_session() as session:
+            login_manager.logout(session)
+
+    def _parse_lines(self, login_manager: LoginManager, lines: List[bytes]) -> List[VerbResponse]:
+        parts = MudParser.preparse_many(lines)
+        with self.db_session() as session:
+            login_manager.refresh(session)
+            return [MudParser.parse_data(session, login_manager.character, line, line_parts)
+                    for line, line_parts in zip(lines, parts)]
+
+    def send_message(self, message: bytes):
+        """
+        Queue a message on the transport - safe to call from any thread
+        """
+        self.loop.call_soon_threadsafe(self._queue_write, MudParser.format_newline(message))
+
+    def _queue_write(self, data: bytes):
+        """
+        Collect messages until the loop comes round again, then write them together
+        """
+        transport = self.writer.transport
+        if transport.is_closing():
+            MESSAGES_DROPPED.inc()
+            return
+        if transport.get_write_buffer_size() + self._pending_size + len(data) > OUTBOUND_BUFFER_LIMIT:
+            MESSAGES_DROPPED.inc()
+            if SLOW_CONSUMER_POLICY == 'discard':
+                return
+            logging.warning(f'Disconnecting slow consumer: {self.address}')
+            transport.abort()
+            return
+        if not self._pending:
+            self.loop.call_soon(self._flush_writes)
+        self._pending.append(data)
+        self._pending_size += len(data)
+        MESSAGES_SENT.inc()
+        BYTES_SENT.inc(len(data))
+
+    def _flush_writes(self):
+        data = b''.join(self._pending)
+        self._pending.clear()
+        self._pending_size = 0
+        if not self.writer.transport.is_closing():
+            self.writer.write(data)
 
 if __name__ == '__main__':
-    MudServer(HOST, PORT, BUFFER_SIZE)
+    # Exit through the normal shutdown path so buffered state is flushed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    signal.signal(signal.SIGUSR1, lambda signum, frame: PROFILER.toggle())
+    if SERVER_MODE == 'asyncio':
+        AsyncMudServer(HOST, PORT, BUFFER_SIZE)
+    else:
+        MudServer(HOST, PORT, BUFFER_SIZE)
@@ -0,0 +1,15 @@
+from contextlib import contextmanager
+from data.query_stats import QUERY_STATS
+
+class QueryBudgetMixin:
+    """
+    Mixin for TestCase - fails when a command runs more queries than its verb is allowed
+    """
+    @contextmanager
+    def assertQueryBudget(self, verb: str, budget: int):
+        before = QUERY_STATS.get(verb)
+        yield
+        after = QUERY_STATS.get(verb)
+        self.assertEqual(after.commands - before.commands, 1, f'Expected one {verb} command')
+        queries = after.queries - before.queries
+        self.assertLessEqual(queries, budget, f'{verb} ran {queries} queries, its budget is {budget}')
@@ -0,0 +1,219 @@
+import time
+import random
+import unittest
+
+from threading import Thread
+from event_queue import EventQueue, Event, Scheduler
+from data.occupancy import OCCUPANCY
+from event_queue.backend import EventHandle, HeapBackend
+from event_queue.timing_wheel import TimingWheelBackend
+from mud_parser.verb import VerbResponse
+
+class MockClient:
+    """
+    Mock - Records every message sent to it
+    """
+    def __init__(self):
+        self.messages = []
+
+    def send_message(self, message: bytes):
+        self.messages.append(message)
+
+def broadcast(message: str, timestamp: float=None) -> Event:
+    return Event(VerbResponse(message_they=message), timestamp)
+
+class TestEventQueue(unittest.TestCase):
+    BACKEND = 'heap'
+
+    def setUp(self):
+        self.event_queue = EventQueue(self.BACKEND)
+        self.client = MockClient()
+        self.clients = {1: self.client}
+
+    def test_execution_order(self):
+        """
+        Test that due events execute in timestamp order, ties in push order
+        """
+        now = time.time()
+        self.event_queue.push_event(broadcast('second', now))
+        self.event_queue.push_event(broadcast('third', now))
+        self.event_queue.push_event(broadcast('first', now - 1))
+        self.event_queue.execute_events(self.clients)
+        self.assertEqual(self.client.messages, [b'first\r\n', b'second\r\n', b'third\r\n'])
+
+    def test_room_event(self):
+        """
+        Test that room events reach the room's occupants but not the actor
+        """
+        bystander, elsewhere = MockClient(), MockClient()
+        self.clients.update({2: bystander, 3: elsewhere})
+        for character_id, room_id in ((1, 10), (2, 10), (3, 20)):
+            OCCUPANCY.add(character_id, room_id)
+        try:
+            self.event_queue.push_event(Event(VerbResponse(message_i='You laugh.',
+                                                           character_id=1,
+                                                           message_they='Someone laughs.',
+                                                           room_id=10)))
+            self.event_queue.execute_events(self.clients)
+        finally:
+            for character_id in self.clients:
+                OCCUPANCY.remove(character_id)
+        self.assertEqual(self.client.messages, [])
+        self.assertEqual(bystander.messages, [b'Someone laughs.\r\n'])
+        self.assertEqual(elsewhere.messages, [])
+
+    def test_broadcast_shared(self):
+        """
+        Test that a broadcast is framed once and every recipient gets the same bytes
+        """
+        self.clients.update({id: MockClient() for id in range(2, 10)})
+        self.event_queue.push_event(broadcast('A bell tolls.'))
+        self.event_queue.execute_events(self.clients)
+        messages = [client.messages[0] for client in self.clients.values()]
+        self.assertEqual(messages[0], b'A bell tolls.\r\n')
+        self.assertTrue(all(message is messages[0] for message in messages))
+
+    def test_future_event(self):
+        """
+        Test that events scheduled for later stay queued
+        """
+        event = broadcast('later', time.time() + 60)
+        self.event_queue.push_event(event)
+        self.event_queue.execute_events(self.clients)
+        self.assertEqual(self.client.messages, [])
+        self.assertFalse(event.wait(0))
+        self.assertEqual(self.event_queue._peek_time(), event.timestamp)
+
+    def test_blocking_push(self):
+        """
+        Test that a blocking push returns once the scheduler has executed the event
+        """
+        scheduler = Scheduler(self.event_queue,
+                              lambda: self.event_queue.execute_events(self.clients),
+                              tick_rate=1)
+        scheduler.start()
+        try:
+            self.event_queue.push_event(broadcast('soon', time.time() + 0.05), block=True)
+            self.assertEqual(self.client.messages, [b'soon\r\n'])
+        finally:
+            scheduler.stop()
+
+    def test_concurrent_producers(self):
+        """
+        Test that events pushed from many threads are all executed exactly once
+        """
+        producers = [Thread(target=lambda: [self.event_queue.push_event(broadcast('ping'))
+                                            for _ in range(100)])
+                     for _ in range(20)]
+        for producer in producers:
+            producer.start()
+        for producer in producers:
+            producer.join()
+        self.event_queue.execute_events(self.clients)
+        self.assertEqual(len(self.client.messages), 2000)
+        self.assertEqual(self.event_queue._peek_time(), float('inf'))
+
+    def test_cancel(self):
+        """
+        Test that a cancelled event never executes and releases blocked producers
+        """
+        handle = self.event_queue.push_event(broadcast('cancelled', time.time() + 0.05))
+        self.event_queue.push_event(broadcast('kept', time.time() + 0.05))
+        self.assertTrue(handle.cancel())
+        self.assertFalse(handle.cancel())
+        self.assertTrue(handle.event.wait(0))
+        time.sleep(0.1)
+        self.event_queue.execute_events(self.clients)
+        self.assertEqual(self.client.messages, [b'kept\r\n'])
+        self.assertEqual(len(self.event_queue), 0)
+
+    def test_reschedule(self):
+        """
+        Test that a rescheduled event moves to its new time, after events already queued for it
+        """
+        now = time.time()
+        delayed = self.event_queue.push_event(broadcast('delayed', now - 1))
+        self.event_queue.push_event(broadcast('first', now))
+        postponed = self.event_queue.push_event(broadcast('postponed', now))
+        self.assertTrue(delayed.reschedule(now))
+        self.assertTrue(postponed.reschedule(now + 60))
+        self.event_queue.execute_events(self.clients)
+        self.assertEqual(self.client.messages, [b'first\r\n', b'delayed\r\n'])
+        self.assertFalse(delayed.reschedule(now + 60))
+        self.assertEqual(len(self.event_queue), 1)
+
+class TestTimingWheelEventQueue(TestEventQueue):
+    BACKEND = 'wheel'
+
+    def test_future_event(self):
+        """
+        Test that events scheduled for later stay queued - the wheel reports the tick they expire in
+        """
+        event = broadcast('later', time.time() + 60)
+        self.event_queue.push_event(event)
+        self.event_queue.execute_events(self.clients)
+        self.assertEqual(self.client.messages, [])
+        self.assertFalse(event.wait(0))
+        self.assertGreater(self.event_queue._peek_time(), time.time())
+
+class TestTimingWheel(unittest.TestCase):
+    def test_expiry_across_levels(self):
+        """
+        Test that events spread over every level and the overflow fire once, in order, never early
+        """
+        # Seeded so a failure can be reproduced
+        rng = random.Random(3)
+        start = time.time() + 1
+        wheel = TimingWheelBackend(resolution=1, slots=4, levels=2, start=start)
+        handles = [EventHandle(None, broadcast('tick', start + rng.uniform(0, 100)), sequence)
+                   for sequence in range(500)]
+        for handle in handles:
+            wheel.push(handle)
+        cancelled = handles[::7]
+        for handle in cancelled:
+            wheel.remove(handle)
+
+        fired = []
+        for step in range(102):
+            now = start + step
+            next_due = wheel.peek_time()
+            due = wheel.pop_due(now)
+            if next_due > now:
+                self.assertEqual(due, [])
+            for handle in due:
+                # never early, and late by at most one tick plus one step
+                self.assertLessEqual(handle.event.timestamp, now)
+                self.assertGreater(handle.event.timestamp, now - 2)
+            self.assertEqual(due, sorted(due, key=TimingWheelBackend.EXECUTION_ORDER))
+            fired.extend(due)
+
+        self.assertEqual(set(fired), set(handles) - set(cancelled))
+        self.assertEqual(len(fired), len(set(fired)))
+        self.assertEqual(len(wheel), 0)
+
+class TestHeapBackend(unittest.TestCase):
+    def test_compaction(self):
+        """
+        Test that tombstones are skipped and compacted away once they pass the ratio
+        """
+        heap = HeapBackend(compaction_ratio=0.5, compaction_minimum=10)
+        now = time.time()
+        handles = [EventHandle(None, broadcast('tick', now + sequence), sequence)
+                   for sequence in range(100)]
+        for handle in handles:
+            heap.push(handle)
+        for handle in handles[80:]:
+            heap.remove(handle)
+        self.assertEqual(len(heap), 80)
+        self.assertEqual(len(heap._heap), 100)
+
+        # the 51st tombstone passes half the heap and triggers a rebuild
+        for handle in handles[45:80]:
+            heap.remove(handle)
+        self.assertEqual(len(heap), 45)
+        self.assertEqual(len(heap._heap), 49)
+
+        heap.remove(handles[0])
+        self.assertEqual(heap.peek_time(), handles[1].event.timestamp)
+        self.assertEqual(heap.pop_due(now + 100), handles[1:45])
+        self.assertEqual(len(heap), 0)
@@ -0,0 +1,42 @@
+import unittest
+
+from line_buffer import LineBuffer
+
+class TestLineBuffer(unittest.TestCase):
+    def test_pipelined(self):
+        """
+        Test that several commands in one read become separate lines
+        """
+        buffer = LineBuffer()
+        buffer.feed(b'n\r\nn\r\ne\n')
+        self.assertEqual(buffer.pop_lines(), [b'n', b'n', b'e'])
+        self.assertEqual(len(buffer), 0)
+
+    def test_split(self):
+        """
+        Test that a command split across reads is joined, including a split CRLF
+        """
+        buffer = LineBuffer()
+        buffer.feed(b'look at gob')
+        self.assertEqual(buffer.pop_lines(), [])
+        buffer.feed(b'lin\r')
+        buffer.feed(b'\nlaugh')
+        self.assertEqual(buffer.pop_lines(), [b'look at goblin'])
+
+    def test_max_line_length(self):
+        """
+        Test that overlong lines are discarded once, even across reads
+        """
+        buffer = LineBuffer(max_line_length=8)
+        self.assertEqual(buffer.feed(b'way too long\r\nlook\r\n'), 1)
+        self.assertEqual(buffer.feed(b'also far too'), 1)
+        self.assertEqual(buffer.feed(b' long\r\nn\r\n'), 0)
+        self.assertEqual(buffer.pop_lines(), [b'look', b'n'])
+
+    def test_max_queued_lines(self):
+        """
+        Test that a flood of lines beyond the queue depth is discarded
+        """
+        buffer = LineBuffer(max_queued_lines=2)
+        self.assertEqual(buffer.feed(b'n\nn\nn\nn\n'), 2)
+        self.assertEqual(buffer.pop_lines(), [b'n', b'n'])
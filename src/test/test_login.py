@@ -0,0 +1,120 @@
+import asyncio
+import socket
+import unittest
+
+from contextlib import nullcontext
+from types import SimpleNamespace
+from typing import Tuple
+from unittest.mock import patch
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
+from config import SQLITE_PRAGMAS
+from data.sqlite import create_sqlite_engine
+from data.models import Character, Room
+from event_queue import EventQueue
+from login_manager import LoginManager
+from pymud import AsyncClient, ClientThread
+
+class TestLogin(unittest.TestCase):
+    def test_malformed_login(self):
+        """
+        Test that a login line that is not a JSON login is refused without a database lookup
+        """
+        for data in (b'look', b'[]', b'{"character_name": "Rha"}'):
+            messages = []
+            login_manager = LoginManager(None, data, None, messages.append)
+            self.assertFalse(login_manager.success)
+            self.assertEqual(messages, [b'Invalid login.'])
+
+    def test_read_login(self):
+        """
+        Test that the login line is split from commands sent in the same packet
+        """
+        server, client = socket.socketpair()
+        with server, client:
+            client.sendall(b'{"character_name": "Rha", "account_hash": "1"}\r\nlook\r\n')
+            login, data = ClientThread._read_login(SimpleNamespace(connection=server, buffer_size=1024))
+        self.assertEqual(login, b'{"character_name": "Rha", "account_hash": "1"}')
+        self.assertEqual(data, b'look\r\n')
+
+class TestClientThread(unittest.TestCase):
+    def test_unexpected_error(self):
+        """
+        Test that a command which crashes still closes the writer and the connection
+        """
+        server, client = socket.socketpair()
+        self.addCleanup(client.close)
+        login_manager = SimpleNamespace(success=True, character=SimpleNamespace(id=7), logout=lambda session: None)
+        with patch('pymud.LoginManager', return_value=login_manager), \
+             patch.object(ClientThread, '_parse_lines', side_effect=UnicodeDecodeError('utf-8', b'\xff', 0, 1, 'invalid')):
+            thread = ClientThread(server, None, 1024, nullcontext, None)
+            thread.join(timeout=5)
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(thread.writer.is_alive())
+        self.assertEqual(server.fileno(), -1)
+
+class TestAsyncClient(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_sqlite_engine('sqlite://', SQLITE_PRAGMAS)
+        with Session(self.engine) as session:
+            void = Room.create_room(session, 'The Void', 'This is the deepest darkest void.')
+            session.add(Character(name='Rha', account_hash='1', short_desc='Rha, God of the Sun', parent=void.id))
+            session.commit()
+        self.db_session = scoped_session(sessionmaker(bind=self.engine))
+        self.clients = []
+
+    def tearDown(self):
+        self.db_session.remove()
+        self.engine.dispose()
+
+    async def connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """
+        Serve one AsyncClient per connection and connect to it
+        """
+        async def accept(reader, writer):
+            self.clients.append(AsyncClient(reader, writer, 1024, self.db_session, EventQueue()))
+            await self.clients[-1].run()
+        self.server = await asyncio.start_server(accept, '127.0.0.1', 0)
+        return await asyncio.open_connection(*self.server.sockets[0].getsockname())
+
+    async def wait_closed(self, reader: asyncio.StreamReader) -> bytes:
+        """
+        Read until the server hangs up, then wait for the client to finish logging out
+        """
+        data = await asyncio.wait_for(reader.read(), timeout=5)
+        for _ in range(500):
+            if not self.clients[0].is_alive():
+                break
+            await asyncio.sleep(0.01)
+        self.server.close()
+        return data
+
+    def test_session(self):
+        """
+        Test a login, a command and a disconnect over a socket
+        """
+        async def session():
+            reader, writer = await self.connect()
+            welcome = await asyncio.wait_for(reader.readuntil(b'void.\r\n'), timeout=5)
+            writer.write(b'look\r\n')
+            look = await asyncio.wait_for(reader.readuntil(b'void.\r\n'), timeout=5)
+            writer.close()
+            await self.wait_closed(reader)
+            return welcome, look
+        welcome, look = asyncio.run(session())
+        self.assertEqual(welcome, b'Welcome Rha!\r\nThe Void\r\nThis is the deepest darkest void.\r\n')
+        self.assertEqual(look, b'The Void\r\nThis is the deepest darkest void.\r\n')
+        self.assertIsNotNone(self.clients[0].character_id)
+        self.assertFalse(self.clients[0].is_alive())
+
+    def test_login_error(self):
+        """
+        Test that a login which raises still ends the client and closes its connection
+        """
+        async def session():
+            reader, writer = await self.connect()
+            data = await self.wait_closed(reader)
+            writer.close()
+            return data
+        with patch.object(AsyncClient, '_login', side_effect=RuntimeError('database is down')):
+            self.assertEqual(asyncio.run(session()), b'')
+        self.assertFalse(self.clients[0].is_alive())
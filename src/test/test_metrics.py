@@ -0,0 +1,150 @@
+import math
+import unittest
+import urllib.request
+
+from types import SimpleNamespace
+from unittest.mock import patch
+from metrics import (Histogram,
+                     MetricsRegistry,
+                     MetricsExporter,
+                     COMMAND_PARSE_SECONDS,
+                     COMMAND_EXECUTE_SECONDS,
+                     COMMAND_ERRORS)
+from mud_parser import MudParser
+from mud_parser.verb import admin, VERB_TRIE
+from pymud import MudServer
+from data.models import Character, Room
+
+CHARACTER = Character(id=2, short_desc='Novice TestCharacter', name='TestCharacter', account_hash='1')
+
+class TestHistogram(unittest.TestCase):
+    def test_buckets(self):
+        """
+        Test that buckets tile the number line and stay within the relative error
+        """
+        error = 1 / 2 ** Histogram.SUB_BUCKET_BITS
+        upper = 0
+        for index in range(Histogram.bucket_index(10 ** 9) + 1):
+            lower, next_upper = Histogram.bucket_bounds(index)
+            self.assertEqual(lower, upper)
+            self.assertLessEqual(next_upper - lower - 1, max(lower * error, 0))
+            upper = next_upper
+        for value in (0, 1, 63, 64, 65, 1000, 123456, 10 ** 9):
+            lower, upper = Histogram.bucket_bounds(Histogram.bucket_index(value))
+            self.assertTrue(lower <= value < upper)
+
+    def test_quantiles(self):
+        """
+        Test that quantiles of 1..1000ms are within the relative error
+        """
+        histogram = Histogram()
+        self.assertTrue(math.isnan(histogram.quantile(0.5)))
+        for millisecond in range(1, 1001):
+            histogram.observe(millisecond / 1000)
+        quantiles = histogram.quantiles((0.5, 0.99, 1))
+        error = 1 / 2 ** Histogram.SUB_BUCKET_BITS
+        for quantile, expected in ((0.5, 0.5), (0.99, 0.99), (1, 1)):
+            self.assertAlmostEqual(quantiles[quantile], expected, delta=expected * error)
+        self.assertEqual(quantiles[1], 1)
+        self.assertEqual(histogram.count, 1000)
+        self.assertAlmostEqual(histogram.sum, 500.5)
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_render(self):
+        """
+        Test the Prometheus text format of each kind of metric
+        """
+        counter = self.registry.counter('test_total', 'A counter')
+        counter.inc(2)
+        gauge = self.registry.gauge('test_depth', 'A gauge', ('queue',))
+        gauge.labels('a "quoted" queue').set_function(lambda: 7)
+        self.registry.histogram('test_seconds', 'A histogram').observe(0.5)
+        self.assertIs(self.registry.counter('test_total', 'Registered again'), counter)
+        lines = self.registry.render().splitlines()
+        self.assertEqual(lines[:3], ['# HELP test_total A counter', '# TYPE test_total counter', 'test_total 2'])
+        self.assertIn('test_depth{queue="a \\"quoted\\" queue"} 7', lines)
+        self.assertIn('# TYPE test_seconds summary', lines)
+        self.assertIn('test_seconds{quantile="0.5"} 0.5', lines)
+        self.assertIn('test_seconds_count 1', lines)
+
+    def test_labels(self):
+        """
+        Test that label children are created once and checked against the label names
+        """
+        family = self.registry.counter('test_total', 'A counter', ('verb',))
+        family.labels('look').inc()
+        family.labels('look').inc()
+        self.assertEqual(family.labels('look').value, 2)
+        with self.assertRaises(ValueError):
+            family.labels('look', 'north')
+
+    def test_exporter(self):
+        """
+        Test that the exporter serves the registry over HTTP
+        """
+        self.registry.counter('test_total', 'A counter').inc()
+        exporter = MetricsExporter(self.registry, '127.0.0.1', 0)
+        try:
+            url = f'http://127.0.0.1:{exporter.server_address[1]}/metrics'
+            with urllib.request.urlopen(url, timeout=5) as response:
+                self.assertTrue(response.headers['Content-Type'].startswith('text/plain'))
+                self.assertIn(b'test_total 1\n', response.read())
+        finally:
+            exporter.stop()
+
+@patch.object(Room, 'get_desc', lambda x, y: 'You are in the void.')
+class TestCommandMetrics(unittest.TestCase):
+    def test_parse_data(self):
+        """
+        Test that parse_data times parsing and execution and counts errors
+        """
+        parsed = COMMAND_PARSE_SECONDS.count
+        looked = COMMAND_EXECUTE_SECONDS.labels('look').count
+        unknown = COMMAND_ERRORS.labels('unknown_verb').value
+        MudParser.parse_data(None, CHARACTER, b'look')
+        MudParser.parse_data(None, CHARACTER, b'rawriamadinosaur')
+        self.assertEqual(COMMAND_PARSE_SECONDS.count - parsed, 2)
+        self.assertEqual(COMMAND_EXECUTE_SECONDS.labels('look').count - looked, 1)
+        self.assertEqual(COMMAND_ERRORS.labels('unknown_verb').value - unknown, 1)
+
+    def test_stats(self):
+        """
+        Test that stats answers admins and is an unknown verb to everyone else
+        """
+        with patch.object(admin, 'ADMIN_CHARACTERS', frozenset()):
+            executed = COMMAND_EXECUTE_SECONDS.labels('stats').count
+            for command in (b'stats', b'st'):
+                response = MudParser.parse_data(None, CHARACTER, command).message_i
+                self.assertIn(response.decode('utf-8'), MudParser.PHRASE_ERROR)
+            # Not counted as a stats command either
+            self.assertEqual(COMMAND_EXECUTE_SECONDS.labels('stats').count, executed)
+        with patch.object(admin, 'ADMIN_CHARACTERS', frozenset(['TestCharacter'])):
+            MudParser.parse_data(None, CHARACTER, b'look')
+            response = MudParser.parse_data(None, CHARACTER, b'stats').message_i.decode('utf-8')
+        self.assertTrue(response.startswith('Uptime'))
+        self.assertIn('\r\n  look ', response)
+
+    def test_admin_verbs_not_offered(self):
+        """
+        Test that admin verbs are never abbreviated to or suggested
+        """
+        self.assertEqual(VERB_TRIE.resolve('p'), ['poke', 'put'])
+        self.assertEqual(VERB_TRIE.resolve('st'), [])
+        self.assertEqual(VERB_TRIE.resolve('pr'), [])
+
+class TestConnections(unittest.TestCase):
+    def test_refresh_threads(self):
+        """
+        Test that clients which failed to log in or left are not counted as connections
+        """
+        client = lambda character_id, alive: SimpleNamespace(character_id=character_id,
+                                                             is_alive=lambda: alive)
+        failed, connecting, playing, gone = client(None, False), client(None, True), client(7, True), client(8, False)
+        server = SimpleNamespace(unauthenticated_client_threads=[failed, connecting, playing],
+                                 authenticated_client_threads={8: gone})
+        MudServer._refresh_threads(server)
+        self.assertEqual(server.unauthenticated_client_threads, [connecting])
+        self.assertEqual(server.authenticated_client_threads, {7: playing})
@@ -2,9 +2,10 @@ import unittest
 
 from unittest.mock import patch
 from mud_parser import MudParser, Phrase
+from mud_parser.mud_parser import NLP
 from mud_parser.verb import VerbResponse
 from data.models import MudObject, Room, Character
-from exceptions import BadArguments
+from exceptions import BadArguments, UnknownVerb
 
 MUDOBJECT = MudObject(
     id=1,
@@ -24,13 +25,14 @@ TARGET_DESC = 'a stinky green goblin'
 
 MUD_OBJECTS = [MUDOBJECT, CHARACTER]
 
-def mock_match_short_desc(x, y, z):
+def mock_match_short_descs(x, y, z):
     """
-    Mock - Finds objects where y is a substring of short_desc
+    Mock - Finds objects where each of y is a substring of short_desc
     """
-    return [object for object in MUD_OBJECTS if y in object.short_desc]
+    return {chunk: [object for object in MUD_OBJECTS if chunk in object.short_desc.lower()]
+            for chunk in y}
 
-@patch.object(Room, 'match_short_desc', mock_match_short_desc)
+@patch.object(Room, 'match_short_descs', mock_match_short_descs)
 @patch.object(Room, 'get_desc', lambda x, y: ROOM_DESC)
 class TestMudParser(unittest.TestCase):
     def test_unknown_verb(self):
@@ -54,8 +56,19 @@ class TestMudParser(unittest.TestCase):
         """
         parse_return = MudParser.parse_data(None, CHARACTER, b'look testcharacter').message_i
         self.assertTrue(parse_return, CHARACTER.long_desc)
+
+    def test_invalid_utf8(self):
+        """
+        Test that an undecodable line in a burst is answered without losing the others
+        """
+        lines = [b'look', b'\xff\xf4\xff\xfd\x06', b'look']
+        responses = [MudParser.parse_data(None, CHARACTER, line, parts).message_i
+                     for line, parts in zip(lines, MudParser.preparse_many(lines))]
+        self.assertEqual(responses[0], ROOM_DESC.encode('utf-8'))
+        self.assertIn(responses[1].decode('utf-8'), MudParser.PHRASE_ERROR)
+        self.assertEqual(responses[2], ROOM_DESC.encode('utf-8'))
         
-@patch.object(Room, 'match_short_desc', lambda x, y, z: [MUDOBJECT])
+@patch.object(Room, 'match_short_descs', lambda x, y, z: {chunk: [MUDOBJECT] for chunk in y})
 
 class TestPhrase(unittest.TestCase):
     def test_action(self):
@@ -154,3 +167,26 @@ class TestPhrase(unittest.TestCase):
             if index == 2:
                 index = 3
             self.assertEqual(mapping[index], part_of_speech)
+
+
+class TestFastPath(unittest.TestCase):
+    def test_matches_spacy(self):
+        """
+        Test that fast parsed phrases match what spaCy would have produced
+        """
+        for text in ['n', 'northeast', 'look', 'laugh', 'laugh maniacally']:
+            self.assertEqual(Phrase.fast_parse(text), Phrase.parse_doc(NLP(text)))
+
+    def test_falls_back(self):
+        """
+        Test that phrases with targets or prepositions are left to spaCy
+        """
+        for text in ['kill slimy green goblin', 'put cracker in chest', 'laugh at george', "look o'brien"]:
+            self.assertIsNone(Phrase.fast_parse(text))
+
+    def test_unknown_verb(self):
+        """
+        Test that a fast parsed unknown verb is still rejected
+        """
+        with self.assertRaises(UnknownVerb):
+            Phrase('rawriamadinosaur', Phrase.fast_parse('rawriamadinosaur'))
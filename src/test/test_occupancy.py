@@ -0,0 +1,52 @@
+import unittest
+
+from data.occupancy import OccupancyIndex
+
+class TestOccupancyIndex(unittest.TestCase):
+    def setUp(self):
+        self.occupancy = OccupancyIndex()
+        self.occupancy.add(1, 10)
+        self.occupancy.add(2, 10)
+
+    def test_move(self):
+        """
+        Test that moving a character updates both rooms
+        """
+        self.occupancy.move(1, 20)
+        self.assertEqual(self.occupancy.get_occupants(10), {2})
+        self.assertEqual(self.occupancy.get_occupants(20), {1})
+        self.assertEqual(self.occupancy.get_room(1), 20)
+
+    def test_untracked_move(self):
+        """
+        Test that characters who are not logged in are not tracked
+        """
+        self.occupancy.move(3, 10)
+        self.assertEqual(self.occupancy.get_occupants(10), {1, 2})
+
+    def test_remove(self):
+        """
+        Test that disconnecting removes a character
+        """
+        self.occupancy.remove(1)
+        self.occupancy.remove(2)
+        self.assertEqual(self.occupancy.get_occupants(10), set())
+        self.assertEqual(len(self.occupancy), 0)
+
+    def test_reconcile(self):
+        """
+        Test that drift from the database is corrected and missing characters dropped
+        """
+        snapshot = self.occupancy.snapshot()
+        self.assertEqual(self.occupancy.reconcile(snapshot, {1: 30}), 2)
+        self.assertEqual(self.occupancy.get_occupants(30), {1})
+        self.assertEqual(self.occupancy.get_occupants(10), set())
+
+    def test_reconcile_after_move(self):
+        """
+        Test that reconciliation never overwrites a move made after the snapshot
+        """
+        snapshot = self.occupancy.snapshot()
+        self.occupancy.move(1, 20)
+        self.assertEqual(self.occupancy.reconcile(snapshot, {1: 10, 2: 10}), 0)
+        self.assertEqual(self.occupancy.get_room(1), 20)
@@ -0,0 +1,84 @@
+import socket
+import time
+import unittest
+
+from outbound import OutboundBuffer, ConnectionWriter
+
+class TestOutboundBuffer(unittest.TestCase):
+    def test_coalesce(self):
+        """
+        Test that everything queued between takes is written as one chunk
+        """
+        outbound = OutboundBuffer(limit=1024)
+        outbound.put(b'A bell tolls.\r\n')
+        outbound.put(b'The sky darkens.\r\n')
+        self.assertEqual(outbound.take(), b'A bell tolls.\r\nThe sky darkens.\r\n')
+        self.assertEqual(len(outbound), 0)
+
+    def test_disconnect_policy(self):
+        """
+        Test that a slow consumer is cut off once it passes the limit
+        """
+        outbound = OutboundBuffer(limit=8, policy='disconnect')
+        self.assertTrue(outbound.put(b'1234'))
+        self.assertFalse(outbound.put(b'56789'))
+        self.assertTrue(outbound.overflowed)
+        self.assertFalse(outbound.put(b'1'))
+        self.assertIsNone(outbound.take())
+
+    def test_discard_policy(self):
+        """
+        Test that a slow consumer only loses messages while it is over the limit
+        """
+        outbound = OutboundBuffer(limit=8, policy='discard')
+        outbound.put(b'1234')
+        self.assertFalse(outbound.put(b'56789'))
+        self.assertEqual(outbound.take(), b'1234')
+        self.assertTrue(outbound.put(b'56789'))
+        self.assertEqual(outbound.discarded, 1)
+
+    def test_close_drains(self):
+        """
+        Test that closing still hands over what was already queued
+        """
+        outbound = OutboundBuffer(limit=1024)
+        outbound.put(b'Goodbye.\r\n')
+        outbound.close()
+        self.assertFalse(outbound.put(b'late'))
+        self.assertEqual(outbound.take(), b'Goodbye.\r\n')
+        self.assertIsNone(outbound.take())
+
+class TestConnectionWriter(unittest.TestCase):
+    def test_slow_consumer(self):
+        """
+        Test that a client which stops reading is shut down while the writer is blocked on it
+        """
+        server, client = socket.socketpair()
+        self.addCleanup(server.close)
+        self.addCleanup(client.close)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+        client.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        writer = None
+        outbound = OutboundBuffer(limit=4 * 1024 * 1024, policy='disconnect',
+                                  on_overflow=lambda: writer.disconnect())
+        writer = ConnectionWriter(server, outbound)
+        writer.start()
+        # More than the kernel buffers hold - the writer takes it and blocks in sendall
+        self.assertTrue(outbound.put(b'x' * 1024 * 1024))
+        deadline = time.monotonic() + 5
+        while len(outbound) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.1)
+        self.assertEqual(len(outbound), 0)
+        self.assertTrue(writer.is_alive())
+
+        # Output piles up behind the blocked send until the limit is passed
+        self.assertTrue(outbound.put(b'x' * 3 * 1024 * 1024))
+        self.assertFalse(outbound.put(b'x' * 2 * 1024 * 1024))
+        writer.join(timeout=5)
+        self.assertFalse(writer.is_alive())
+        self.assertTrue(outbound.overflowed)
+        # The client is cut off - it reads what got through, then end of stream
+        client.settimeout(5)
+        while client.recv(65536):
+            pass
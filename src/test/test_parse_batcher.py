@@ -0,0 +1,56 @@
+import unittest
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from mud_parser.batcher import ParseBatcher
+
+class MockNLP:
+    """
+    Mock - records the size of every batch and returns phrases as docs
+    """
+    pipe_names = ['tok2vec', 'tagger', 'ner']
+
+    def __init__(self):
+        self.batches = []
+        self.disabled = None
+        self.lock = Lock()
+
+    def pipe(self, phrases, batch_size, disable):
+        with self.lock:
+            self.batches.append(len(phrases))
+            self.disabled = disable
+        return iter(phrases)
+
+class TestParseBatcher(unittest.TestCase):
+    def test_results(self):
+        """
+        Test that every phrase gets its own result back
+        """
+        batcher = ParseBatcher(MockNLP(), str.upper, window=0.01)
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(batcher.parse, [f'phrase {n}' for n in range(100)]))
+        self.assertEqual(results, [f'PHRASE {n}' for n in range(100)])
+
+    def test_batching(self):
+        """
+        Test that concurrent phrases are tagged together, capped at batch_size
+        """
+        nlp = MockNLP()
+        batcher = ParseBatcher(nlp, str.upper, batch_size=8, window=0.2)
+        futures = [batcher.submit(f'phrase {n}') for n in range(20)]
+        for future in futures:
+            future.result(timeout=5)
+        self.assertEqual(sum(nlp.batches), 20)
+        self.assertTrue(all(size <= 8 for size in nlp.batches))
+        self.assertLess(len(nlp.batches), 20)
+        self.assertEqual(nlp.disabled, ['ner'])
+
+    def test_error(self):
+        """
+        Test that a failed batch raises in every waiting client
+        """
+        def extract(doc):
+            raise ValueError(doc)
+        batcher = ParseBatcher(MockNLP(), extract, window=0.01)
+        with self.assertRaises(ValueError):
+            batcher.parse('look')
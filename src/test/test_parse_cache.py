@@ -0,0 +1,63 @@
+import unittest
+
+from unittest.mock import patch
+from mud_parser import MudParser, Phrase
+from mud_parser.parse_cache import ParseCache
+from exceptions import UnknownVerb
+
+class TestParseCache(unittest.TestCase):
+    def test_eviction(self):
+        """
+        Test that the least recently used entry is evicted first
+        """
+        cache = ParseCache(size=2)
+        cache.put('look', 1)
+        cache.put('n', 2)
+        cache.get('look')
+        cache.put('laugh', 3)
+        self.assertIn('look', cache)
+        self.assertNotIn('n', cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_counters(self):
+        """
+        Test hit and miss counting
+        """
+        cache = ParseCache(size=2)
+        cache.put('look', 1)
+        cache.get('look')
+        cache.get('n')
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'entries': 1, 'size': 2})
+
+    def test_disabled(self):
+        """
+        Test that a zero size cache stores nothing
+        """
+        cache = ParseCache(size=0)
+        cache.put('look', 1)
+        self.assertIsNone(cache.get('look'))
+
+class TestMudParserCache(unittest.TestCase):
+    def setUp(self):
+        patcher = patch('mud_parser.mud_parser.PARSE_CACHE', ParseCache(size=16))
+        self.cache = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_phrase_cached(self):
+        """
+        Test that a repeated command is not parsed again
+        """
+        MudParser.parse_phrase('look')
+        with patch.object(Phrase, 'fast_parse') as fast_parse:
+            phrase = MudParser.parse_phrase('look')
+        fast_parse.assert_not_called()
+        self.assertEqual(phrase.verb, 'look')
+
+    def test_error_cached(self):
+        """
+        Test that garbage input keeps failing from the cache
+        """
+        for _ in range(2):
+            with self.assertRaises(UnknownVerb):
+                MudParser.parse_phrase('rawriamadinosaur')
+        self.assertEqual(self.cache.hits, 1)
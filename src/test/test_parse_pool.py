@@ -0,0 +1,31 @@
+import pickle
+import unittest
+
+from mud_parser import Phrase, ParseResult
+from mud_parser.mud_parser import NLP
+from mud_parser.parse_pool import ParsePool
+
+class TestParsePool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = ParsePool(workers=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.shutdown()
+
+    def test_matches_in_process(self):
+        """
+        Test that worker results match parsing in the server process
+        """
+        phrases = ['kill slimy green goblin', 'put big blue cracker in shiny gold chest']
+        results = self.pool.parse_many(phrases)
+        self.assertEqual(results, [Phrase.parse_doc(NLP(phrase)) for phrase in phrases])
+
+    def test_result_is_compact(self):
+        """
+        Test that a worker result is a plain picklable ParseResult
+        """
+        result = self.pool.parse('laugh at george')
+        self.assertIsInstance(result, ParseResult)
+        self.assertEqual(pickle.loads(pickle.dumps(result)), result)
@@ -0,0 +1,97 @@
+import os
+import pstats
+import tempfile
+import time
+import unittest
+
+from unittest.mock import patch
+from profiler import SampledProfiler
+from mud_parser import MudParser
+from mud_parser.verb import admin
+from data.models import Character
+
+CHARACTER = Character(id=2, short_desc='Novice TestCharacter', name='TestCharacter', account_hash='1')
+
+def busy_work(seconds: float) -> str:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+    return 'done'
+
+class TestSampledProfiler(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def profiler(self, mode: str, sample_rate: float=1) -> SampledProfiler:
+        return SampledProfiler(mode=mode, sample_rate=sample_rate, interval=0.001,
+                               directory=self.directory.name)
+
+    def test_disabled(self):
+        """
+        Test that nothing is recorded until the profiler is started
+        """
+        profiler = self.profiler('cprofile')
+        work = profiler.sampled('work')(busy_work)
+        self.assertEqual(work(0), 'done')
+        profiler.start()
+        profiler.sample_rate = 0
+        work(0)
+        self.assertEqual(profiler.stop(), [])
+        self.assertEqual(profiler.samples, 0)
+
+    def test_cprofile(self):
+        """
+        Test that sampled calls are merged into one pstats file per label
+        """
+        profiler = self.profiler('cprofile')
+        work = profiler.sampled('work')(busy_work)
+        outer = profiler.sampled('outer')(lambda: work(0))
+        self.assertTrue(profiler.start())
+        self.assertFalse(profiler.start())
+        for _ in range(3):
+            work(0)
+        outer()
+        paths = profiler.stop()
+        self.assertEqual([os.path.basename(path).split('-', 2)[2] for path in paths],
+                         ['work.pstats', 'outer.pstats'])
+        # The call to work inside outer is part of outer's profile, not a sample of its own
+        self.assertEqual(profiler.samples, 4)
+        stats = pstats.Stats(paths[0])
+        calls = [call[0] for function, call in stats.stats.items() if function[2] == 'busy_work']
+        self.assertEqual(calls, [3])
+
+    def test_stack(self):
+        """
+        Test that the stack sampler writes collapsed stacks rooted at the label
+        """
+        profiler = self.profiler('stack')
+        work = profiler.sampled('work')(busy_work)
+        profiler.start()
+        work(0.05)
+        paths = profiler.stop()
+        self.assertEqual(len(paths), 1)
+        self.assertTrue(paths[0].endswith('.collapsed'))
+        with open(paths[0]) as collapsed:
+            lines = collapsed.read().splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            stack, count = line.rsplit(' ', 1)
+            self.assertTrue(stack.startswith('work;busy_work (test_profiler.py:'))
+            self.assertGreater(int(count), 0)
+
+    def test_profile_verb(self):
+        """
+        Test that admins switch profiling on and off with profile
+        """
+        profiler = self.profiler('cprofile')
+        with patch.object(admin, 'PROFILER', profiler), \
+             patch.object(admin, 'ADMIN_CHARACTERS', frozenset(['TestCharacter'])):
+            response = MudParser.parse_data(None, CHARACTER, b'profile').message_i
+            self.assertTrue(response.startswith(b'Profiling 100% of commands'))
+            self.assertTrue(profiler.enabled)
+            response = MudParser.parse_data(None, CHARACTER, b'profile').message_i
+        self.assertTrue(response.startswith(b'Profiling stopped'))
+        self.assertFalse(profiler.enabled)
@@ -0,0 +1,118 @@
+import unittest
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from config import SQLITE_PRAGMAS
+from data.sqlite import create_sqlite_engine
+from data.query_stats import QueryStats, QUERY_STATS
+from metrics import METRICS, QUERIES, QUERY_SECONDS
+from data.write_behind import POSITIONS
+from data.occupancy import OCCUPANCY
+from login_manager import LoginManager
+from data.models import Character, Direction, MobileType, Mobile, Room, RoomConnection
+from mud_parser import MudParser
+from test.query_budget import QueryBudgetMixin
+
+class TestQueryStats(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_sqlite_engine('sqlite://', SQLITE_PRAGMAS)
+        self.stats = QueryStats(n_plus_one_threshold=3)
+        self.stats.instrument(self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_attribution(self):
+        """
+        Test that queries inside a command are charged to its verb and the rest to OTHER
+        """
+        with Session(self.engine) as session:
+            session.execute(select(Room.id)).all()
+            with self.stats.command('look'):
+                session.execute(select(Room.id)).all()
+                session.execute(select(Character.id)).all()
+        look = self.stats.get('look')
+        self.assertEqual((look.commands, look.queries, look.max_queries, look.n_plus_one), (1, 2, 2, 0))
+        self.assertEqual(self.stats.get(QueryStats.OTHER).queries, 1)
+
+    def test_metrics(self):
+        """
+        Test that query counts and time are exported per verb
+        """
+        queries, seconds = QUERIES.labels('look').value, QUERY_SECONDS.labels('look').value
+        with Session(self.engine) as session, self.stats.command('look'):
+            session.execute(select(Room.id)).all()
+            session.execute(select(Character.id)).all()
+        self.assertEqual(QUERIES.labels('look').value - queries, 2)
+        self.assertGreater(QUERY_SECONDS.labels('look').value, seconds)
+        self.assertIn('pymud_queries_total{verb="look"}', METRICS.render())
+
+    def test_n_plus_one(self):
+        """
+        Test that one statement repeated within a command is flagged
+        """
+        with Session(self.engine) as session:
+            with self.stats.command('put'):
+                for id in range(3):
+                    session.execute(select(Room.id).where(Room.id == id)).all()
+            with self.stats.command('put'):
+                session.execute(select(Room.id)).all()
+        put = self.stats.get('put')
+        self.assertEqual((put.commands, put.queries, put.n_plus_one), (2, 4, 1))
+
+class TestQueryBudget(QueryBudgetMixin, unittest.TestCase):
+    """
+    Queries each verb may run against the database when no in-memory index is loaded
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = create_sqlite_engine('sqlite://', SQLITE_PRAGMAS)
+        QUERY_STATS.instrument(cls.engine)
+        with Session(cls.engine) as session:
+            void = Room.create_room(session, 'The Void', 'This is the deepest darkest void.')
+            light = Room.create_room(session, 'The Light', 'You\'ve gone into the light.')
+            Direction.create_direction(session, 'east', 'west')
+            RoomConnection.create_bidirectional_connection(session, void.id, light.id, 'east')
+            MobileType.add_type(session, 'monster')
+            session.add_all([Mobile(short_desc='a big stinky green goblin', long_desc='A goblin.',
+                                    mobile_type='monster', parent=void.id),
+                             Character(name='Rha', account_hash='1', short_desc='Rha, God of the Sun',
+                                       parent=void.id)])
+            session.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+
+    def setUp(self):
+        self.session = Session(self.engine)
+        self.character = Character.get_character(self.session, 'Rha')
+
+    def tearDown(self):
+        self.session.close()
+
+    def test_look(self):
+        with self.assertQueryBudget('look', 1):
+            MudParser.parse_data(self.session, self.character, b'look')
+
+    def test_look_target(self):
+        with self.assertQueryBudget('look', 1):
+            MudParser.parse_data(self.session, self.character, b'look goblin')
+
+    def test_move(self):
+        with self.assertQueryBudget('east', 2):
+            MudParser.parse_data(self.session, self.character, b'east')
+        with self.assertQueryBudget('west', 2):
+            MudParser.parse_data(self.session, self.character, b'west')
+        # Moves are written behind - drop them rather than leave them to other tests
+        POSITIONS.flushed(POSITIONS.take([self.character.id]))
+
+    def test_login(self):
+        with self.assertQueryBudget('login', 2):
+            login_manager = LoginManager(self.session, LoginManager.DEVELOPMENT_LOGIN, None, lambda message: None)
+        self.assertTrue(login_manager.success)
+        OCCUPANCY.remove(login_manager.character.id)
+
+    def test_emote(self):
+        with self.assertQueryBudget('laugh', 0):
+            MudParser.parse_data(self.session, self.character, b'laugh')
@@ -0,0 +1,37 @@
+import unittest
+
+from unittest.mock import patch
+from mud_parser import Phrase, ParseResult
+from mud_parser.engine import RuleEngine
+# Imported as a module so the spaCy suite is not collected a second time here
+from test import test_mud_parser
+
+RULES = RuleEngine()
+
+@patch('mud_parser.mud_parser.NLP', RULES)
+class TestRulePhrase(test_mud_parser.TestPhrase):
+    """
+    Conformance - every spaCy phrase test must also pass with the rule engine
+    """
+
+class TestRuleEngine(unittest.TestCase):
+    def test_tags(self):
+        """
+        Test that grammar words are tagged and the rest become nouns
+        """
+        tags = [token.pos_ for token in RULES('put the big cracker quickly into chest')]
+        self.assertEqual(tags, ['VERB', 'DET', 'NOUN', 'NOUN', 'ADV', 'ADP', 'NOUN'])
+
+    def test_parse(self):
+        """
+        Test a full parse through Phrase.parse_doc
+        """
+        self.assertEqual(Phrase.parse_doc(RULES('put a shiny gold coin in the old chest')),
+                         ParseResult('put', ('in',), ('shiny gold coin', 'old chest'), ()))
+
+    def test_pipe(self):
+        """
+        Test that pipe tags every phrase in order
+        """
+        docs = list(RULES.pipe(['look', 'kill goblin'], batch_size=2, disable=['ner']))
+        self.assertEqual([doc[-1].text for doc in docs], ['look', 'goblin'])
@@ -0,0 +1,45 @@
+import unittest
+
+import sqlalchemy as db
+from sqlalchemy.orm import Session
+from data.models import Base, MudObject, Room
+
+class TestMatchShortDescs(unittest.TestCase):
+    def setUp(self):
+        engine = db.create_engine('sqlite://')
+        Base.metadata.create_all(engine)
+        self.session = Session(engine)
+        self.room = Room.create_room(self.session, 'The Void', 'This is the deepest darkest void.')
+        self.other_room = Room.create_room(self.session, 'The Light', 'You\'ve gone into the light.')
+        self.session.add_all([
+            MudObject(short_desc='a rusty sword', parent=self.room.id),
+            MudObject(short_desc='a Green goblin', parent=self.room.id),
+            MudObject(short_desc='a rusty shield', parent=self.other_room.id),
+        ])
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+
+    def test_room(self):
+        """
+        Test that every chunk is resolved within the room
+        """
+        matches = Room.match_short_descs(self.session, ['rusty', 'goblin', 'dragon'], self.room.id)
+        self.assertEqual([object.short_desc for object in matches['rusty']], ['a rusty sword'])
+        self.assertEqual([object.short_desc for object in matches['goblin']], ['a Green goblin'])
+        self.assertEqual(matches['dragon'], [])
+
+    def test_case(self):
+        """
+        Test that lowercased input matches capitalised short descriptions
+        """
+        matches = Room.match_short_descs(self.session, ['green goblin'], self.room.id)
+        self.assertEqual([object.short_desc for object in matches['green goblin']], ['a Green goblin'])
+
+    def test_global(self):
+        """
+        Test that leaving out the room searches every object
+        """
+        matches = Room.match_short_descs(self.session, ['rusty'])
+        self.assertEqual(len(matches['rusty']), 2)
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from config import SQLITE_PRAGMAS
+from data.sqlite import create_sqlite_engine
+from data.models import MudObject, Room
+
+class TestSqliteBackend(unittest.TestCase):
+    def test_in_memory(self):
+        """
+        Test that an in-memory database is shared by every session and has the schema created
+        """
+        engine = create_sqlite_engine('sqlite://', SQLITE_PRAGMAS)
+        with Session(engine) as session:
+            room_id = Room.create_room(session, 'The Void', 'This is the deepest darkest void.').id
+        with Session(engine) as session:
+            self.assertEqual(MudObject.get_short_desc(session, room_id), 'The Void')
+        engine.dispose()
+
+    def test_pragmas(self):
+        """
+        Test that file databases run in WAL mode and enforce foreign keys
+        """
+        path = os.path.join(tempfile.mkdtemp(), 'pymud.db')
+        engine = create_sqlite_engine(f'sqlite:///{path}', SQLITE_PRAGMAS)
+        with engine.connect() as connection:
+            self.assertEqual(connection.exec_driver_sql('PRAGMA journal_mode').scalar(), 'wal')
+            self.assertEqual(connection.exec_driver_sql('PRAGMA foreign_keys').scalar(), 1)
+        engine.dispose()
+
+    def test_foreign_keys(self):
+        """
+        Test that a dangling parent is refused as it would be on Postgres
+        """
+        engine = create_sqlite_engine('sqlite://', SQLITE_PRAGMAS)
+        with Session(engine) as session:
+            session.add(MudObject(short_desc='a rusty sword', parent=12345))
+            with self.assertRaises(IntegrityError):
+                session.commit()
+        engine.dispose()
@@ -0,0 +1,49 @@
+import unittest
+
+from data.target_index import TargetIndex
+
+class TestTargetIndex(unittest.TestCase):
+    def setUp(self):
+        self.targets = TargetIndex()
+        self.targets.load([
+            (1, 'a big stinky green goblin', 'It smells.', 10),
+            (2, 'a goblin', 'A plain goblin.', 10),
+            (3, 'a greenish gem', 'It sparkles.', 10),
+            (4, 'a goblin king', 'He wears a crown.', 20),
+        ])
+
+    def test_ranking(self):
+        """
+        Test that exact tokens beat prefixes, which beat substrings
+        """
+        self.assertEqual(self.targets.match(10, ['goblin'])[0].id, 2)
+        self.assertEqual(self.targets.match(10, ['green'])[0].id, 1)
+        self.assertEqual(self.targets.match(10, ['stin'])[0].id, 1)
+        self.assertEqual(self.targets.match(10, ['nish'])[0].id, 3)
+
+    def test_all_words(self):
+        """
+        Test that every word of a chunk has to match the same object
+        """
+        self.assertEqual(self.targets.match(10, ['green gob'])[0].id, 1)
+        self.assertEqual(self.targets.match(10, ['green king']), [None])
+
+    def test_one_pass(self):
+        """
+        Test that all chunks resolve in one call, in order
+        """
+        matches = self.targets.match(10, ['gem', 'dragon', 'stinky'])
+        self.assertEqual([match and match.id for match in matches], [3, None, 1])
+
+    def test_maintenance(self):
+        """
+        Test that created, moved and deleted objects are followed
+        """
+        self.targets.add(5, 'a rusty sword', 'Old.', 20)
+        self.targets.move(4, 10)
+        self.targets.remove(1)
+        self.assertEqual(self.targets.match(20, ['sword'])[0].long_desc, 'Old.')
+        self.assertEqual(self.targets.match(10, ['king'])[0].id, 4)
+        self.assertEqual(self.targets.match(10, ['stinky']), [None])
+        self.assertEqual(self.targets.match(20, ['king']), [None])
+        self.assertEqual(len(self.targets), 4)
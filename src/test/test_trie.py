@@ -0,0 +1,63 @@
+import unittest
+
+from mud_parser import Phrase
+from mud_parser.trie import PrefixTrie
+from mud_parser.verb import Emote
+from exceptions import BadArguments, UnknownVerb
+
+class TestPrefixTrie(unittest.TestCase):
+    def setUp(self):
+        self.trie = PrefixTrie(['north', 'northeast', 'northwest', 'look', 'laugh'])
+
+    def test_unique_prefix(self):
+        """
+        Test that an unambiguous prefix resolves to its word
+        """
+        self.assertEqual(self.trie.resolve('lo'), ['look'])
+        self.assertEqual(self.trie.resolve('northe'), ['northeast'])
+
+    def test_exact_match(self):
+        """
+        Test that a whole word wins over longer words it prefixes
+        """
+        self.assertEqual(self.trie.resolve('north'), ['north'])
+
+    def test_ambiguous_prefix(self):
+        """
+        Test that an ambiguous prefix reports its candidates
+        """
+        self.assertEqual(self.trie.resolve('l'), ['laugh', 'look'])
+        self.assertEqual(self.trie.resolve('nor', limit=2), ['north', 'northeast'])
+
+    def test_unknown_prefix(self):
+        self.assertEqual(self.trie.resolve('x'), [])
+        self.assertNotIn('nort', self.trie)
+        self.assertEqual(len(self.trie), 5)
+
+class TestAbbreviations(unittest.TestCase):
+    def test_complete_adverb(self):
+        """
+        Test adverb completion by prefix
+        """
+        self.assertEqual(Emote.complete_adverb('ang'), 'angrily')
+        self.assertEqual(Emote.complete_adverb('maniac'), 'maniacally')
+        self.assertIsNone(Emote.complete_adverb('an'))
+
+    def test_ambiguous_adverb(self):
+        """
+        Test that a prefix of several adverbs is refused with the options
+        """
+        with self.assertRaises(BadArguments) as error:
+            Emote.complete_adverb('wea')
+        self.assertIn('wearily', str(error.exception))
+
+    def test_verb(self):
+        """
+        Test that abbreviated verbs resolve and exact directions are kept
+        """
+        self.assertEqual(Phrase('lo', Phrase.fast_parse('lo')).verb, 'look')
+        self.assertEqual(Phrase('n', Phrase.fast_parse('n')).verb, 'n')
+        with self.assertRaises(BadArguments):
+            Phrase('no', Phrase.fast_parse('no'))
+        with self.assertRaises(UnknownVerb):
+            Phrase('xyzzy', Phrase.fast_parse('xyzzy'))
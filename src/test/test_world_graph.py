@@ -0,0 +1,137 @@
+import unittest
+
+from unittest.mock import patch
+from sqlalchemy.orm import Session
+from config import SQLITE_PRAGMAS
+from data.sqlite import create_sqlite_engine
+from data.query_stats import QUERY_STATS
+from data.write_behind import POSITIONS
+from data.world_graph import WorldGraph
+from data.models import Character, Direction, Room, RoomConnection
+from mud_parser import MudParser
+from mud_parser.verb import direction
+from test.query_budget import QueryBudgetMixin
+
+class TestWorldGraph(unittest.TestCase):
+    def setUp(self):
+        self.world = WorldGraph()
+        self.world.load(
+            [(1, 'The Void', 'This is the deepest darkest void.'), (2, 'The Light', 'You\'ve gone into the light.')],
+            [(1, 'east', 2), (2, 'west', 1)],
+            [('east', 'west'), ('west', 'east')])
+
+    def test_load(self):
+        """
+        Test that rooms, exits and directions are served from the graph
+        """
+        self.assertTrue(self.world.loaded)
+        self.assertEqual(len(self.world), 2)
+        self.assertEqual(self.world.get_desc(1), ('The Void', 'This is the deepest darkest void.'))
+        self.assertEqual(self.world.get_exits(1), ['east'])
+        self.assertEqual(self.world.get_destination(1, 'east'), 2)
+        self.assertEqual(self.world.get_inverse('east'), 'west')
+
+    def test_missing_exit(self):
+        """
+        Test that an exit or room that does not exist has no destination
+        """
+        self.assertIsNone(self.world.get_destination(1, 'west'))
+        self.assertIsNone(self.world.get_destination(3, 'east'))
+
+    def test_reload(self):
+        """
+        Test that load replaces the graph rather than adding to it
+        """
+        self.world.load([(3, 'The Garden', 'Flowers everywhere.')], [], [])
+        self.assertEqual(len(self.world), 1)
+        self.assertIsNone(self.world.get_destination(1, 'east'))
+
+class TestDirection(unittest.TestCase):
+    def test_direction_name(self):
+        """
+        Test that abbreviations resolve to the direction stored on room connections
+        """
+        self.assertEqual(direction.North.get_direction_name(), 'north')
+        self.assertEqual(direction.N.get_direction_name(), 'north')
+        self.assertEqual(direction.NE.get_direction_name(), 'northeast')
+
+class TestLoadedWorld(QueryBudgetMixin, unittest.TestCase):
+    """
+    Rooms and moves served from a loaded world graph run no queries
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = create_sqlite_engine('sqlite://', SQLITE_PRAGMAS)
+        QUERY_STATS.instrument(cls.engine)
+        with Session(cls.engine) as session:
+            void = Room.create_room(session, 'The Void', 'This is the deepest darkest void.')
+            light = Room.create_room(session, 'The Light', 'You\'ve gone into the light.')
+            garden = Room.create_room(session, 'The Garden', 'Flowers everywhere.')
+            Direction.create_direction(session, 'east', 'west')
+            Direction.create_direction(session, 'north', 'south')
+            RoomConnection.create_bidirectional_connection(session, void.id, light.id, 'east')
+            RoomConnection.create_bidirectional_connection(session, void.id, garden.id, 'north')
+            session.add(Character(name='Rha', account_hash='1', short_desc='Rha, God of the Sun', parent=void.id))
+            session.commit()
+            cls.room_ids = void.id, light.id, garden.id
+            # Other tests expect the database fallback - load into a graph of our own
+            cls.world = patch('data.models.WORLD', WorldGraph())
+            cls.world.start()
+            Room.load_world_graph(session)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.world.stop()
+        cls.engine.dispose()
+
+    def setUp(self):
+        self.session = Session(self.engine)
+        self.character = Character.get_character(self.session, 'Rha')
+
+    def tearDown(self):
+        # Moves are written behind - drop them rather than leave them to other tests
+        POSITIONS.flushed(POSITIONS.take([self.character.id]))
+        self.session.close()
+
+    def test_look(self):
+        void, _, _ = self.room_ids
+        with self.assertQueryBudget('look', 0):
+            response = MudParser.parse_data(self.session, self.character, b'look')
+        self.assertEqual(response.message_i, b'The Void\r\nThis is the deepest darkest void.')
+        self.assertEqual(Room.get_exits(self.session, void), ['east', 'north'])
+
+    def test_move(self):
+        void, light, _ = self.room_ids
+        with self.assertQueryBudget('east', 0):
+            MudParser.parse_data(self.session, self.character, b'east')
+        self.assertEqual(self.character.parent, light)
+        with self.assertQueryBudget('west', 0):
+            MudParser.parse_data(self.session, self.character, b'west')
+        self.assertEqual(self.character.parent, void)
+
+    def test_abbreviation(self):
+        """
+        Test that n takes the north exit
+        """
+        _, _, garden = self.room_ids
+        with self.assertQueryBudget('n', 0):
+            response = MudParser.parse_data(self.session, self.character, b'n')
+        self.assertEqual(self.character.parent, garden)
+        self.assertEqual(response.message_i, b'The Garden\r\nFlowers everywhere.')
+
+    def test_missing_exit(self):
+        with self.assertQueryBudget('west', 0):
+            response = MudParser.parse_data(self.session, self.character, b'west')
+        self.assertEqual(response.message_i, b'There\'s no exit in that direction.')
+
+    def test_bidirectional_connection(self):
+        """
+        Test that the inverse of a new connection comes from the graph
+        """
+        _, light, garden = self.room_ids
+        with patch.object(self.session, 'execute', side_effect=AssertionError('Inverse looked up in the database')):
+            connections = RoomConnection.create_bidirectional_connection(self.session, light, garden, 'east')
+        self.assertEqual([connection.direction for connection in connections], ['east', 'west'])
+        self.session.delete(connections[0])
+        self.session.delete(connections[1])
+        self.session.commit()
@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+
+from unittest.mock import patch
+from sqlalchemy.orm import Session
+from config import SQLITE_PRAGMAS
+from data.sqlite import create_sqlite_engine
+from data.models import Base, Character, Room
+from data.write_behind import PositionBuffer, POSITIONS
+
+class TestPositionBuffer(unittest.TestCase):
+    def setUp(self):
+        self.journal_path = os.path.join(tempfile.mkdtemp(), 'positions.journal')
+        self.positions = PositionBuffer(self.journal_path)
+
+    def tearDown(self):
+        if self.positions._journal:
+            self.positions._journal.close()
+
+    def test_latest_position_wins(self):
+        """
+        Test that only the last move of a character is kept
+        """
+        self.positions.record(1, 10)
+        self.positions.record(1, 11)
+        self.positions.record(2, 20)
+        self.assertEqual(self.positions.pending(1), 11)
+        self.assertEqual(self.positions.take([1]), {1: 11})
+        self.assertEqual(self.positions.take(), {2: 20})
+        self.positions.flushed({1: 11, 2: 20})
+        self.assertIsNone(self.positions.pending(1))
+
+    def test_in_flight(self):
+        """
+        Test that taken positions stay pending until their flush commits
+        """
+        self.positions.record(1, 10)
+        self.positions.record(2, 20)
+        positions = self.positions.take()
+        self.assertEqual((self.positions.pending(1), self.positions.pending(2)), (10, 20))
+        # A move during the flush is newer than what the flush is writing
+        self.positions.record(1, 11)
+        self.positions.flushed(positions)
+        self.assertEqual(self.positions.pending(1), 11)
+        self.assertIsNone(self.positions.pending(2))
+
+    def test_restore(self):
+        """
+        Test that a failed flush is put back without undoing newer moves
+        """
+        self.positions.record(1, 10)
+        self.positions.record(2, 20)
+        positions = self.positions.take()
+        self.positions.record(1, 12)
+        self.positions.restore(positions)
+        self.assertEqual(self.positions.take(), {1: 12, 2: 20})
+
+    def test_recover(self):
+        """
+        Test that unflushed moves survive a crash through the journal
+        """
+        self.positions.record(1, 10)
+        self.positions.record(2, 20)
+        self.positions.flushed(self.positions.take([2]))
+        self.positions.record(1, 11)
+
+        recovered = PositionBuffer(self.journal_path)
+        self.assertEqual(recovered.recover(), 1)
+        self.assertEqual(recovered.take(), {1: 11})
+
+class TestFlushPositions(unittest.TestCase):
+    def setUp(self):
+        path = os.path.join(tempfile.mkdtemp(), 'pymud.db')
+        self.engine = create_sqlite_engine(f'sqlite:///{path}', SQLITE_PRAGMAS)
+        Base.metadata.create_all(self.engine)
+        with Session(self.engine) as session:
+            rooms = [Room.create_room(session, f'Room {index}', 'A room.').id for index in range(2)]
+            character = Character(name='Rha', account_hash='1', short_desc='Rha', parent=rooms[0])
+            session.add(character)
+            session.commit()
+            self.character_id = character.id
+        self.rooms = rooms
+
+    def tearDown(self):
+        POSITIONS.flushed(POSITIONS.take([self.character_id]))
+        self.engine.dispose()
+
+    def test_refresh_during_flush(self):
+        """
+        Test that a refresh between take and commit sees the new room, not the one in the database
+        """
+        POSITIONS.record(self.character_id, self.rooms[1])
+        seen = []
+
+        def refresh_then_commit(commit):
+            with Session(self.engine) as other:
+                seen.append(Character.refresh(other, self.character_id).parent)
+            commit()
+
+        with Session(self.engine) as session:
+            commit = session.commit
+            with patch.object(session, 'commit', lambda: refresh_then_commit(commit)):
+                self.assertEqual(Character.flush_positions(session, [self.character_id]), 1)
+        self.assertEqual(seen, [self.rooms[1]])
+        self.assertIsNone(POSITIONS.pending(self.character_id))
+        with Session(self.engine) as session:
+            self.assertEqual(Character.refresh(session, self.character_id).parent, self.rooms[1])